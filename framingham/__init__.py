@@ -0,0 +1 @@
+"""Helpers shared by the pages of the Framingham Streamlit app."""
@@ -0,0 +1,141 @@
+"""Benchmarks of the data pipeline on synthetic cohorts of increasing size.
+
+Every stage (loading the snapshot, imputation, outlier detection and
+masking, missing-data profile, describe, correlations, aggregations,
+figure rendering) is timed on its own, without the Streamlit caches, on
+synthetic cohorts fitted on the real data (`framingham.synthetic`). The
+results can be saved as a JSON baseline and compared with a later run to
+catch regressions.
+
+    python -m framingham.benchmark --sizes 10000 100000 1000000 --json baseline.json
+    python -m framingham.benchmark --sizes 10000 100000 --compare baseline.json
+"""
+import argparse
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+from framingham import charts
+from framingham.cleaning import MEDIAN_COLUMNS, SELECTED_COLUMNS, impute_missing, impute_outliers, mask_outliers
+from framingham.correlation import CorrelationStats
+from framingham.cube import AggregateCube
+from framingham.data import load_rq
+from framingham.figures import FigureCache
+from framingham.missingness import MissingnessProfile
+from framingham.outliers import detect_outliers
+from framingham.synthetic import SyntheticCohort
+
+DEFAULT_SIZES = [10_000, 100_000, 1_000_000]
+# a stage is a regression when it is this many times slower than the baseline
+DEFAULT_TOLERANCE = 1.25
+
+
+def _stages(df, path):
+    """(name, function) of the stages, in pipeline order; each function runs one stage."""
+    imputed = impute_missing(df, 5, MEDIAN_COLUMNS)
+    outliers = detect_outliers(df, SELECTED_COLUMNS)
+    masked = mask_outliers(imputed, outliers, SELECTED_COLUMNS)
+    correlations = CorrelationStats.from_frame(df).matrix()
+    return [
+        ('load', lambda: pd.read_parquet(path)),
+        ('impute_missing', lambda: impute_missing(df, 5, MEDIAN_COLUMNS)),
+        ('detect_outliers', lambda: detect_outliers(df, SELECTED_COLUMNS)),
+        ('mask_outliers', lambda: mask_outliers(imputed, outliers, SELECTED_COLUMNS)),
+        ('knn_outliers', lambda: impute_outliers(masked, SELECTED_COLUMNS, 3)),
+        ('missingness_profile', lambda: MissingnessProfile.build(df)),
+        ('describe', lambda: df.describe()),
+        ('corr', lambda: CorrelationStats.from_frame(df).matrix()),
+        ('aggregate_cube', lambda: AggregateCube.build(df)),
+        ('figure_heatmap', lambda: FigureCache().render('heatmap', charts.correlation_heatmap, correlations)),
+        ('figure_density', lambda: FigureCache().render('density', charts.age_bmi_density, df)),
+    ]
+
+
+def run_benchmarks(sizes=DEFAULT_SIZES, repeat=1, source=None, seed=0):
+    """Seconds of every stage for every cohort size: {size: {stage: seconds}}."""
+    generator = SyntheticCohort.fit(load_rq() if source is None else source)
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        for size in sizes:
+            path = os.path.join(tmp, f'cohort_{size}.parquet')
+            start = time.perf_counter()
+            generator.write_parquet(path, size, seed=seed)
+            df = pd.read_parquet(path)
+            results[size] = {'generate': time.perf_counter() - start}
+            for name, stage in _stages(df, path):
+                timings = []
+                for _ in range(repeat):
+                    start = time.perf_counter()
+                    stage()
+                    timings.append(time.perf_counter() - start)
+                # the fastest run is the least disturbed by the rest of the machine
+                results[size][name] = min(timings)
+            print(f"{size} rows: " + ", ".join(f"{name} {seconds:.3f} s" for name, seconds in results[size].items()),
+                  file=sys.stderr)
+    return results
+
+
+def environment():
+    """Where the benchmarks ran, saved with the results."""
+    return {
+        'python': sys.version.split()[0],
+        'numpy': np.__version__,
+        'pandas': pd.__version__,
+        'platform': platform.platform(),
+        'cpu_count': os.cpu_count(),
+        'created': time.strftime('%Y-%m-%dT%H:%M:%S'),
+    }
+
+
+def compare(results, baseline):
+    """(size, stage, seconds, baseline seconds, ratio) of the stages measured in both runs."""
+    rows = []
+    for size, stages in results.items():
+        for name, seconds in stages.items():
+            before = baseline.get(str(size), {}).get(name)
+            if before:
+                rows.append((size, name, seconds, before, seconds / before))
+    return rows
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--sizes', type=int, nargs='+', default=DEFAULT_SIZES, help="numbers of rows")
+    parser.add_argument('--repeat', type=int, default=1, help="runs per stage, the fastest is kept")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--json', help="write the results to this file (a baseline)")
+    parser.add_argument('--compare', help="baseline file to compare the results with")
+    parser.add_argument('--tolerance', type=float, default=DEFAULT_TOLERANCE,
+                        help="slowdown ratio reported as a regression")
+    args = parser.parse_args(argv)
+
+    results = run_benchmarks(args.sizes, args.repeat, seed=args.seed)
+    for size, stages in results.items():
+        print(f"{size} rows")
+        for name, seconds in stages.items():
+            print(f"    {name:<20} {seconds:10.3f} s")
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump({'environment': environment(), 'results': results}, f, indent=2)
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)['results']
+        regressions = 0
+        print(f"Compared with {args.compare}")
+        for size, name, seconds, before, ratio in compare(results, baseline):
+            slower = ratio > args.tolerance
+            regressions += slower
+            print(f"    {size:>10} {name:<20} {before:8.3f} s -> {seconds:8.3f} s  x{ratio:.2f}"
+                  + ("  REGRESSION" if slower else ""))
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,106 @@
+"""Bitmap indexes for the cohort filter of the Data preparation page.
+
+Every value of a filterable column (sex, smoking, diabetes, BP medication,
+period, BMI band, age in years) gets a bitmap with one bit per row, packed in
+64-bit words. A cohort is resolved with bitwise OR within a column, bitwise
+AND across columns and a popcount, so its size and CHD prevalence cost a few
+word operations per 64 rows instead of a scan of the data frame.
+"""
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+from framingham.data import BMI_BINS, BMI_LABELS
+
+# filterable columns: BMI_Category is the band of BMI, AGE is indexed per whole year
+BITMAP_COLUMNS = ['SEX', 'CURSMOKE', 'DIABETES', 'BPMEDS', 'PERIOD', 'BMI_Category', 'AGE']
+
+if hasattr(np, 'bitwise_count'):
+    def popcount(words):
+        """Number of set bits of a bitmap."""
+        return int(np.bitwise_count(words).sum(dtype=np.int64))
+else:
+    # numpy < 2.0: bit counts of every byte value
+    _BYTE_COUNTS = np.array([bin(i).count('1') for i in range(256)], dtype=np.uint8)
+
+    def popcount(words):
+        """Number of set bits of a bitmap."""
+        return int(_BYTE_COUNTS[words.view(np.uint8)].sum(dtype=np.int64))
+
+
+def pack(mask):
+    """Bitmap (uint64 words) of a boolean array."""
+    n_words = -(-len(mask) // 64)
+    bits = np.zeros(n_words * 64, dtype=bool)
+    bits[:len(mask)] = mask
+    # little bit order, so the word layout does not depend on the byte order of the machine
+    return np.packbits(bits, bitorder='little').view('<u8')
+
+
+class BitmapIndex:
+    """One bitmap per value of each column of BITMAP_COLUMNS, plus the CHD cases."""
+
+    def __init__(self, bitmaps, cases, n_rows):
+        self.bitmaps = bitmaps
+        self.cases = cases
+        self.n_rows = n_rows
+        self.all = pack(np.ones(n_rows, dtype=bool))
+
+    @classmethod
+    def build(cls, df, bmi_bins=BMI_BINS, bmi_labels=BMI_LABELS):
+        columns = {column: df[column] for column in BITMAP_COLUMNS if column not in ('BMI_Category', 'AGE')}
+        columns['BMI_Category'] = pd.cut(df['BMI'], bins=bmi_bins, labels=bmi_labels)
+        # whole years, the age filter is a range of years
+        columns['AGE'] = np.floor(df['AGE'])
+        bitmaps = {}
+        for name, values in columns.items():
+            # one pass per column: the rows are grouped by value, missing values get no bitmap
+            codes, uniques = pd.factorize(values, sort=True)
+            bitmaps[name] = {}
+            for code, value in enumerate(uniques):
+                value = value.item() if hasattr(value, 'item') else value
+                bitmaps[name][value] = pack(codes == code)
+        return cls(bitmaps, pack((df['ANYCHD'] == 1).to_numpy()), len(df))
+
+    def values(self, column):
+        """Indexed values of a column, sorted."""
+        return list(self.bitmaps[column])
+
+    def select(self, **filters):
+        """Bitmap of the rows matching every filter.
+
+        A filter is a list of accepted values of a column, or for AGE a
+        (youngest, oldest) range of years. Columns without a filter (None)
+        accept every row, including the rows with a missing value.
+        """
+        selected = self.all.copy()
+        for column, accepted in filters.items():
+            if accepted is None:
+                continue
+            if column == 'AGE':
+                low, high = accepted
+                accepted = [age for age in self.bitmaps['AGE'] if low <= age <= high]
+            union = np.zeros_like(selected)
+            for value in accepted:
+                bitmap = self.bitmaps[column].get(value)
+                if bitmap is not None:
+                    union |= bitmap
+            selected &= union
+        return selected
+
+    def summary(self, selected):
+        """Size, number of CHD cases and CHD prevalence of a cohort."""
+        size = popcount(selected)
+        cases = popcount(selected & self.cases)
+        return {'rows': size, 'cases': cases, 'prevalence': cases / size if size else float('nan')}
+
+    def breakdown(self, selected, column):
+        """Size and CHD prevalence of the cohort per value of a column."""
+        rows = {value: self.summary(selected & bitmap) for value, bitmap in self.bitmaps[column].items()}
+        return pd.DataFrame.from_dict(rows, orient='index')
+
+
+@st.cache_resource(show_spinner="Indexing the cohort...", max_entries=4)
+def bitmap_index(_df, key, bmi_bins=tuple(BMI_BINS)):
+    """Bitmap index of a data frame, built once per data version `key` and BMI binning."""
+    return BitmapIndex.build(_df, list(bmi_bins))
@@ -0,0 +1,134 @@
+"""Static charts of the app, drawn on standalone matplotlib figures.
+
+Each function takes the data it needs and returns a `Figure`; they are meant
+to be rendered through `framingham.figures.show_figure`.
+"""
+import numpy as np
+import seaborn as sns
+from matplotlib.colors import LogNorm
+from matplotlib.figure import Figure
+
+
+def correlation_heatmap(correlation_matrix):
+    """Correlation heatmap with the |r| >= 0.5 correlations annotated."""
+    # Create the heatmap
+    fig = Figure(figsize=(18, 12))
+    ax = fig.subplots()
+    sns.heatmap(
+        correlation_matrix,
+        annot=False,
+        cmap="RdBu_r",
+        linewidths=1,
+        center=0,
+        cbar_kws={"shrink": 0.8, "label": "Correlation Coefficient"},
+        ax=ax,
+    )
+
+    # Annotate significant correlations (off the diagonal), positions from one mask
+    values = correlation_matrix.to_numpy()
+    significant = (np.abs(np.nan_to_num(values)) >= 0.5) & ~np.eye(*values.shape, dtype=bool)
+    for row, col in zip(*np.nonzero(significant)):
+        ax.text(
+            col + 0.5,
+            row + 0.5,
+            f"{values[row, col]:.2f}",
+            ha="center",
+            va="center",
+            color="black",
+            fontsize=12,
+            weight="bold",
+        )
+
+    ax.set_title("Correlation Heatmap", fontsize=20, weight="bold")
+    ax.set_xticklabels(ax.get_xticklabels(), fontsize=12, rotation=45, ha="right")
+    ax.set_yticklabels(ax.get_yticklabels(), fontsize=12, rotation=0)
+    return fig
+
+
+def missing_by_period(period_missing):
+    """Heatmap of the number of missing values per column (columns) and examination period (index)."""
+
+    fig = Figure(figsize=(10, 6))
+    ax = fig.subplots()
+    sns.heatmap(period_missing, cmap="coolwarm", annot=True, fmt=".0f",
+                linewidths=0.5, annot_kws={"size": 8},
+                cbar_kws={'label': 'Count of Missing Values'}, ax=ax)
+    ax.set_title('Missing Data Across Examination Periods', fontsize=16)
+    ax.set_xlabel('Variables', fontsize=12)
+    ax.set_ylabel('Examination Period', fontsize=12)
+    ax.tick_params(axis='x', labelsize=10, labelrotation=45)
+    for label in ax.get_xticklabels():
+        label.set_horizontalalignment('right')
+    return fig
+
+
+def proportions_bar(proportions, title, xlabel, ylabel):
+    """Bar chart of the percentage of each category (`proportions`: share per category)."""
+    proportions = proportions * 100
+
+    fig = Figure(figsize=(6, 4))
+    ax = fig.subplots()
+    proportions.plot(kind='bar', color=['lightskyblue', 'coral'], ax=ax)
+    for i, v in enumerate(proportions):
+        ax.text(i, v + 1, f'{v:.1f}%', ha='center', va='bottom', fontsize=10)
+    ax.set_title(title)
+    ax.set_xlabel(xlabel)
+    ax.set_ylabel(ylabel)
+    ax.set_ylim(0, 100)
+    return fig
+
+
+def period_trend(means):
+    """Average of each column per examination period (`means`: one row per period)."""
+    fig = Figure(figsize=(10, 6))
+    ax = fig.subplots()
+    means.plot(marker='o', ax=ax)
+    ax.set_title('Average Values Over Examination Periods')
+    ax.set_xlabel('Examination Period')
+    ax.set_ylabel('Average Value')
+    ax.grid(True)
+    return fig
+
+
+def age_bmi_scatter(df):
+    """Scatter plot of BMI vs. age colored by CHD status (one point per row)."""
+    fig = Figure(figsize=(8, 6))
+    ax = fig.subplots()
+    sns.scatterplot(data=df, x='AGE', y='BMI', hue='ANYCHD', palette='Set1', ax=ax)
+    ax.set_title('BMI vs. Age by CHD Status')
+    ax.set_xlabel('Age')
+    ax.set_ylabel('BMI')
+    ax.legend(title='CHD Status (0 = No, 1 = Yes)', loc='upper right')
+    return fig
+
+
+def age_bmi_histograms(df, bins=40):
+    """2-D histograms of age and BMI per CHD status: (age edges, BMI edges, {status: counts})."""
+    data = df[['AGE', 'BMI', 'ANYCHD']].dropna()
+    age, bmi, chd = (data[col].to_numpy() for col in ['AGE', 'BMI', 'ANYCHD'])
+    age_edges = np.histogram_bin_edges(age, bins)
+    bmi_edges = np.histogram_bin_edges(bmi, bins)
+    counts = {}
+    for status in np.unique(chd):
+        in_class = chd == status
+        counts[int(status)] = np.histogram2d(age[in_class], bmi[in_class], [age_edges, bmi_edges])[0]
+    return age_edges, bmi_edges, counts
+
+
+def age_bmi_density(df, bins=40):
+    """Density version of the BMI vs. age scatter plot: one 2-D histogram per CHD status.
+
+    The cost of drawing does not depend on the number of rows.
+    """
+    age_edges, bmi_edges, counts = age_bmi_histograms(df, bins)
+    fig = Figure(figsize=(6 * max(len(counts), 1), 5))
+    axes = fig.subplots(1, max(len(counts), 1), sharex=True, sharey=True, squeeze=False)[0]
+    for ax, (status, count) in zip(axes, counts.items()):
+        mesh = ax.pcolormesh(age_edges, bmi_edges, np.ma.masked_equal(count.T, 0),
+                             cmap='Reds' if status else 'Blues', norm=LogNorm())
+        fig.colorbar(mesh, ax=ax, label='Number of participants')
+        ax.set_title(f'CHD Status = {status}')
+        ax.set_xlabel('Age')
+    axes[0].set_ylabel('BMI')
+    fig.suptitle('BMI vs. Age by CHD Status')
+    return fig
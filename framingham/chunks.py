@@ -0,0 +1,45 @@
+"""Chunked reading of CSV and Parquet files, for the batch scoring and the streaming cleaning."""
+import os
+
+import pandas as pd
+import pyarrow.parquet as pq
+
+DEFAULT_CHUNK_SIZE = 100_000
+
+
+def file_format(source):
+    """'parquet' or 'csv', from the file name."""
+    name = str(getattr(source, 'name', source)).lower()
+    return 'parquet' if name.endswith(('.parquet', '.pq')) else 'csv'
+
+
+def count_rows(source, fmt=None):
+    """Number of data rows of a file, without parsing it (used for the progress)."""
+    fmt = fmt or file_format(source)
+    if fmt == 'parquet':
+        return pq.ParquetFile(source).metadata.num_rows
+    f = open(source, 'rb') if isinstance(source, (str, os.PathLike)) else source
+    try:
+        lines, last = 0, b'\n'
+        while block := f.read(1 << 24):
+            lines += block.count(b'\n')
+            last = block[-1:]
+        # the header is not a data row, a last line without newline is one
+        return lines - 1 + (last != b'\n')
+    finally:
+        if f is source:
+            f.seek(0)
+        else:
+            f.close()
+
+
+def read_chunks(source, chunk_size=DEFAULT_CHUNK_SIZE, fmt=None, dtype=None):
+    """DataFrames of at most chunk_size rows of a CSV or Parquet file (path or file object).
+
+    `dtype` ({column: dtype}) is passed to the CSV reader, whose types are otherwise guessed chunk by chunk.
+    """
+    if (fmt or file_format(source)) == 'parquet':
+        for batch in pq.ParquetFile(source).iter_batches(batch_size=chunk_size):
+            yield batch.to_pandas()
+    else:
+        yield from pd.read_csv(source, chunksize=chunk_size, dtype=dtype)
@@ -0,0 +1,132 @@
+"""Cleaning pipeline for the research question columns.
+
+The chain used to be copy-pasted in every page: missing value imputation
+(KNN on GLUCOSE, median on TOTCHOL/BMI/HEARTRTE, -1 for unknown BPMEDS),
+outlier detection (0.2/0.8 quantile IQR rule by default), replacing outliers by
+NaN and a final KNN imputation (see `framingham.knn`). Each stage is cached
+on the hash of its input and its parameters, and its output is a read-only
+frame shared by all sessions (`framingham.shared`), so switching pages
+reuses the result instead of running the KNN steps again.
+"""
+import hashlib
+from typing import NamedTuple
+
+import numpy as np
+import pandas as pd
+
+from framingham.data import RQ_DTYPES, compact_dtypes, dataset_version, load_rq
+from framingham.metrics import measure
+from framingham.outliers import detect_outliers
+from framingham.shared import shared_frame
+
+# Columns with outliers
+SELECTED_COLUMNS = ['BMI', 'AGE', 'TOTCHOL', 'SYSBP', 'DIABP', 'HEARTRTE', 'GLUCOSE']
+# Columns imputed with the median
+MEDIAN_COLUMNS = ['TOTCHOL', 'BMI', 'HEARTRTE']
+
+
+def frame_hash(df):
+    """Content hash of a data frame (values and index)."""
+    hashed = pd.util.hash_pandas_object(df, index=True).values
+    return hashlib.sha256(hashed.tobytes()).hexdigest()[:16]
+
+
+def stage_key(*parts):
+    """Key of a stage output, derived from the key of its input and its parameters."""
+    return hashlib.sha256(repr(parts).encode()).hexdigest()[:16]
+
+
+def impute_missing(df_rq, glucose_neighbors, median_columns):
+    """Missing values imputed: KNN for GLUCOSE, median, -1 for unknown BPMEDS."""
+    # imported here: scipy is only loaded when a stage actually has to run
+    from framingham.knn import knn_impute
+    # shallow copy: with copy-on-write only the imputed columns are new
+    df_rq = df_rq.copy(deep=False)
+    median_columns = list(median_columns)
+    df_rq['GLUCOSE'] = knn_impute(df_rq[['GLUCOSE']], glucose_neighbors)[:, 0]
+    df_rq[median_columns] = df_rq[median_columns].fillna(df_rq[median_columns].median())
+    df_rq['BPMEDS'] = df_rq['BPMEDS'].fillna(-1)  # -1 as "Unknown"
+    return compact_dtypes(df_rq)
+
+
+def mask_outliers(df, outliers, columns):
+    """Outliers of `columns` replaced by NaN."""
+    columns = list(columns)
+    df = df.copy(deep=False)
+    df[columns] = df[columns].mask(outliers[columns], np.nan)
+    return df
+
+
+def impute_outliers(df_imputed, columns, neighbors):
+    """Outliers (NaN in `columns`) imputed with KNN."""
+    from framingham.knn import knn_impute
+    columns = list(columns)
+    df_rqi = df_imputed.copy(deep=False)
+    df_rqi[columns] = knn_impute(df_rqi[columns], neighbors)
+    return compact_dtypes(df_rqi)
+
+
+class CleaningResult(NamedTuple):
+    df_rq: pd.DataFrame  # missing values imputed
+    outliers: pd.DataFrame  # boolean outlier mask for the selected columns
+    df_imputed: pd.DataFrame  # outliers replaced by NaN
+    df_rqi: pd.DataFrame  # outliers imputed with KNN
+    key: str  # key of the final stage, changes with the data and the parameters
+
+
+class CleaningPipeline:
+    """Missing value imputation, outlier detection and KNN outlier imputation."""
+
+    def __init__(self, glucose_neighbors=5, median_columns=MEDIAN_COLUMNS, outlier_columns=SELECTED_COLUMNS,
+                 outlier_method='iqr', lower_quantile=0.2, upper_quantile=0.8, iqr_factor=1.5, mad_threshold=3.5,
+                 clip_quantiles=(0.01, 0.99), outlier_neighbors=3):
+        self.glucose_neighbors = glucose_neighbors
+        self.median_columns = tuple(median_columns)
+        self.outlier_columns = tuple(outlier_columns)
+        self.outlier_method = outlier_method
+        self.lower_quantile = lower_quantile
+        self.upper_quantile = upper_quantile
+        self.iqr_factor = iqr_factor
+        self.mad_threshold = mad_threshold
+        self.clip_quantiles = tuple(clip_quantiles)
+        self.outlier_neighbors = outlier_neighbors
+
+    def run(self, df_rq, key=None):
+        """Run all stages on the raw research question columns.
+
+        `key` identifies the input data (e.g. the dataset version); when it is
+        not given the frame is hashed. The outlier bounds are computed on the
+        raw values, before the missing values are imputed.
+        """
+        key = key or frame_hash(df_rq)
+        missing_params = (self.glucose_neighbors, self.median_columns)
+        outlier_params = (self.outlier_columns, self.outlier_method, self.lower_quantile, self.upper_quantile,
+                          self.iqr_factor, self.mad_threshold, self.clip_quantiles)
+
+        missing_key = stage_key(key, 'missing', missing_params)
+        with measure('impute_missing'):
+            df_missing = shared_frame('missing', missing_key, lambda: impute_missing(df_rq, *missing_params))
+        outliers_key = stage_key(key, 'outliers', outlier_params)
+        with measure('detect_outliers'):
+            outliers = shared_frame('outliers', outliers_key, lambda: detect_outliers(
+                df_rq, self.outlier_columns, self.outlier_method, lower_quantile=self.lower_quantile,
+                upper_quantile=self.upper_quantile, iqr_factor=self.iqr_factor, mad_threshold=self.mad_threshold,
+                clip_quantiles=self.clip_quantiles))
+
+        # Replace outliers with NaN
+        imputed_key = stage_key(missing_key, outliers_key, 'replace')
+        with measure('mask_outliers'):
+            df_imputed = shared_frame('imputed', imputed_key, lambda: mask_outliers(df_missing, outliers, self.outlier_columns))
+
+        final_key = stage_key(imputed_key, 'knn', self.outlier_neighbors)
+        with measure('impute_outliers'):
+            df_rqi = shared_frame('rqi', final_key, lambda: impute_outliers(
+                df_imputed, self.outlier_columns, self.outlier_neighbors))
+        return CleaningResult(df_missing, outliers, df_imputed, df_rqi, final_key)
+
+
+def clean_dataset(pipeline=None):
+    """Cleaned research question data of the current dataset version."""
+    pipeline = pipeline or CleaningPipeline()
+    # the dtypes are part of the key: models trained on other dtypes are not reused
+    return pipeline.run(load_rq(), key=stage_key(dataset_version(), RQ_DTYPES))
@@ -0,0 +1,112 @@
+"""Correlation matrices of the heatmaps, kept as running sufficient statistics.
+
+For every pair of columns the statistics are the number of rows where both
+are present and the sums, squares and cross-products of the two columns over
+those rows (the pairwise-complete correlation of `DataFrame.corr()`). They
+are computed as float32 matrix products on values shifted by a reference
+mean, and accumulated in float64. When a new version of a data frame only
+appends rows to the previous one, only the new rows are added to the
+statistics instead of recomputing the matrix.
+"""
+import hashlib
+import threading
+
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+from framingham.metrics import measure
+
+# rows per float32 matrix product
+CHUNK_SIZE = 1 << 16
+
+
+def _digest(row_hashes):
+    # content hash of some rows, to check that a new frame starts with the rows already counted
+    return hashlib.sha256(row_hashes.tobytes()).hexdigest()
+
+
+class CorrelationStats:
+    """Pairwise-complete sufficient statistics of the correlations of some columns."""
+
+    def __init__(self, columns, shift):
+        p = len(columns)
+        self.columns = list(columns)
+        # values are shifted by a reference mean, so the float32 products do not lose the small differences
+        self.shift = np.asarray(shift, dtype=np.float64)
+        self.n_rows = 0
+        self.n = np.zeros((p, p))
+        self.sums = np.zeros((p, p))     # sums[i, j]: sum of column i over the rows where j is present
+        self.squares = np.zeros((p, p))  # squares[i, j]: same for the squares of column i
+        self.products = np.zeros((p, p))
+
+    @classmethod
+    def from_frame(cls, df):
+        numeric = df.select_dtypes(include=[np.number])
+        stats = cls(numeric.columns, np.nan_to_num(numeric.mean().to_numpy()))
+        stats.update(numeric)
+        return stats
+
+    def update(self, df):
+        """Add rows (with the same columns) to the statistics."""
+        values = df[self.columns].to_numpy(dtype=np.float64)
+        for start in range(0, len(values), CHUNK_SIZE):
+            chunk = values[start:start + CHUNK_SIZE] - self.shift
+            present = ~np.isnan(chunk)
+            x = np.where(present, chunk, 0).astype(np.float32)
+            m = present.astype(np.float32)
+            self.n += m.T @ m
+            self.sums += x.T @ m
+            self.squares += (x * x).T @ m
+            self.products += x.T @ x
+        self.n_rows += len(values)
+
+    def matrix(self):
+        """Correlation matrix (float32), NaN where a pair has fewer than two rows or no variance."""
+        n, sums, squares = self.n, self.sums, self.squares
+        covariance = n * self.products - sums * sums.T
+        variance = n * squares - sums * sums
+        with np.errstate(invalid='ignore', divide='ignore'):
+            r = covariance / np.sqrt(variance * variance.T)
+        r = np.where((n > 1) & (variance > 0) & (variance.T > 0), np.clip(r, -1, 1), np.nan)
+        np.fill_diagonal(r, np.where(np.diag(variance) > 0, 1.0, np.nan))
+        return pd.DataFrame(r.astype(np.float32), index=self.columns, columns=self.columns)
+
+
+class CorrelationEngine:
+    """Correlation matrices per named data frame, updated incrementally when rows are appended."""
+
+    def __init__(self):
+        self._entries = {}
+        self._lock = threading.Lock()
+
+    def matrix(self, name, df, key):
+        """Correlation matrix of `df` (version `key`) of the heatmap `name`."""
+        with self._lock:
+            entry = self._entries.get(name)
+            if entry is not None and entry['key'] == key:
+                return entry['matrix']
+            stats = entry and entry['stats']
+            numeric = df.select_dtypes(include=[np.number])
+            row_hashes = pd.util.hash_pandas_object(numeric, index=False).to_numpy()
+            if (stats is not None and list(numeric.columns) == stats.columns and len(numeric) >= stats.n_rows
+                    and _digest(row_hashes[:stats.n_rows]) == entry['digest']):
+                # same rows plus new ones: only the new rows are counted
+                stats.update(numeric.iloc[stats.n_rows:])
+            else:
+                stats = CorrelationStats.from_frame(numeric)
+            matrix = stats.matrix()
+            self._entries[name] = {'key': key, 'stats': stats, 'matrix': matrix, 'digest': _digest(row_hashes)}
+            return matrix
+
+
+@st.cache_resource
+def correlation_engine():
+    """Correlation engine shared by all sessions of the server process."""
+    return CorrelationEngine()
+
+
+def correlation_matrix(name, df, key):
+    """Correlation matrix of a data frame, computed once per data version `key`."""
+    with measure(f'corr:{name}'):
+        return correlation_engine().matrix(name, df, key)
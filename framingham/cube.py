@@ -0,0 +1,72 @@
+"""Aggregate cube of the categorical variables, behind the proportion, prevalence and trend charts.
+
+The rows are grouped once per version of the data by every combination of
+the dimensions (PERIOD x BMI_Category x SEX x CURSMOKE x DIABETES x BPMEDS x
+ANYCHD). Each cell keeps its number of rows and, per measure, the sum and the
+number of non-missing values. Proportions, means and filters are then
+computed from the cells (a few hundred) instead of the rows.
+"""
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+from framingham.data import BMI_BINS, BMI_LABELS
+
+CUBE_DIMENSIONS = ['PERIOD', 'BMI_Category', 'SEX', 'CURSMOKE', 'DIABETES', 'BPMEDS', 'ANYCHD']
+CUBE_MEASURES = ['AGE', 'BMI', 'TOTCHOL', 'SYSBP', 'DIABP', 'HEARTRTE', 'GLUCOSE', 'ANYCHD']
+
+
+class AggregateCube:
+    """Row counts and measure sums per combination of the dimensions.
+
+    Missing dimension values are kept as their own cells, so every answer is
+    the same as the pandas expression on the rows (value_counts and
+    groupby ignore them).
+    """
+
+    def __init__(self, cells):
+        self.cells = cells
+
+    @classmethod
+    def build(cls, df, bmi_bins=BMI_BINS, bmi_labels=BMI_LABELS):
+        frame = df[[d for d in CUBE_DIMENSIONS if d != 'BMI_Category']].copy()
+        frame['BMI_Category'] = pd.cut(df['BMI'], bins=bmi_bins, labels=bmi_labels)
+        measures = df[CUBE_MEASURES]
+        frame['count'] = 1
+        frame[[f'{m}_sum' for m in CUBE_MEASURES]] = measures.fillna(0).to_numpy(dtype=np.float64)
+        frame[[f'{m}_n' for m in CUBE_MEASURES]] = measures.notna().to_numpy(dtype=np.int64)
+        cells = frame.groupby(CUBE_DIMENSIONS, dropna=False, observed=True, sort=False).sum().reset_index()
+        cells['BMI_Category'] = cells['BMI_Category'].astype(pd.CategoricalDtype(bmi_labels, ordered=True))
+        return cls(cells)
+
+    def filter(self, **values):
+        """Cube of the rows with these dimension values (e.g. BMI_Category='Obese')."""
+        keep = np.ones(len(self.cells), dtype=bool)
+        for dimension, value in values.items():
+            keep &= (self.cells[dimension] == value).to_numpy()
+        return AggregateCube(self.cells[keep])
+
+    def counts(self, dimension):
+        """Number of rows per value of a dimension, like value_counts()."""
+        counts = self.cells.groupby(dimension, observed=True)['count'].sum()
+        return counts.sort_values(ascending=False, kind='stable').rename('count')
+
+    def proportions(self, dimension):
+        """Share of each value of a dimension, like value_counts(normalize=True)."""
+        counts = self.counts(dimension)
+        return (counts / counts.sum()).rename('proportion')
+
+    def means(self, measures, by):
+        """Mean of each measure per value of `by`, like groupby(by)[measures].mean()."""
+        sum_columns, n_columns = [f'{m}_sum' for m in measures], [f'{m}_n' for m in measures]
+        # observed=False: every BMI category gets a row, as with the groupby on the rows
+        totals = self.cells.groupby(by, observed=False)[sum_columns + n_columns].sum()
+        sums, n = totals[sum_columns].to_numpy(), totals[n_columns].to_numpy()
+        with np.errstate(invalid='ignore', divide='ignore'):
+            return pd.DataFrame(np.where(n > 0, sums / n, np.nan), index=totals.index, columns=measures)
+
+
+@st.cache_data(show_spinner=False, max_entries=8)
+def aggregate_cube(_df, key, bmi_bins=tuple(BMI_BINS)):
+    """Cube of a data frame, built once per data version `key` and BMI binning."""
+    return AggregateCube.build(_df, list(bmi_bins))
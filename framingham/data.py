@@ -0,0 +1,173 @@
+"""Loading of the Framingham dataset, shared by all pages.
+
+The CSV is downloaded once and kept as a local Parquet snapshot. The snapshot
+is revalidated against the remote file with a conditional request (ETag /
+Last-Modified) instead of being downloaded again, and the app can start from
+the snapshot alone when there is no network.
+
+With FRAMINGHAM_SOURCE set, the dataset is read from a SQL warehouse
+instead (see framingham.sources); pages read only the columns they use.
+"""
+import hashlib
+import io
+import json
+import os
+import time
+import urllib.error
+import urllib.request
+
+import pandas as pd
+import streamlit as st
+
+from framingham.metrics import measure
+from framingham.paths import CACHE_DIR
+from framingham.shared import shared_frame
+
+# Corrected URL for the raw CSV file
+DATA_URL = 'https://raw.githubusercontent.com/LUCE-Blockchain/Databases-for-teaching/main/Framingham%20Dataset.csv'
+
+# relevant columns for the research question
+RQ_COLUMNS = ['BMI', 'AGE', 'SEX', 'TOTCHOL', 'SYSBP', 'DIABP', 'CURSMOKE', 'DIABETES', 'BPMEDS', 'HEARTRTE', 'GLUCOSE', 'ANYCHD', 'PERIOD']
+
+# compact dtypes of the research question columns, applied on load and kept by the cleaning stages:
+# int8 for the flags and codes (nullable Int8 while they have missing values), float32 for the measurements
+RQ_DTYPES = {
+    'BMI': 'float32', 'AGE': 'float32', 'TOTCHOL': 'float32', 'SYSBP': 'float32', 'DIABP': 'float32',
+    'HEARTRTE': 'float32', 'GLUCOSE': 'float32',
+    'SEX': 'int8', 'CURSMOKE': 'int8', 'DIABETES': 'int8', 'BPMEDS': 'int8', 'ANYCHD': 'int8', 'PERIOD': 'int8',
+}
+
+# BMI categories (the feature engineering one-hot encodes them, Underweight is the reference)
+BMI_BINS = [0, 18.5, 25, 30, float('inf')]
+BMI_LABELS = ['Underweight', 'Normal', 'Overweight', 'Obese']
+
+SNAPSHOT_PATH = CACHE_DIR / 'framingham.parquet'
+META_PATH = CACHE_DIR / 'framingham.json'
+
+# how often (in seconds) the snapshot is checked against the remote file
+REVALIDATE_SECONDS = int(os.environ.get('FRAMINGHAM_REVALIDATE_SECONDS', 6 * 60 * 60))
+REQUEST_TIMEOUT = 30
+
+# URL of the warehouse the dataset is read from, the snapshot of DATA_URL when empty (see framingham.sources)
+SOURCE_URL = os.environ.get('FRAMINGHAM_SOURCE', '')
+
+#allow all the columns to be visible
+pd.set_option('display.max_columns', None)
+
+
+def _read_meta():
+    try:
+        with open(META_PATH) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def _write_meta(meta):
+    CACHE_DIR.mkdir(parents=True, exist_ok=True)
+    tmp = META_PATH.with_suffix('.json.tmp')
+    with open(tmp, 'w') as f:
+        json.dump(meta, f)
+    os.replace(tmp, META_PATH)
+
+
+def _write_snapshot(df):
+    CACHE_DIR.mkdir(parents=True, exist_ok=True)
+    # write next to the snapshot and swap, so readers never see a half written file
+    tmp = SNAPSHOT_PATH.with_suffix('.parquet.tmp')
+    df.to_parquet(tmp, index=False)
+    os.replace(tmp, SNAPSHOT_PATH)
+
+
+def _fetch(url, meta):
+    """Conditional GET; returns (body, headers), body is None if the file did not change."""
+    request = urllib.request.Request(url)
+    if meta.get('etag'):
+        request.add_header('If-None-Match', meta['etag'])
+    if meta.get('last_modified'):
+        request.add_header('If-Modified-Since', meta['last_modified'])
+    try:
+        with urllib.request.urlopen(request, timeout=REQUEST_TIMEOUT) as response:
+            return response.read(), response.headers
+    except urllib.error.HTTPError as e:
+        if e.code == 304:
+            return None, e.headers
+        raise
+
+
+def compact_dtypes(df):
+    """The frame with the dtypes of RQ_DTYPES for the columns it has."""
+    dtypes = {}
+    for column, dtype in RQ_DTYPES.items():
+        if column not in df.columns or df[column].dtype == dtype:
+            continue
+        if dtype == 'int8':
+            values = df[column].dropna()
+            if len(values) and (values.min() < -128 or values.max() > 127 or (values % 1 != 0).any()):
+                # not codes after all: left as they are
+                continue
+            dtype = 'Int8' if len(values) < len(df) else 'int8'
+        dtypes[column] = dtype
+    return df.astype(dtypes) if dtypes else df
+
+
+def refresh_snapshot(url=DATA_URL, force=False):
+    """Make sure the local snapshot exists and is recent; returns its metadata."""
+    meta = _read_meta()
+    have_snapshot = SNAPSHOT_PATH.exists() and meta.get('url') == url
+    if have_snapshot and not force and time.time() - meta.get('checked', 0) < REVALIDATE_SECONDS:
+        return meta
+
+    try:
+        body, headers = _fetch(url, meta if have_snapshot else {})
+    except (urllib.error.URLError, OSError):
+        # no network: keep serving the snapshot we already have
+        if have_snapshot:
+            return meta
+        raise
+
+    if body is not None:
+        with measure('read_csv'):
+            df = pd.read_csv(io.BytesIO(body))
+        _write_snapshot(df)
+        meta = {
+            'url': url,
+            'version': hashlib.sha256(body).hexdigest()[:16],
+            'rows': len(df),
+        }
+    meta['etag'] = headers.get('ETag', meta.get('etag'))
+    meta['last_modified'] = headers.get('Last-Modified', meta.get('last_modified'))
+    meta['checked'] = time.time()
+    _write_meta(meta)
+    return meta
+
+
+@st.cache_resource(show_spinner=False)
+def data_source(url=SOURCE_URL):
+    """Source of the dataset, with its connection pool, shared by all sessions."""
+    # framingham.sources imports this module
+    from framingham.sources import source_from_url
+    return source_from_url(url)
+
+
+@st.cache_data(ttl=REVALIDATE_SECONDS, show_spinner=False)
+def dataset_version(url=SOURCE_URL):
+    """Version of the current dataset (content hash of the snapshot), revalidated at most once per TTL."""
+    return data_source(url).version()
+
+
+def load_dataset(columns=None, filters=None):
+    """Framingham dataset, a view of the frame shared by all sessions (see framingham.shared).
+
+    Only `columns` (all by default) of the rows matching `filters`, e.g.
+    {'PERIOD': [1]}, are read from the source.
+    """
+    with measure('load_dataset'):
+        # the dtypes are part of the version of the shared frame
+        key = hashlib.sha256(repr((dataset_version(), RQ_DTYPES, columns, filters)).encode()).hexdigest()[:16]
+        return shared_frame('dataset', key, lambda: compact_dtypes(data_source().read(columns, filters).to_pandas()))
+
+
+def load_rq():
+    """Selection of the relevant columns for the research question."""
+    return load_dataset(RQ_COLUMNS)
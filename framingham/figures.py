@@ -0,0 +1,74 @@
+"""Cache of rendered figures for the static charts.
+
+Charts that only depend on the data (heatmaps, proportion bars, period
+trends) are rendered once to PNG and kept in a process-wide LRU cache keyed
+by the data version and the plot parameters. The figures are built with
+`matplotlib.figure.Figure` instead of pyplot, so nothing is registered in
+pyplot's global figure list and the memory is released once the PNG exists.
+"""
+import io
+import os
+import threading
+from collections import OrderedDict
+
+import streamlit as st
+
+from framingham.metrics import measure
+
+# same defaults as st.pyplot
+SAVEFIG_KWARGS = {'format': 'png', 'bbox_inches': 'tight', 'dpi': 200}
+MAX_CACHE_BYTES = int(float(os.environ.get('FRAMINGHAM_FIGURE_CACHE_MB', 64)) * 1024 * 1024)
+
+
+class FigureCache:
+    """LRU cache of PNG images, bounded by their total size in bytes."""
+
+    def __init__(self, max_bytes=MAX_CACHE_BYTES):
+        self.max_bytes = max_bytes
+        self.size = 0
+        self._images = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            png = self._images.get(key)
+            if png is not None:
+                self._images.move_to_end(key)
+            return png
+
+    def put(self, key, png):
+        with self._lock:
+            if key in self._images:
+                self.size -= len(self._images.pop(key))
+            self._images[key] = png
+            self.size += len(png)
+            # evict the least recently used images, but always keep the newest one
+            while self.size > self.max_bytes and len(self._images) > 1:
+                _, evicted = self._images.popitem(last=False)
+                self.size -= len(evicted)
+
+    def render(self, key, draw, *args, **kwargs):
+        """PNG of `draw(*args, **kwargs)`, drawn only when `key` is not cached."""
+        png = self.get(key)
+        if png is None:
+            fig = draw(*args, **kwargs)
+            buf = io.BytesIO()
+            fig.savefig(buf, **SAVEFIG_KWARGS)
+            png = buf.getvalue()
+            self.put(key, png)
+        return png
+
+    def __len__(self):
+        return len(self._images)
+
+
+@st.cache_resource
+def figure_cache():
+    """Figure cache shared by all sessions of the server process."""
+    return FigureCache()
+
+
+def show_figure(key, draw, *args, **kwargs):
+    """Display a cached chart; `key` must identify the data version and all plot parameters."""
+    with measure(f'figure:{draw.__name__}'):
+        st.image(figure_cache().render(key, draw, *args, **kwargs), width='stretch')
@@ -0,0 +1,140 @@
+"""Background jobs of the server process (model training and tuning).
+
+A job runs in a thread of a process-wide pool, outside the Streamlit script
+run that submitted it, so the session stays responsive, widget changes do not
+restart it and users can switch pages while it runs. The heavy work itself is
+done by the training process pool; the job threads only coordinate it and
+collect progress and partial results, which the pages poll by job ID.
+"""
+import os
+import threading
+import time
+import traceback
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+import streamlit as st
+
+JOB_WORKERS = int(os.environ.get('FRAMINGHAM_JOB_WORKERS', 4))
+# finished jobs kept in memory for the pages that poll them
+MAX_FINISHED_JOBS = 32
+
+
+class Job:
+    """State of one background job, updated by its thread and read by the pages."""
+
+    def __init__(self, name, key=None):
+        self.id = uuid.uuid4().hex[:12]
+        self.name = name
+        self.key = key
+        self.status = 'queued'
+        self.progress = 0.0
+        self.partial = {}
+        self.result = None
+        self.error = None
+        self.submitted = time.time()
+        self.started = None
+        self.finished = None
+
+    @property
+    def done(self):
+        return self.status in ('done', 'failed')
+
+    def update(self, progress, partial=None):
+        """Progress callback of the job function: fraction done and partial results."""
+        self.progress = float(progress)
+        if partial is not None:
+            self.partial = partial
+
+    def elapsed(self):
+        if self.started is None:
+            return 0.0
+        return (self.finished or time.time()) - self.started
+
+
+class JobQueue:
+    """Thread pool running jobs by ID; jobs with the same key are only run once at a time."""
+
+    def __init__(self, max_workers=JOB_WORKERS, keep=MAX_FINISHED_JOBS):
+        self.keep = keep
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='framingham-job')
+        self._jobs = {}
+        self._lock = threading.Lock()
+
+    def submit(self, name, fn, *args, key=None, **kwargs):
+        """Run `fn(*args, progress=job.update, **kwargs)` in the background; returns the Job.
+
+        If a job with the same `key` is queued, running or done, that job is
+        returned instead, so several users asking for the same work share it.
+        """
+        with self._lock:
+            if key is not None:
+                for job in self._jobs.values():
+                    if job.key == key and job.status != 'failed':
+                        return job
+            job = Job(name, key)
+            self._jobs[job.id] = job
+            self._prune()
+        self._pool.submit(self._run, job, fn, args, kwargs)
+        return job
+
+    def _run(self, job, fn, args, kwargs):
+        job.status, job.started = 'running', time.time()
+        try:
+            job.result = fn(*args, progress=job.update, **kwargs)
+            job.progress, job.status = 1.0, 'done'
+        except Exception as e:
+            job.error = f'{type(e).__name__}: {e}'
+            job.status = 'failed'
+            traceback.print_exc()
+        finally:
+            job.finished = time.time()
+
+    def _prune(self):
+        # forget the oldest finished jobs, running ones are always kept
+        finished = sorted((job for job in self._jobs.values() if job.done), key=lambda job: job.finished)
+        for job in finished[:max(len(finished) - self.keep, 0)]:
+            del self._jobs[job.id]
+
+    def get(self, job_id):
+        """Job with this ID, or None if it is unknown or was forgotten."""
+        with self._lock:
+            return self._jobs.get(job_id)
+
+
+@st.cache_resource
+def job_queue():
+    """Job queue shared by all sessions of the server process."""
+    return JobQueue()
+
+
+@st.fragment(run_every=1.0)
+def _job_progress(job_id, details):
+    """Progress of a running job, refreshed every second without rerunning the page."""
+    job = job_queue().get(job_id)
+    if job is None or job.done:
+        # show the final state on the whole page
+        st.rerun(scope="app")
+    st.progress(job.progress, text=f"{job.name}: {job.progress:.0%} ({job.elapsed():.0f} s, job {job.id})")
+    if details is not None:
+        details(job)
+
+
+def show_job(session_key, on_result=None, details=None, key=None):
+    """Show the job whose ID the session keeps in st.session_state[session_key].
+
+    While it runs: its progress, refreshed every second, and `details(job)`
+    (e.g. partial results). If it failed: its error. Once done:
+    `on_result(job)`. Returns the job, or None when the session has none or
+    one whose key is not `key`.
+    """
+    job = job_queue().get(st.session_state.get(session_key))
+    if job is None or (key is not None and job.key != key):
+        return None
+    if job.status == 'failed':
+        st.error(f"{job.name} failed ({job.error}), press the button to try again.")
+    elif not job.done:
+        _job_progress(job.id, details)
+    elif on_result is not None:
+        on_result(job)
+    return job
@@ -0,0 +1,168 @@
+"""KNN imputation backed by KD-trees.
+
+Gives the same result as `sklearn.impute.KNNImputer(weights='uniform')`
+(nan-euclidean distance, donors taken from the rows where the column is
+present, column mean when no donor shares a present value), but without the
+brute force distance matrix between every incomplete row and the whole frame.
+
+Rows are grouped by their pattern of present columns. For a receiving
+pattern O and a donor pattern P the nan-euclidean distance only uses the
+columns in O & P and is a plain euclidean distance scaled by a constant, so
+the nearest donors of that group come from a KD-tree on those columns. Each
+donor group is searched once per receiving pattern, and the neighbours serve
+every column missing in O: the candidates of the donor groups where the
+column is present are merged to the k nearest overall. Receiving patterns
+with few rows search the donor groups by brute force instead of building a
+tree for them.
+
+The receiving patterns build their searchers in parallel, and their rows
+are split into chunks queried in parallel, by pools of threads (the tree
+builds and queries release the GIL), so even a single large pattern uses
+every core.
+"""
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+from scipy.spatial import cKDTree
+
+DEFAULT_CHUNK_SIZE = 16384
+# donor groups up to this size are searched by brute force instead of a KD-tree
+BRUTE_FORCE_SIZE = 32
+# receiving patterns up to this many rows search every donor group by brute force
+BRUTE_FORCE_QUERIES = 64
+# donors per block of the brute force search
+BRUTE_FORCE_BLOCK = 65536
+# number of threads building the searchers of the patterns, and of threads querying the chunks
+WORKERS = os.cpu_count() or 1
+
+
+def _codes(present):
+    """Bit code of the pattern of present columns of each row."""
+    return present.astype(np.int64) @ (np.int64(1) << np.arange(present.shape[1], dtype=np.int64))
+
+
+def _groups(codes):
+    """Group rows by code; yields (code, row positions)."""
+    uniq, inverse = np.unique(codes, return_inverse=True)
+    order = np.argsort(inverse, kind='stable')
+    bounds = np.cumsum(np.bincount(inverse))[:-1]
+    for code, group in zip(uniq, np.split(order, bounds)):
+        yield code, group
+
+
+def _brute_force(points, queries, k):
+    """k nearest points of every query (distances, positions), one block of points at a time."""
+    distances = np.empty((len(queries), 0))
+    positions = np.empty((len(queries), 0), dtype=np.int64)
+    for start in range(0, len(points), BRUTE_FORCE_BLOCK):
+        block = points[start:start + BRUTE_FORCE_BLOCK]
+        # squared distances up to the norm of the query, which does not change the order
+        squares = (block * block).sum(axis=1) - 2 * queries @ block.T
+        take = min(k, block.shape[0])
+        nearest = np.argpartition(squares, take - 1, axis=1)[:, :take]
+        distances = np.hstack([distances, np.take_along_axis(squares, nearest, axis=1)])
+        positions = np.hstack([positions, nearest + start])
+        if distances.shape[1] > k:
+            nearest = np.argpartition(distances, k - 1, axis=1)[:, :k]
+            distances = np.take_along_axis(distances, nearest, axis=1)
+            positions = np.take_along_axis(positions, nearest, axis=1)
+    distances = np.sqrt(np.clip(distances + (queries * queries).sum(axis=1)[:, None], 0, None))
+    return distances, positions
+
+
+class _Searcher:
+    """k nearest neighbour search over one donor group."""
+
+    def __init__(self, points, brute_force=False):
+        self.points = points
+        if points.shape[0] > BRUTE_FORCE_SIZE and not brute_force:
+            self.tree = cKDTree(points, balanced_tree=False, compact_nodes=False)
+        else:
+            self.tree = None
+
+    def query(self, queries, k):
+        if self.tree is None:
+            return _brute_force(self.points, queries, k)
+        dist, idx = self.tree.query(queries, k=k)
+        return dist.reshape(len(queries), k), idx.reshape(len(queries), k)
+
+
+def _impute_chunk(X, chunk, groups, missing, k, column_means, n_neighbors):
+    """Imputed values of a chunk of rows of one receiving pattern: {column: values}."""
+    candidates = {c: ([], []) for c in missing}
+    for searcher, donor_rows, shared, scale, has in groups:
+        dist, idx = searcher.query(X[np.ix_(chunk, shared)], min(n_neighbors, donor_rows.size))
+        for c in has:
+            candidates[c][0].append(dist * scale)
+            candidates[c][1].append(X[donor_rows[idx], c])
+    imputed = {}
+    for c in missing:
+        if not candidates[c][0]:
+            # no present value in common with any donor
+            imputed[c] = np.full(chunk.size, column_means[c])
+            continue
+        distances, values = np.hstack(candidates[c][0]), np.hstack(candidates[c][1])
+        n_take = min(k[c], distances.shape[1])
+        if n_take < distances.shape[1]:
+            nearest = np.argpartition(distances, n_take - 1, axis=1)[:, :n_take]
+            values = np.take_along_axis(values, nearest, axis=1)
+        imputed[c] = values.mean(axis=1)
+    return imputed
+
+
+def _impute_pattern(X, result, rows, receiver_code, patterns, columns, column_means, k, n_neighbors, chunk_size,
+                    executor):
+    """Impute the rows of one receiving pattern, its chunks queried by the threads of `executor`."""
+    n_features = X.shape[1]
+    bits = np.int64(1) << np.arange(n_features, dtype=np.int64)
+    missing = [c for c in columns if not receiver_code & bits[c]]
+    # donor groups sharing a present column with the receivers and having one of their missing columns
+    groups = []
+    for donor_code, donor_rows in patterns.items():
+        shared = np.flatnonzero(donor_code & receiver_code & bits)
+        has = [c for c in missing if donor_code & bits[c]]
+        if shared.size and has:
+            searcher = _Searcher(X[np.ix_(donor_rows, shared)], brute_force=rows.size <= BRUTE_FORCE_QUERIES)
+            groups.append((searcher, donor_rows, shared, np.sqrt(n_features / shared.size), has))
+
+    chunks = [rows[start:start + chunk_size] for start in range(0, rows.size, chunk_size)]
+    futures = [executor.submit(_impute_chunk, X, chunk, groups, missing, k, column_means, n_neighbors)
+               for chunk in chunks]
+    for chunk, future in zip(chunks, futures):
+        for c, values in future.result().items():
+            result[chunk, c] = values
+
+
+def knn_impute(X, n_neighbors=5, chunk_size=DEFAULT_CHUNK_SIZE, workers=WORKERS):
+    """Impute the NaN values of a 2-D array from the mean of the k nearest donors."""
+    X = np.asarray(X, dtype=np.float64)
+    if X.shape[1] > 63:
+        raise ValueError("knn_impute supports at most 63 columns")
+    n_features = X.shape[1]
+    bits = np.int64(1) << np.arange(n_features, dtype=np.int64)
+    present = ~np.isnan(X)
+    patterns = dict(_groups(_codes(present)))
+    full = (1 << n_features) - 1
+    # columns without any value are left as they are
+    columns = [c for c in range(n_features) if present[:, c].any()]
+    column_means = {c: X[present[:, c], c].mean() for c in columns}
+    # number of donors of each column (KNNImputer averages min(n_neighbors, donors) of them)
+    k = {c: min(n_neighbors, sum(g.size for code, g in patterns.items() if code & bits[c])) for c in columns}
+
+    receivers = sorted((code for code in patterns if code != full), key=lambda code: -patterns[code].size)
+    workers = max(1, workers)
+    # chunks small enough for every thread to get one of the largest pattern
+    if receivers:
+        chunk_size = max(1, min(chunk_size, -(-patterns[receivers[0]].size // workers)))
+    result = X.copy()
+    # the patterns build their searchers in parallel (at most `workers` patterns held in memory at a time)
+    # and hand their chunks of rows to a second pool; two pools, so a pattern waiting for its chunks never
+    # holds the thread a chunk needs
+    with ThreadPoolExecutor(workers) as chunk_executor, ThreadPoolExecutor(workers) as pattern_executor:
+        futures = [pattern_executor.submit(_impute_pattern, X, result, patterns[code], code, patterns, columns,
+                                           column_means, k, n_neighbors, chunk_size, chunk_executor)
+                   for code in receivers]
+        for future in futures:
+            future.result()
+    return result
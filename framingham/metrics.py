@@ -0,0 +1,238 @@
+"""Timing and memory instrumentation of the page renders and pipeline stages.
+
+`measure(name)` wraps a block of code and records its wall time, the CPU
+time of the thread that runs it and the peak memory allocated during the
+block (traced with `tracemalloc`; the peak is that of the whole process, so
+concurrent sessions add to each other's peaks). Measurements opened inside
+another one on the same thread are kept as its children, so a page render
+lists the stages it ran. Every measurement is added to process-wide totals,
+shown in the sidebar debug panel and written to a metrics file: a
+Prometheus text-format file (`.prom`, for the node exporter textfile
+collector) or a JSON-lines log (`.jsonl`, one line per measurement). The
+file is written by the server process only (not by the workers of the
+process pools), at most every METRICS_WRITE_SECONDS.
+
+Memory tracing slows down every allocation of Python objects by 10-20%, so
+it is off unless FRAMINGHAM_TRACE_MEMORY=1; the peaks are then reported as 0.
+
+    FRAMINGHAM_METRICS_PATH=/var/lib/node_exporter/framingham.prom streamlit run streamlit_app.py
+"""
+import atexit
+import functools
+import json
+import multiprocessing
+import os
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager
+from pathlib import Path
+
+import streamlit as st
+
+from framingham.paths import CACHE_DIR
+
+# metrics file: .prom for the Prometheus text format, .jsonl for one JSON line per measurement, empty to disable
+METRICS_PATH = os.environ.get('FRAMINGHAM_METRICS_PATH', str(CACHE_DIR / 'metrics.prom'))
+# minimum time between two writes of the metrics file
+METRICS_WRITE_SECONDS = float(os.environ.get('FRAMINGHAM_METRICS_WRITE_SECONDS', 10))
+# tracemalloc slows down allocations of Python objects: peak memory is only traced on demand
+TRACE_MEMORY = os.environ.get('FRAMINGHAM_TRACE_MEMORY', '0') == '1'
+
+
+class Measurement:
+    """Wall time, thread CPU time and peak memory of one run of a page or stage."""
+
+    def __init__(self, name, kind):
+        self.name = name
+        self.kind = kind
+        self.children = []
+        self.error = None
+        self.wall_seconds = 0.0
+        self.cpu_seconds = 0.0
+        self.peak_bytes = 0
+        self.timestamp = time.time()
+        self._memory = 0
+        self._peak = 0
+
+    def as_dict(self):
+        return {'timestamp': round(self.timestamp, 3), 'kind': self.kind, 'name': self.name,
+                'wall_seconds': round(self.wall_seconds, 6), 'cpu_seconds': round(self.cpu_seconds, 6),
+                'peak_bytes': self.peak_bytes, 'error': self.error}
+
+
+class MetricsRecorder:
+    """Totals per (kind, name) of all the measurements of the process, and the metrics file."""
+
+    def __init__(self, path=METRICS_PATH, trace_memory=TRACE_MEMORY, write_seconds=METRICS_WRITE_SECONDS):
+        # the workers of the process pools keep their own totals, they do not overwrite the server's file
+        self.path = Path(path) if path and multiprocessing.parent_process() is None else None
+        self.trace_memory = trace_memory
+        self.write_seconds = write_seconds
+        self.totals = {}
+        self._open = []  # measurements in progress on any thread, for the memory peaks
+        self._pending = []  # measurements not written to the metrics file yet
+        self._written = 0.0
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._write_lock = threading.Lock()
+        if trace_memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+        if self.path is not None:
+            atexit.register(self.flush, force=True)
+
+    def _fold_peak(self):
+        # the tracemalloc peak is global: credit it to every open measurement before resetting it
+        if not self.trace_memory:
+            return
+        _, peak = tracemalloc.get_traced_memory()
+        for measurement in self._open:
+            measurement._peak = max(measurement._peak, peak)
+        tracemalloc.reset_peak()
+
+    @contextmanager
+    def measure(self, name, kind='stage'):
+        """Measure the block; yields the Measurement, complete once the block exits."""
+        measurement = Measurement(name, kind)
+        stack = self._local.__dict__.setdefault('stack', [])
+        if stack:
+            stack[-1].children.append(measurement)
+        stack.append(measurement)
+        with self._lock:
+            self._fold_peak()
+            if self.trace_memory:
+                measurement._memory = tracemalloc.get_traced_memory()[0]
+            self._open.append(measurement)
+        cpu, wall = time.thread_time(), time.perf_counter()
+        try:
+            yield measurement
+        except BaseException as e:
+            # Streamlit's rerun and stop are exceptions too, the measurement is still recorded
+            measurement.error = type(e).__name__
+            raise
+        finally:
+            measurement.wall_seconds = time.perf_counter() - wall
+            measurement.cpu_seconds = time.thread_time() - cpu
+            stack.pop()
+            with self._lock:
+                self._fold_peak()
+                self._open.remove(measurement)
+                measurement.peak_bytes = max(measurement._peak - measurement._memory, 0)
+                self._add(measurement)
+            self.flush()
+
+    def _add(self, measurement):
+        total = self.totals.setdefault((measurement.kind, measurement.name), {
+            'calls': 0, 'errors': 0, 'wall_seconds': 0.0, 'cpu_seconds': 0.0, 'max_peak_bytes': 0, 'last': None})
+        total['calls'] += 1
+        total['errors'] += measurement.error is not None
+        total['wall_seconds'] += measurement.wall_seconds
+        total['cpu_seconds'] += measurement.cpu_seconds
+        total['max_peak_bytes'] = max(total['max_peak_bytes'], measurement.peak_bytes)
+        total['last'] = measurement.as_dict()
+        if self.path is not None:
+            self._pending.append(measurement.as_dict())
+
+    def flush(self, force=False):
+        """Write the metrics file if the last write is older than `write_seconds` (or `force`)."""
+        if self.path is None:
+            return
+        # one writer at a time, outside the lock of the measurements
+        if not self._write_lock.acquire(blocking=force):
+            return
+        try:
+            with self._lock:
+                if not self._pending or (not force and time.monotonic() - self._written < self.write_seconds):
+                    return
+                pending, self._pending = self._pending, []
+                text = self.prometheus() if self.path.suffix != '.jsonl' else None
+                self._written = time.monotonic()
+            self._write(pending, text)
+        except OSError:
+            # the app keeps working when the metrics file cannot be written
+            pass
+        finally:
+            self._write_lock.release()
+
+    def _write(self, pending, text):
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        if text is None:
+            with open(self.path, 'a') as f:
+                f.writelines(json.dumps(record) + '\n' for record in pending)
+        else:
+            # write next to the file and swap, so the scraper never reads a half written file
+            tmp = self.path.with_name(self.path.name + '.tmp')
+            tmp.write_text(text)
+            os.replace(tmp, self.path)
+
+    def prometheus(self):
+        """Totals in the Prometheus text exposition format."""
+        metrics = [
+            ('framingham_calls_total', 'counter', 'Runs of a page render or pipeline stage.', 'calls'),
+            ('framingham_errors_total', 'counter', 'Runs that ended with an exception.', 'errors'),
+            ('framingham_wall_seconds_total', 'counter', 'Wall time of the runs.', 'wall_seconds'),
+            ('framingham_cpu_seconds_total', 'counter', 'CPU time of the thread of the runs.', 'cpu_seconds'),
+            ('framingham_peak_bytes_max', 'gauge', 'Largest memory peak of a run above its start.', 'max_peak_bytes'),
+        ]
+        lines = []
+        for metric, metric_type, help_text, field in metrics:
+            lines += [f'# HELP {metric} {help_text}', f'# TYPE {metric} {metric_type}']
+            for (kind, name), total in sorted(self.totals.items()):
+                lines.append(f'{metric}{{kind="{_label(kind)}",name="{_label(name)}"}} {total[field]}')
+        return '\n'.join(lines) + '\n'
+
+
+def _label(value):
+    return value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+@st.cache_resource
+def metrics_recorder():
+    """Metrics recorder shared by all sessions of the server process."""
+    return MetricsRecorder()
+
+
+def measure(name, kind='stage'):
+    """Context manager measuring a page render (kind 'page') or a pipeline stage."""
+    return metrics_recorder().measure(name, kind)
+
+
+def instrumented(name):
+    """Decorator measuring every call of a function as the stage `name`."""
+    def decorator(fn):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            with measure(name):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def show_debug_panel(page):
+    """Sidebar panel with the stages of the last render of the page and the process totals."""
+    rows = []
+
+    def walk(measurement, depth):
+        rows.append({'stage': '\u2003' * depth + measurement.name, 'wall (ms)': measurement.wall_seconds * 1000,
+                     'CPU (ms)': measurement.cpu_seconds * 1000, 'peak (MB)': measurement.peak_bytes / 2 ** 20})
+        for child in measurement.children:
+            walk(child, depth + 1)
+
+    walk(page, 0)
+    st.write("**Last render**")
+    st.dataframe(rows, hide_index=True, column_config={
+        column: st.column_config.NumberColumn(format='%.1f') for column in ('wall (ms)', 'CPU (ms)', 'peak (MB)')})
+
+    recorder = metrics_recorder()
+    with recorder._lock:
+        totals = [{'kind': kind, 'name': name, 'calls': total['calls'],
+                   'mean wall (ms)': total['wall_seconds'] / total['calls'] * 1000,
+                   'max peak (MB)': total['max_peak_bytes'] / 2 ** 20}
+                  for (kind, name), total in recorder.totals.items()]
+    st.write("**Since the server started**")
+    st.dataframe(sorted(totals, key=lambda row: -row['mean wall (ms)']), hide_index=True, column_config={
+        column: st.column_config.NumberColumn(format='%.1f') for column in ('mean wall (ms)', 'max peak (MB)')})
+    if not recorder.trace_memory:
+        st.caption("Peak memory is not traced (set FRAMINGHAM_TRACE_MEMORY=1 to trace it).")
+    if recorder.path is not None:
+        st.caption(f"Metrics file: `{recorder.path}`")
@@ -0,0 +1,204 @@
+"""Multiple imputation by chained equations (MICE), an alternative to the single imputation of the cleaning pipeline.
+
+The cleaning pipeline fills every missing value once (the mean for GLUCOSE,
+since a KNN on the GLUCOSE column alone has no distance to use, and the
+median for TOTCHOL, BMI and HEARTRTE). The later analyses then treat the
+filled values as if they had been measured, so their variances are too small.
+MICE draws m completed datasets instead. The spread between them measures
+the uncertainty of the imputation, and Rubin's rules pool the m estimates
+of a statistic into one estimate with a correct standard error.
+
+Each chain starts from random observed values. For a number of iterations
+it visits every imputed column in turn and regresses the column on all the
+other columns, over the rows where the column is observed. The regression
+coefficients and residual variance are drawn from their posterior (Bayesian
+linear regression). Each missing value is then replaced by predictive mean
+matching (PMM): the observed value of one of the `donors` rows whose
+predicted value is closest. PMM only imputes values that occur in the data,
+so a binary column stays binary and a skewed one keeps its shape.
+
+The m chains are independent and run in the process pool of the training
+tasks (`framingham.training.get_executor`), one per core. The values are
+written once to an Arrow file that the workers memory-map (see
+framingham.shared), so the tasks only carry its path. A chain only returns
+its imputed cells, so the m completed datasets are held as the observed
+frame plus an (m, missing rows) array per imputed column.
+"""
+import uuid
+from concurrent.futures import as_completed
+
+import numpy as np
+import pandas as pd
+
+from framingham.metrics import instrumented
+from framingham.shared import FRAMES_DIR, map_frame, write_frame
+
+# the columns the cleaning pipeline imputes with KNN or the median
+MICE_COLUMNS = ['GLUCOSE', 'TOTCHOL', 'BMI', 'HEARTRTE']
+DEFAULT_IMPUTATIONS = 5
+DEFAULT_ITERATIONS = 10
+# PMM donors: observed rows with the closest predictions, one of them is drawn
+DEFAULT_DONORS = 5
+# ridge penalty of the regressions, relative to the diagonal of X'X (as in the R package mice)
+RIDGE = 1e-5
+
+
+def _draw_regression(X, y, rng):
+    """Coefficients drawn from the posterior of a Bayesian linear regression, and the least-squares ones."""
+    xtx = X.T @ X
+    xtx += RIDGE * np.diag(np.diag(xtx))
+    inverse = np.linalg.inv(xtx)
+    beta = inverse @ (X.T @ y)
+    residuals = y - X @ beta
+    sigma = np.sqrt(residuals @ residuals / rng.chisquare(max(len(y) - X.shape[1], 1)))
+    drawn = beta + sigma * np.linalg.cholesky((inverse + inverse.T) / 2) @ rng.standard_normal(len(beta))
+    return drawn, beta
+
+
+def _match(predicted_observed, predicted_missing, observed, donors, rng):
+    """Predictive mean matching: an observed value of one of the `donors` closest predictions of each missing row."""
+    order = np.argsort(predicted_observed, kind='stable')
+    predicted_observed, observed = predicted_observed[order], observed[order]
+    # the closest predictions of a row are within `donors` positions of it in the sorted predictions
+    positions = np.searchsorted(predicted_observed, predicted_missing)
+    window = np.clip(positions[:, None] + np.arange(-donors, donors), 0, len(observed) - 1)
+    distances = np.abs(predicted_observed[window] - predicted_missing[:, None])
+    closest = np.argsort(distances, axis=1, kind='stable')[:, :min(donors, len(observed))]
+    chosen = closest[np.arange(len(window)), rng.integers(closest.shape[1], size=len(window))]
+    return observed[window[np.arange(len(window)), chosen]]
+
+
+def run_chain(values, missing, columns, iterations=DEFAULT_ITERATIONS, donors=DEFAULT_DONORS, seed=None):
+    """One MICE chain (one pool task): the imputed cells of each of the `columns` (positions in `values`).
+
+    `values` is the (rows, columns) float64 array, `missing` the boolean mask
+    of its cells to impute, NaN only where `missing` is set. Returns one
+    array per imputed column with its values at the missing rows.
+    """
+    rng = np.random.default_rng(seed)
+    values = values.copy()
+    for j in columns:
+        observed = values[~missing[:, j], j]
+        values[missing[:, j], j] = rng.choice(observed, size=missing[:, j].sum())
+    # design matrix: intercept and all the columns, the regressed one is left out of its own regression
+    design = np.column_stack([np.ones(len(values)), values])
+    for _ in range(iterations):
+        for j in columns:
+            rows = missing[:, j]
+            predictors = np.delete(np.arange(design.shape[1]), j + 1)
+            X_observed, X_missing = design[~rows][:, predictors], design[rows][:, predictors]
+            drawn, beta = _draw_regression(X_observed, design[~rows, j + 1], rng)
+            design[rows, j + 1] = _match(X_observed @ beta, X_missing @ drawn, design[~rows, j + 1], donors, rng)
+    return [design[missing[:, j], j + 1] for j in columns]
+
+
+def run_mapped_chain(path, columns, iterations=DEFAULT_ITERATIONS, donors=DEFAULT_DONORS, seed=None):
+    """`run_chain` on the values of a memory-mapped frame file (pool task: the values are not pickled)."""
+    values = map_frame(path).to_numpy(dtype=np.float64)
+    # the imputed columns are the only ones left with NaN
+    missing = np.zeros(values.shape, dtype=bool)
+    missing[:, columns] = np.isnan(values[:, columns])
+    return run_chain(values, missing, columns, iterations, donors, seed)
+
+
+def pool(estimates, variances):
+    """Rubin's rules: pooled estimate, its total variance, the between-imputation variance and the
+    fraction of missing information, from the m estimates of a statistic and their variances."""
+    estimates, variances = np.asarray(estimates, dtype=np.float64), np.asarray(variances, dtype=np.float64)
+    m = len(estimates)
+    within = variances.mean(axis=0)
+    between = estimates.var(axis=0, ddof=1) if m > 1 else np.zeros_like(within)
+    total = within + (1 + 1 / m) * between
+    with np.errstate(invalid='ignore', divide='ignore'):
+        fraction = (1 + 1 / m) * between / total
+    return estimates.mean(axis=0), total, between, fraction
+
+
+class MultipleImputation:
+    """m completed datasets, held as the observed frame and the imputed cells of every draw."""
+
+    def __init__(self, observed, rows, draws):
+        self.observed = observed  # frame with the missing values
+        self.rows = rows          # {column: positions of its missing rows}
+        self.draws = draws        # {column: (m, missing rows) imputed values}
+
+    @property
+    def m(self):
+        return len(next(iter(self.draws.values()))) if self.draws else 0
+
+    @property
+    def nbytes(self):
+        """Memory of the imputed cells (the m completed datasets share the observed frame)."""
+        return sum(self.rows[c].nbytes + self.draws[c].nbytes for c in self.draws)
+
+    def completed(self, i):
+        """Completed dataset of draw i (with copy-on-write, only the imputed columns are new)."""
+        df = self.observed.copy(deep=False)
+        for column, draws in self.draws.items():
+            values = df[column].to_numpy(copy=True)
+            values[self.rows[column]] = draws[i]
+            df[column] = values
+        return df
+
+    def pooled_means(self):
+        """Mean of every imputed column pooled over the draws with Rubin's rules, with its standard error."""
+        rows = []
+        n = len(self.observed)
+        for column, draws in self.draws.items():
+            observed = self.observed[column].dropna().to_numpy(dtype=np.float64)
+            draws = draws.astype(np.float64)
+            # mean and variance of each completed column, from the observed values and the drawn ones
+            sums = observed.sum() + draws.sum(axis=1)
+            squares = (observed ** 2).sum() + (draws ** 2).sum(axis=1)
+            means = sums / n
+            variances = (squares - n * means ** 2) / (n - 1)
+            mean, total, between, fraction = pool(means, variances / n)
+            rows.append({'Column': column, 'Imputed': draws.shape[1], 'Mean': mean, 'SE': np.sqrt(total),
+                         'Between-imputation SD': np.sqrt(between), 'Missing information': fraction})
+        return pd.DataFrame(rows)
+
+
+@instrumented('multiple_imputation')
+def multiple_imputation(df, m=DEFAULT_IMPUTATIONS, columns=MICE_COLUMNS, iterations=DEFAULT_ITERATIONS,
+                        donors=DEFAULT_DONORS, seed=0, executor=None, progress=None):
+    """Impute the missing values of `columns` m times, the chains running in parallel.
+
+    The other columns of `df` are predictors; their missing values (e.g.
+    BPMEDS) are filled with -1, the "Unknown" category of the cleaning
+    pipeline. With `executor=False` the chains run one after the other in
+    this process. `progress(fraction)` is called after every chain.
+    """
+    columns = [c for c in columns if df[c].isna().any()]
+    values = df.apply(pd.to_numeric, errors='coerce').to_numpy(dtype=np.float64, na_value=np.nan)
+    positions = [df.columns.get_loc(c) for c in columns]
+    missing = np.zeros(values.shape, dtype=bool)
+    missing[:, positions] = np.isnan(values[:, positions])
+    values[np.isnan(values) & ~missing] = -1
+    seeds = np.random.SeedSequence(seed).spawn(m)
+    if executor is False or not columns:
+        chains = []
+        for s in seeds:
+            chains.append(run_chain(values, missing, positions, iterations, donors, seed=s))
+            if progress is not None:
+                progress(len(chains) / m)
+    else:
+        if executor is None:
+            # imported here: scikit-learn is only loaded with the pool
+            from framingham.training import get_executor
+            executor = get_executor()
+        path = FRAMES_DIR / f'mice_{uuid.uuid4().hex[:12]}.arrow'
+        write_frame(pd.DataFrame(values, columns=[str(j) for j in range(values.shape[1])]), path)
+        try:
+            futures = {executor.submit(run_mapped_chain, path, positions, iterations, donors, seed=s): i
+                       for i, s in enumerate(seeds)}
+            chains = [None] * m
+            for done, future in enumerate(as_completed(futures), 1):
+                chains[futures[future]] = future.result()
+                if progress is not None:
+                    progress(done / m)
+        finally:
+            path.unlink(missing_ok=True)
+    rows = {c: np.flatnonzero(missing[:, j]) for c, j in zip(columns, positions)}
+    draws = {c: np.stack([chain[i] for chain in chains]).astype(np.float32) for i, c in enumerate(columns)}
+    return MultipleImputation(df, rows, draws)
+
@@ -0,0 +1,157 @@
+"""Missing-data profile of the Missing Data section of the Data exploration page.
+
+The null mask is computed once as a bit matrix: one 64-bit word per row,
+with bit j set when column j is missing (the missingness pattern of the
+row). The rows are then counted per (pattern, period), in one hashing pass.
+The pattern table has a few dozen rows whatever the size of the cohort. The
+table also keeps the sums and squares of the observed values of every
+column. The missing counts per column and per period, the co-missingness of
+the column pairs and the comparisons of rows with and without a missing
+value are all matrix products on that table.
+"""
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+from framingham.metrics import measure
+
+# one bit per column in a 64-bit word
+MAX_COLUMNS = 64
+# fewer missing rows than this give too noisy a mean to compare with the other rows
+MIN_MISSING = 30
+
+
+def pattern_codes(df, columns):
+    """Missingness pattern of every row: bit j is set when `columns[j]` is missing."""
+    if len(columns) > MAX_COLUMNS:
+        raise ValueError(f"at most {MAX_COLUMNS} columns can be profiled, got {len(columns)}")
+    codes = np.zeros(len(df), dtype=np.uint64)
+    for bit, column in enumerate(columns):
+        if df[column].hasnans:
+            codes[df[column].isna().to_numpy()] |= np.uint64(1 << bit)
+    return codes
+
+
+class MissingnessProfile:
+    """Rows per missingness pattern and period, with the sums of the observed values per pattern."""
+
+    def __init__(self, columns, patterns, groups, counts, sums, squares, by=None):
+        self.columns = list(columns)
+        self.patterns = patterns  # (P,) uint64 pattern words
+        self.groups = groups      # values of the `by` column
+        self.counts = counts      # (P, G) rows per pattern and group, the last group is a missing `by` value
+        self.sums = sums          # (P, p) sums of the observed values of each column
+        self.squares = squares    # (P, p) same for the squares
+        self.by = by
+
+    @classmethod
+    def build(cls, df, columns=None, by='PERIOD'):
+        """Profile of the numeric `columns` (all by default), with the missing counts per value of `by`."""
+        columns = list(df.columns if columns is None else columns)
+        codes, patterns = pd.factorize(pattern_codes(df, columns))
+        if by is not None and by in df.columns:
+            group_codes, groups = pd.factorize(df[by], sort=True)
+            # rows with a missing `by` value (code -1) go to the last group
+            group_codes = np.where(group_codes < 0, len(groups), group_codes)
+        else:
+            by, group_codes, groups = None, np.zeros(len(df), dtype=np.int64), pd.Index([])
+        n_groups = len(groups) + 1
+        counts = np.bincount(codes * n_groups + group_codes, minlength=len(patterns) * n_groups)
+        sums = np.empty((len(patterns), len(columns)))
+        squares = np.empty((len(patterns), len(columns)))
+        for j, column in enumerate(columns):
+            values = df[column].to_numpy(dtype=np.float64, na_value=np.nan)
+            sums[:, j] = np.bincount(codes, weights=values, minlength=len(patterns))
+            squares[:, j] = np.bincount(codes, weights=values * values, minlength=len(patterns))
+        profile = cls(columns, np.asarray(patterns, dtype=np.uint64), groups,
+                      counts.reshape(len(patterns), n_groups), sums, squares, by)
+        # a column is NaN on all the rows of the patterns where it is missing, and on none of the others
+        sums[profile.bits] = squares[profile.bits] = 0
+        return profile
+
+    @property
+    def bits(self):
+        """(P, p) boolean matrix of the missing columns of each pattern."""
+        return (self.patterns[:, None] >> np.arange(len(self.columns), dtype=np.uint64)) & np.uint64(1) == 1
+
+    @property
+    def pattern_rows(self):
+        """Rows per pattern."""
+        return self.counts.sum(axis=1)
+
+    @property
+    def n_rows(self):
+        return int(self.counts.sum())
+
+    def missing_counts(self):
+        """Missing values per column, like df.isna().sum()."""
+        return pd.Series(self.pattern_rows @ self.bits, index=self.columns)
+
+    def by_group(self):
+        """Missing values per column (but `by`) and value of `by`, like df.groupby(by).apply(lambda x: x.isna().sum())."""
+        counts = pd.DataFrame(self.counts[:, :len(self.groups)].T @ self.bits,
+                              index=pd.Index(self.groups, name=self.by), columns=self.columns)
+        return counts.drop(columns=[self.by]) if self.by is not None else counts
+
+    def co_missing(self):
+        """Rows where both columns of a pair are missing (the diagonal is the missing count of the column)."""
+        bits = self.bits.astype(np.int64)
+        return pd.DataFrame(bits.T @ (bits * self.pattern_rows[:, None]), index=self.columns, columns=self.columns)
+
+    def pattern_table(self):
+        """Missing columns, rows and share of the rows of every pattern, the most frequent first."""
+        rows = self.pattern_rows
+        names = [', '.join(c for c, missing in zip(self.columns, bits) if missing) or '(complete)' for bits in self.bits]
+        table = pd.DataFrame({'missing columns': names, 'rows': rows, 'share': rows / max(self.n_rows, 1)})
+        return table.sort_values('rows', ascending=False, kind='stable').reset_index(drop=True)
+
+    def mean_differences(self):
+        """Standardized mean differences of every column (columns) between the rows where a column (index)
+        is missing and the rows where it is observed, over the rows where the compared column is observed."""
+        missing = self.bits.astype(np.float64)
+        observed = 1 - missing
+        rows = observed * self.pattern_rows[:, None]
+        # row j, column k: statistics of column k over the rows where column j is missing (resp. observed)
+        n_missing, n_observed = missing.T @ rows, observed.T @ rows
+        with np.errstate(invalid='ignore', divide='ignore'):
+            mean_missing, mean_observed = missing.T @ self.sums / n_missing, observed.T @ self.sums / n_observed
+            var_missing = missing.T @ self.squares / n_missing - mean_missing ** 2
+            var_observed = observed.T @ self.squares / n_observed - mean_observed ** 2
+            smd = (mean_missing - mean_observed) / np.sqrt(np.clip(var_missing + var_observed, 0, None) / 2)
+        smd[~np.isfinite(smd)] = np.nan
+        np.fill_diagonal(smd, np.nan)
+        return pd.DataFrame(smd, index=self.columns, columns=self.columns)
+
+    def largest_differences(self, min_missing=MIN_MISSING):
+        """Largest |SMD| of another column between the rows where each column is missing and the others.
+
+        Descriptive only: a large difference says the missing rows are not a
+        random sample on that column, not why the values are missing (a
+        difference can also be chance, and MNAR cannot be seen on the observed
+        data). Columns with fewer than `min_missing` missing rows get no SMD.
+        """
+        counts = self.missing_counts()
+        columns = counts[counts > 0].index
+        smd = self.mean_differences().abs()
+        rows = []
+        for column in columns:
+            differences = smd.loc[column].dropna()
+            if counts[column] < min_missing or not len(differences):
+                related, difference = None, np.nan
+            else:
+                related, difference = differences.idxmax(), differences.max()
+            rows.append({
+                'Column': column,
+                'Missing': int(counts[column]),
+                'Missing (%)': 100 * counts[column] / max(self.n_rows, 1),
+                'Most different column': related,
+                '|SMD|': difference,
+            })
+        return pd.DataFrame(rows, columns=['Column', 'Missing', 'Missing (%)', 'Most different column', '|SMD|'])
+
+
+@st.cache_resource(show_spinner="Profiling the missing values...", max_entries=4)
+def missingness_profile(_df, key, by='PERIOD'):
+    """Missingness profile of a data frame, built once per data version `key`."""
+    with measure('missingness_profile'):
+        return MissingnessProfile.build(_df, by=by)
@@ -0,0 +1,83 @@
+"""Longitudinal panel of the cohort: one row per participant (RANDID) and examination (PERIOD).
+
+The rows are sorted by participant and period and stored as one contiguous
+block of values, so the history of a participant is a slice found in O(1)
+through a dictionary of offsets. Changes between consecutive examinations
+are computed for all participants at once by comparing each row with the
+previous one.
+"""
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+from framingham.data import load_dataset
+
+
+class PanelStore:
+    """Values of some columns, sorted by (participant, period), with per-participant offsets."""
+
+    def __init__(self, ids, periods, values, columns):
+        self.ids = ids
+        self.periods = periods
+        self.values = values
+        self.columns = list(columns)
+        # first row of each participant, and one past the last row
+        starts = np.flatnonzero(np.r_[True, ids[1:] != ids[:-1]]) if len(ids) else np.array([], dtype=np.int64)
+        self.offsets = np.r_[starts, len(ids)]
+        self.participants = ids[starts]
+        self._position = {participant: i for i, participant in enumerate(self.participants.tolist())}
+
+    @classmethod
+    def build(cls, df, ids, columns=None):
+        """Panel of the columns of `df`; `ids` are the participant IDs of its rows."""
+        columns = [c for c in (columns or df.columns) if c != 'PERIOD']
+        ids = np.asarray(ids, dtype=np.int64)
+        periods = df['PERIOD'].to_numpy(dtype=np.int64)
+        order = np.lexsort((periods, ids))
+        values = np.ascontiguousarray(df[columns].to_numpy(dtype=np.float64)[order])
+        return cls(ids[order], periods[order], values, columns)
+
+    def __len__(self):
+        return len(self.participants)
+
+    def __contains__(self, participant):
+        return participant in self._position
+
+    def history(self, participant):
+        """Examinations of one participant: one row per period."""
+        i = self._position[participant]
+        rows = slice(self.offsets[i], self.offsets[i + 1])
+        return pd.DataFrame(self.values[rows], index=pd.Index(self.periods[rows], name='PERIOD'),
+                            columns=self.columns)
+
+    def deltas(self, columns=None):
+        """Change of each column since the previous examination of the same participant.
+
+        One row per examination that has a previous one, with the participant,
+        the two periods and the differences.
+        """
+        columns = columns or self.columns
+        index = [self.columns.index(c) for c in columns]
+        follow_up = np.flatnonzero(self.ids[1:] == self.ids[:-1]) + 1
+        changes = self.values[follow_up][:, index] - self.values[follow_up - 1][:, index]
+        frame = pd.DataFrame(changes, columns=columns)
+        frame.insert(0, 'PERIOD', self.periods[follow_up])
+        frame.insert(0, 'PREVIOUS_PERIOD', self.periods[follow_up - 1])
+        frame.insert(0, 'RANDID', self.ids[follow_up])
+        return frame
+
+    def mean_deltas(self, columns=None):
+        """Average change of each column per pair of consecutive periods (e.g. 1 -> 2)."""
+        deltas = self.deltas(columns)
+        return deltas.drop(columns='RANDID').groupby(['PREVIOUS_PERIOD', 'PERIOD']).mean()
+
+    def examinations(self):
+        """Number of examinations of each participant."""
+        return pd.Series(np.diff(self.offsets), index=self.participants, name='examinations')
+
+
+@st.cache_resource(show_spinner="Indexing the participants...", max_entries=4)
+def panel_store(_df, key):
+    """Panel of a frame derived from the dataset (same index), built once per data version `key`."""
+    ids = load_dataset(['RANDID'])['RANDID'].loc[_df.index]
+    return PanelStore.build(_df, ids)
@@ -0,0 +1,12 @@
+"""Location of the local cache of the app, shared by the modules that write to it.
+
+The data snapshot, the shared frames, the model registry, the score files
+and the metrics file all live under CACHE_DIR (FRAMINGHAM_CACHE_DIR, `.cache`
+next to the app by default). This module imports nothing of the app, so
+framingham.metrics and framingham.shared can use it without importing
+framingham.data, which imports them.
+"""
+import os
+from pathlib import Path
+
+CACHE_DIR = Path(os.environ.get('FRAMINGHAM_CACHE_DIR', Path(__file__).resolve().parent.parent / '.cache'))
@@ -0,0 +1,119 @@
+"""Registry of fitted models on local disk.
+
+An entry is a fitted estimator (joblib) and its metrics (JSON), keyed by the
+dataset version, the feature list, the model type and its hyperparameters.
+Metrics can be read without loading the estimator, so looking up an already
+trained model is a small JSON read. The registry is bounded in size: the
+least recently used entries are removed first.
+"""
+import functools
+import hashlib
+import json
+import os
+import threading
+import time
+
+import joblib
+
+from framingham.data import CACHE_DIR
+
+REGISTRY_DIR = CACHE_DIR / 'models'
+MAX_REGISTRY_BYTES = int(float(os.environ.get('FRAMINGHAM_MODEL_REGISTRY_MB', 512)) * 1024 * 1024)
+
+
+class ModelRegistry:
+    """Fitted estimators and their metrics, stored as <key>.joblib and <key>.json."""
+
+    def __init__(self, root=REGISTRY_DIR, max_bytes=MAX_REGISTRY_BYTES):
+        self.root = root
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def key(data_key, features, spec, **settings):
+        """Key of a model trained on `features` of the data version `data_key`.
+
+        `settings` are the other things the result depends on (split, folds...).
+        """
+        parts = (data_key, tuple(features), spec, tuple(sorted(settings.items())))
+        return hashlib.sha256(repr(parts).encode()).hexdigest()[:24]
+
+    def _paths(self, key):
+        return self.root / f'{key}.joblib', self.root / f'{key}.json'
+
+    def get_result(self, key):
+        """Metrics of a registered model, or None."""
+        _, result_path = self._paths(key)
+        try:
+            with open(result_path) as f:
+                entry = json.load(f)
+        except (OSError, ValueError):
+            return None
+        self._touch(key)
+        return entry['result']
+
+    def load_model(self, key):
+        """Fitted estimator of a registered model, or None."""
+        model_path, _ = self._paths(key)
+        try:
+            model = joblib.load(model_path)
+        except (OSError, EOFError, ValueError):
+            return None
+        self._touch(key)
+        return model
+
+    def put(self, key, model, result, **meta):
+        """Store a fitted estimator and its metrics, then evict old entries if needed."""
+        self.root.mkdir(parents=True, exist_ok=True)
+        model_path, result_path = self._paths(key)
+        # write the model before the metrics: an entry is complete once its JSON exists
+        tmp = model_path.with_suffix(f'.joblib.{os.getpid()}.tmp')
+        joblib.dump(model, tmp)
+        os.replace(tmp, model_path)
+        tmp = result_path.with_suffix(f'.json.{os.getpid()}.tmp')
+        with open(tmp, 'w') as f:
+            json.dump({'result': result, 'meta': meta, 'created': time.time()}, f)
+        os.replace(tmp, result_path)
+        self.evict()
+
+    def _touch(self, key):
+        # the modification time is the "last used" time of the LRU eviction
+        for path in self._paths(key):
+            try:
+                os.utime(path)
+            except OSError:
+                pass
+
+    def entries(self):
+        """(last used, size in bytes, key) of every entry."""
+        entries = []
+        for result_path in self.root.glob('*.json'):
+            key = result_path.stem
+            try:
+                size = sum(path.stat().st_size for path in self._paths(key))
+                entries.append((result_path.stat().st_mtime, size, key))
+            except OSError:
+                continue
+        return entries
+
+    def evict(self):
+        """Remove the least recently used entries until the registry fits in max_bytes."""
+        with self._lock:
+            entries = sorted(self.entries())
+            total = sum(size for _, size, _ in entries)
+            # never evict the newest entry
+            for _, size, key in entries[:-1]:
+                if total <= self.max_bytes:
+                    break
+                for path in self._paths(key):
+                    try:
+                        path.unlink()
+                    except OSError:
+                        pass
+                total -= size
+
+
+@functools.lru_cache(maxsize=None)
+def default_registry():
+    """Registry of the app, in the local cache directory."""
+    return ModelRegistry()
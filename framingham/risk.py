@@ -0,0 +1,121 @@
+"""Single-patient CHD risk estimate of the BMI calculator.
+
+The logistic regression of the Data Analysis page is exported once to a few
+NumPy arrays: the standardization is folded into the coefficients, so the
+risk of a patient is one dot product and a sigmoid. The arrays are saved as
+a small .npz file per version of the cleaned data; loading them needs
+neither scikit-learn nor the fitted estimator.
+"""
+import os
+from typing import NamedTuple
+
+import numpy as np
+
+from framingham.data import BMI_BINS, BMI_LABELS, CACHE_DIR
+
+SCORER_DIR = CACHE_DIR / 'scorers'
+
+
+class RiskScorer(NamedTuple):
+    """Logistic regression on the raw (unstandardized) features."""
+    features: tuple
+    weights: np.ndarray
+    intercept: float
+    # training medians, used for the values the patient did not give
+    defaults: np.ndarray
+    # BMI category columns (one-hot, the first category is the reference) and their bin edges
+    bmi_edges: np.ndarray
+    bmi_columns: tuple
+
+    def default(self, column):
+        """Value used for a measurement the patient did not give."""
+        return float(self.defaults[self.features.index(column)])
+
+    def vector(self, **values):
+        """Feature vector of a patient from the raw measurements (AGE, SEX, BMI, SYSBP...)."""
+        x = self.defaults.copy()
+        index = {feature: i for i, feature in enumerate(self.features)}
+        for column, value in values.items():
+            x[index[column]] = value
+        # the same encoding as training.engineer_features
+        x[index['SEX_BINARY']] = float(x[index['SEX']] == 1)
+        # right-closed bins like pd.cut; a BMI outside the bins gets no category
+        category = np.searchsorted(self.bmi_edges, x[index['BMI']], side='left') - 1
+        for i, column in enumerate(self.bmi_columns, start=1):
+            x[index[column]] = float(category == i)
+        return x
+
+    def risk(self, **values):
+        """Estimated probability of CHD of a patient."""
+        return float(1 / (1 + np.exp(-(self.vector(**values) @ self.weights + self.intercept))))
+
+    def save(self, path):
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_suffix(f'.npz.{os.getpid()}.tmp')
+        with open(tmp, 'wb') as f:
+            np.savez(f, features=np.array(self.features), weights=self.weights, intercept=self.intercept,
+                     defaults=self.defaults, bmi_edges=self.bmi_edges, bmi_columns=np.array(self.bmi_columns))
+        os.replace(tmp, path)
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path) as arrays:
+            return cls(tuple(arrays['features'].tolist()), arrays['weights'], float(arrays['intercept']),
+                       arrays['defaults'], arrays['bmi_edges'], tuple(arrays['bmi_columns'].tolist()))
+
+
+def export_scorer(model, X_train, bmi_bins, bmi_labels):
+    """RiskScorer of a fitted StandardScaler + LogisticRegression pipeline."""
+    scaler, regression = model[0], model[-1]
+    # w . (x - mean) / scale + b  ==  (w / scale) . x + (b - (w / scale) . mean)
+    weights = regression.coef_[0] / scaler.scale_
+    intercept = float(regression.intercept_[0] - weights @ scaler.mean_)
+    bmi_columns = tuple(f'BMI_Category_{label}' for label in bmi_labels[1:])
+    return RiskScorer(tuple(X_train.columns), weights, intercept, X_train.median().to_numpy(dtype=np.float64),
+                      np.asarray(bmi_bins, dtype=np.float64), bmi_columns)
+
+
+def _scorer_path(cleaned):
+    return SCORER_DIR / f'logistic_{cleaned.key[:24]}.npz'
+
+
+def load_scorer(cleaned):
+    """Scorer of the logistic regression trained on the cleaned data, or None if the model is not trained yet.
+
+    A model already in the registry (e.g. trained on the Data Analysis page)
+    is exported now; nothing is fitted.
+    """
+    path = _scorer_path(cleaned)
+    try:
+        return RiskScorer.load(path)
+    except (OSError, ValueError, KeyError):
+        pass
+    # only the first export needs scikit-learn and the model registry
+    from framingham.registry import default_registry
+    from framingham.training import model_spec, registry_key, split_features
+
+    registry = default_registry()
+    split = split_features(cleaned.df_rqi)
+    model = registry.load_model(registry_key(registry, cleaned.key, list(split[0].columns),
+                                             model_spec('Logistic Regression')))
+    if model is None:
+        return None
+    scorer = export_scorer(model, split[0], BMI_BINS, BMI_LABELS)
+    scorer.save(path)
+    return scorer
+
+
+def risk_scorer(cleaned, progress=None):
+    """Scorer of the logistic regression trained on the cleaned data, fitted (a job of the queue) on first use."""
+    scorer = load_scorer(cleaned)
+    if scorer is not None:
+        return scorer
+    from framingham.registry import default_registry
+    from framingham.training import fitted_model, model_spec, split_features
+
+    split = split_features(cleaned.df_rqi)
+    model = fitted_model(model_spec('Logistic Regression'), *split, registry=default_registry(),
+                         data_key=cleaned.key, progress=progress)
+    scorer = export_scorer(model, split[0], BMI_BINS, BMI_LABELS)
+    scorer.save(_scorer_path(cleaned))
+    return scorer
@@ -0,0 +1,186 @@
+"""Batch CHD risk scoring of patient files.
+
+A CSV or Parquet file is read in chunks, each chunk gets the feature
+engineering of the Data Analysis page (SEX_BINARY, one-hot BMI_Category) and
+is scored by a model trained on the cleaned study data. The scores are
+appended to the output file chunk by chunk, so the memory used does not
+depend on the size of the file.
+
+    python -m framingham.scoring patients.csv scores.parquet [--model "Random Forest"]
+"""
+import argparse
+import os
+import time
+import uuid
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from framingham.chunks import DEFAULT_CHUNK_SIZE, count_rows, file_format, read_chunks
+from framingham.cleaning import clean_dataset
+from framingham.data import BMI_BINS, BMI_LABELS, CACHE_DIR, RQ_COLUMNS
+from framingham.metrics import instrumented
+from framingham.registry import default_registry
+from framingham.training import MODEL_OPTIONS, fitted_model, model_scores, model_spec, split_features
+
+# columns a patient file must have (the target is not needed)
+INPUT_COLUMNS = [column for column in RQ_COLUMNS if column != 'ANYCHD']
+SCORE_COLUMNS = ['CHD_SCORE', 'CHD_PREDICTION']
+
+SCORES_DIR = CACHE_DIR / 'scores'
+# score files kept on the server for download
+MAX_SCORE_FILES = 10
+
+
+def encode_features(chunk, features, fill_values):
+    """Feature matrix of a chunk, in the column order the model was trained on.
+
+    Missing values are replaced by the medians of the training data
+    (`fill_values`). The BMI categories are encoded against the fixed list of
+    categories, so every chunk gets the same columns.
+    """
+    missing = [column for column in INPUT_COLUMNS if column not in chunk.columns]
+    if missing:
+        raise ValueError(f"the file has no column {', '.join(missing)}")
+    df = chunk[INPUT_COLUMNS].apply(pd.to_numeric, errors='coerce').fillna(fill_values[INPUT_COLUMNS])
+    #Binary encoding for SEX (1 = Male, 2 = Female -> 0 = Female, 1 = Male)
+    df['SEX_BINARY'] = (df['SEX'] == 1).astype(int)
+    category = pd.cut(df['BMI'], bins=BMI_BINS, labels=BMI_LABELS)
+    for label in BMI_LABELS[1:]:
+        df[f'BMI_Category_{label}'] = (category == label).astype(int)
+    return df.reindex(columns=features, fill_value=0).to_numpy(dtype=np.float64)
+
+
+def score_chunk(chunk, model, features, fill_values):
+    """The chunk with its CHD score (probability or decision function) and predicted class."""
+    X = encode_features(chunk, features, fill_values)
+    scored = chunk.copy()
+    # the measurements are written as floats, so every chunk has the same schema
+    scored[INPUT_COLUMNS] = chunk[INPUT_COLUMNS].apply(pd.to_numeric, errors='coerce').astype(np.float64)
+    scores = model_scores(model, X)
+    scored['CHD_SCORE'] = scores
+    # the class predict() would give, without running the model a second time
+    threshold = 0.5 if hasattr(model, 'predict_proba') else 0.0
+    scored['CHD_PREDICTION'] = model.classes_[(scores > threshold).astype(np.int64)].astype(np.int64)
+    return scored
+
+
+def output_schema(source, fmt):
+    """Arrow schema of the scored rows of a file, fixed before the first chunk is read.
+
+    The input columns are written as floats and the scores as float and int.
+    The other columns keep the types of a Parquet file. The other columns of a
+    CSV file are copied as text: their types would only be guessed chunk by
+    chunk, and a column of integers or nulls in the first chunk can have
+    floats or text further down.
+    """
+    if fmt == 'parquet':
+        fields = list(pq.ParquetFile(source).schema_arrow)
+    else:
+        fields = [pa.field(column, pa.string()) for column in pd.read_csv(source, nrows=0).columns]
+        if hasattr(source, 'seek'):
+            source.seek(0)
+    types = {column: pa.float64() for column in INPUT_COLUMNS}
+    types.update(CHD_SCORE=pa.float64(), CHD_PREDICTION=pa.int64())
+    fields = [pa.field(field.name, types.get(field.name, field.type))
+              for field in fields if field.name not in SCORE_COLUMNS]
+    return pa.schema(fields + [pa.field(column, types[column]) for column in SCORE_COLUMNS])
+
+
+def use_all_cores(model):
+    """Predict with every CPU core for the models that support it (random forest, KNN)."""
+    estimator = model[-1] if hasattr(model, 'steps') else model
+    if 'n_jobs' in estimator.get_params():
+        estimator.set_params(n_jobs=-1)
+    return model
+
+
+@instrumented('score_file')
+def score_file(source, output, model, features, fill_values, chunk_size=DEFAULT_CHUNK_SIZE, fmt=None,
+               progress=None):
+    """Score every row of `source` and write it with its scores to `output` (.csv or .parquet).
+
+    `progress(fraction, stats)` is called after every chunk. Returns the
+    number of rows, the time taken and the rows per second.
+    """
+    fmt = fmt or file_format(source)
+    total = count_rows(source, fmt) if progress is not None else None
+    tmp = f'{output}.{os.getpid()}.tmp'
+    writer, rows, start = None, 0, time.perf_counter()
+    dtype = None
+    if file_format(output) == 'parquet':
+        schema = output_schema(source, fmt)
+        if fmt == 'csv':
+            # the other columns of a CSV file are read as text
+            dtype = {field.name: str for field in schema if field.type == pa.string()}
+        writer = pq.ParquetWriter(tmp, schema)
+    try:
+        for chunk in read_chunks(source, chunk_size, fmt, dtype):
+            scored = score_chunk(chunk, model, features, fill_values)
+            if writer is not None:
+                writer.write_table(pa.Table.from_pandas(scored[writer.schema.names], schema=writer.schema,
+                                                        preserve_index=False))
+            else:
+                scored.to_csv(tmp, mode='a' if rows else 'w', header=not rows, index=False)
+            rows += len(scored)
+            if progress is not None:
+                seconds = time.perf_counter() - start
+                progress(min(rows / max(total, 1), 1.0), {'rows': rows, 'rows_per_second': rows / seconds})
+        if writer is not None:
+            writer.close()
+            writer = None
+        if not rows:
+            raise ValueError("the file has no rows")
+    except BaseException:
+        if writer is not None:
+            writer.close()
+        if os.path.exists(tmp):
+            os.remove(tmp)
+        raise
+    os.replace(tmp, output)
+    seconds = time.perf_counter() - start
+    return {'rows': rows, 'seconds': seconds, 'rows_per_second': rows / seconds, 'output': str(output)}
+
+
+def output_path(suffix):
+    """New file for the scores in SCORES_DIR; the oldest score files are removed."""
+    SCORES_DIR.mkdir(parents=True, exist_ok=True)
+    files = []
+    for path in SCORES_DIR.glob('chd_scores_*'):
+        try:
+            files.append((path.stat().st_mtime, path))
+        except FileNotFoundError:
+            # already removed by another session or server process
+            continue
+    files.sort()
+    for _, path in files[:max(len(files) - MAX_SCORE_FILES + 1, 0)]:
+        path.unlink(missing_ok=True)
+    return SCORES_DIR / f'chd_scores_{uuid.uuid4().hex[:12]}{suffix}'
+
+
+def score_with_model(spec, split, data_key, source, output, chunk_size=DEFAULT_CHUNK_SIZE, fmt=None,
+                     progress=None):
+    """Score a file with the model `spec` trained on the training split (background job)."""
+    X_train = split[0]
+    model = use_all_cores(fitted_model(spec, *split, registry=default_registry(), data_key=data_key))
+    return score_file(source, output, model, list(X_train.columns), X_train.median(), chunk_size, fmt, progress)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('source', help="CSV or Parquet file with the columns " + ', '.join(INPUT_COLUMNS))
+    parser.add_argument('output', help="file written with the scores (.csv or .parquet)")
+    parser.add_argument('--model', choices=MODEL_OPTIONS, default='Random Forest')
+    parser.add_argument('--chunk-size', type=int, default=DEFAULT_CHUNK_SIZE)
+    args = parser.parse_args(argv)
+
+    cleaned = clean_dataset()
+    stats = score_with_model(model_spec(args.model), split_features(cleaned.df_rqi), cleaned.key,
+                             args.source, args.output, args.chunk_size)
+    print(f"{stats['rows']} rows scored in {stats['seconds']:.1f} s ({stats['rows_per_second']:,.0f} rows/s)")
+
+
+if __name__ == '__main__':
+    main()
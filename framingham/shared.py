@@ -0,0 +1,76 @@
+"""Read-only cohort frames shared by all sessions of the server process.
+
+The dataset and the outputs of the cleaning stages are written once per
+data version to uncompressed Arrow IPC files and memory-mapped. Their
+columns are zero-copy, read-only views of the mapped files, so a frame is
+held once in the page cache of the machine, whatever the number of
+sessions, server processes or training workers reading it. Sessions get
+shallow copies: with pandas copy-on-write (always on from pandas 3, enabled
+at startup by streamlit_app.py before), a page that assigns or changes a
+column (a filter, a feature such as SEX_BINARY) only allocates that column.
+"""
+import hashlib
+import os
+import uuid
+from pathlib import Path
+
+import pyarrow as pa
+import pyarrow.ipc as ipc
+import streamlit as st
+
+from framingham.paths import CACHE_DIR
+
+FRAMES_DIR = CACHE_DIR / 'frames'
+# frame files kept on disk; the mappings of removed files stay valid in the processes using them
+MAX_FRAME_FILES = 32
+# frames written by another version of the code are not reused
+CODE_VERSION = hashlib.sha256(b''.join(
+    path.read_bytes() for path in sorted(Path(__file__).parent.glob('*.py')))).hexdigest()[:8]
+
+
+def write_frame(df, path):
+    """Write a frame to an uncompressed Arrow IPC file, the float NaN values kept as values."""
+    table = pa.Table.from_pandas(df)
+    for i, field in enumerate(table.schema):
+        if field.name in df.columns and pa.types.is_floating(field.type):
+            # NaN as a value, not a null: the column can be mapped without filling it again
+            table = table.set_column(i, field, pa.array(df[field.name].to_numpy(), from_pandas=False))
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(f'{path.name}.{uuid.uuid4().hex[:8]}.tmp')
+    with pa.OSFile(str(tmp), 'wb') as f, ipc.new_file(f, table.schema) as writer:
+        writer.write_table(table)
+    os.replace(tmp, path)
+
+
+def map_frame(path):
+    """Frame of the columns of a memory-mapped Arrow IPC file (zero-copy where the dtypes allow)."""
+    table = ipc.open_file(pa.memory_map(str(path))).read_all()
+    # one block per column: pandas does not consolidate (copy) the mapped columns
+    return table.to_pandas(split_blocks=True)
+
+
+def _remove_old_frames():
+    files = []
+    for path in FRAMES_DIR.glob('*.arrow'):
+        try:
+            files.append((path.stat().st_mtime, path))
+        except FileNotFoundError:
+            # already removed by another server process
+            continue
+    files.sort()
+    for _, path in files[:max(len(files) - MAX_FRAME_FILES, 0)]:
+        path.unlink(missing_ok=True)
+
+
+@st.cache_resource(show_spinner=False, max_entries=16)
+def _shared(name, key, _build):
+    path = FRAMES_DIR / f'{name}_{key}_{CODE_VERSION}.arrow'
+    if not path.exists():
+        write_frame(_build(), path)
+        _remove_old_frames()
+    return map_frame(path)
+
+
+def shared_frame(name, key, build):
+    """View of the read-only frame `name` of version `key`, built by `build()` the first time."""
+    return _shared(name, key, build).copy(deep=False)
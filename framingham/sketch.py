@@ -0,0 +1,75 @@
+"""Mergeable quantile sketch for data streamed in chunks.
+
+A compactor sketch (the KLL family with equal level capacities): values are
+appended to level 0, and a level holding more than `capacity` values is
+sorted and every other value (from a random offset) moves up one level with
+twice the weight. Memory is O(capacity * log(n / capacity)) per column and a
+quantile is off by a rank of at most ~log2(n / capacity) / capacity * n.
+Two sketches are merged by concatenating their levels, so the sketches of
+separate chunks or files combine into the sketch of all the data. Until
+more than `capacity` values are seen nothing is compacted, and the quantiles
+are exactly those of `np.quantile` (linear interpolation).
+"""
+import numpy as np
+
+DEFAULT_CAPACITY = 1 << 14
+
+
+class QuantileSketch:
+    """Approximate quantiles of a stream of values; NaN values are ignored."""
+
+    def __init__(self, capacity=DEFAULT_CAPACITY, seed=0):
+        self.capacity = capacity
+        self.levels = [np.empty(0)]
+        self._rng = np.random.default_rng(seed)
+
+    @property
+    def count(self):
+        """Number of values seen (the total weight of the sketch)."""
+        return sum(len(level) << height for height, level in enumerate(self.levels))
+
+    def update(self, values):
+        values = np.asarray(values, dtype=np.float64).ravel()
+        self.levels[0] = np.concatenate([self.levels[0], values[~np.isnan(values)]])
+        self._compact()
+        return self
+
+    def merge(self, other):
+        """Add the values of another sketch to this one."""
+        for height, level in enumerate(other.levels):
+            if height == len(self.levels):
+                self.levels.append(np.empty(0))
+            self.levels[height] = np.concatenate([self.levels[height], level])
+        self._compact()
+        return self
+
+    def _compact(self):
+        height = 0
+        while height < len(self.levels):
+            level = self.levels[height]
+            if len(level) > self.capacity:
+                level = np.sort(level)
+                # an odd value out stays on its level, so the total weight is kept
+                keep, pairs = level[len(level) - len(level) % 2:], level[:len(level) - len(level) % 2]
+                if height + 1 == len(self.levels):
+                    self.levels.append(np.empty(0))
+                self.levels[height + 1] = np.concatenate([self.levels[height + 1], pairs[self._rng.integers(2)::2]])
+                self.levels[height] = keep
+            height += 1
+
+    def quantile(self, q):
+        """Quantile(s) `q` of the values, NaN when no value was seen."""
+        values = np.concatenate(self.levels)
+        if not len(values):
+            return np.full(np.shape(q), np.nan)
+        weights = np.concatenate([np.full(len(level), 1 << height, dtype=np.int64)
+                                  for height, level in enumerate(self.levels)])
+        order = np.argsort(values, kind='stable')
+        values, ends = values[order], np.cumsum(weights[order])
+        # linear interpolation between the closest ranks, as np.quantile does on the expanded values
+        position = np.asarray(q, dtype=np.float64) * (ends[-1] - 1)
+        low = np.floor(position)
+        high = np.minimum(low + 1, ends[-1] - 1)
+        below = values[np.searchsorted(ends, low, side='right')]
+        above = values[np.searchsorted(ends, high, side='right')]
+        return below + (position - low) * (above - below)
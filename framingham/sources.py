@@ -0,0 +1,259 @@
+"""Sources of the Framingham dataset: the local snapshot of the GitHub CSV or a SQL warehouse.
+
+A source reads only the columns a page asks for and the rows matching its
+filters (e.g. PERIOD in (1, 2)), with the projection and the predicates
+pushed down to the Parquet reader or to the SQL query, and returns Arrow
+record batches instead of Python row tuples. SQL connections are pooled
+and shared by all sessions of the server process.
+
+The source is chosen with FRAMINGHAM_SOURCE:
+
+    (unset)                                        local snapshot of the GitHub CSV
+    sqlite:///relative/path.db?table=framingham    SQLite (standard library), e.g. as a stand-in warehouse
+    duckdb:///path.duckdb?table=framingham         DuckDB (duckdb package)
+    snowflake://user@account/database/schema?table=framingham&warehouse=wh
+                                                   Snowflake, password in SNOWFLAKE_PASSWORD
+
+A stand-in warehouse is created from the snapshot, and reads are timed, with
+
+    python -m framingham.sources sqlite:////tmp/framingham.db --export
+    python -m framingham.sources sqlite:////tmp/framingham.db --columns AGE BMI --periods 1
+"""
+import argparse
+import hashlib
+import os
+import queue
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from urllib.parse import parse_qs, unquote, urlparse
+
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from framingham.data import DATA_URL, SNAPSHOT_PATH, refresh_snapshot
+
+DEFAULT_TABLE = 'framingham'
+# rows per record batch of the drivers without Arrow support
+BATCH_SIZE = 65536
+POOL_SIZE = int(os.environ.get('FRAMINGHAM_SOURCE_POOL_SIZE', 4))
+# placeholder of a query parameter for each DB-API paramstyle
+PLACEHOLDERS = {'qmark': '?', 'format': '%s', 'pyformat': '%s'}
+
+
+class DataSource:
+    """Where the dataset comes from: its version and its rows."""
+
+    def version(self):
+        """Identifier of the current content of the dataset."""
+        raise NotImplementedError
+
+    def read(self, columns=None, filters=None):
+        """Arrow table of `columns` (all by default) of the rows matching `filters` ({column: values})."""
+        raise NotImplementedError
+
+
+class SnapshotSource(DataSource):
+    """The GitHub CSV, kept as a local Parquet snapshot (see framingham.data)."""
+
+    def __init__(self, url=DATA_URL):
+        self.url = url
+
+    def version(self):
+        return refresh_snapshot(self.url)['version']
+
+    def read(self, columns=None, filters=None):
+        predicates = [(column, 'in', list(values)) for column, values in (filters or {}).items()]
+        return pq.read_table(SNAPSHOT_PATH, columns=columns, filters=predicates or None)
+
+
+class ConnectionPool:
+    """At most `size` DB-API connections, opened on demand and reused."""
+
+    def __init__(self, connect, size=POOL_SIZE):
+        self._connect = connect
+        self._idle = queue.LifoQueue()
+        self._slots = threading.BoundedSemaphore(size)
+
+    @contextmanager
+    def connection(self):
+        with self._slots:
+            try:
+                conn = self._idle.get_nowait()
+            except queue.Empty:
+                conn = self._connect()
+            try:
+                yield conn
+            except BaseException:
+                # the connection may be in a broken state: it is not reused
+                conn.close()
+                raise
+            self._idle.put(conn)
+
+
+def _quote(name):
+    return '"' + name.replace('"', '""') + '"'
+
+
+def record_batches(cursor, batch_size=BATCH_SIZE):
+    """Arrow record batches of the result of a query."""
+    if hasattr(cursor, 'fetch_arrow_batches'):  # Snowflake
+        for table in cursor.fetch_arrow_batches():
+            yield from table.to_batches()
+    elif hasattr(cursor, 'fetch_record_batch'):  # DuckDB
+        yield from cursor.fetch_record_batch(batch_size)
+    else:
+        # plain DB-API drivers: the rows are turned into Arrow columns one batch at a time
+        names = [d[0] for d in cursor.description]
+        while rows := cursor.fetchmany(batch_size):
+            yield pa.RecordBatch.from_arrays([pa.array(column) for column in zip(*rows)], names=names)
+
+
+class SqlSource(DataSource):
+    """A table of a SQL database, read through a pool of DB-API connections.
+
+    The rows are sorted by `order_by`, so frames of different columns of the
+    same rows line up on their index. `checksum` is an aggregate SQL
+    expression of the content of the table ({columns} is replaced by the
+    quoted column names), e.g. the engine's hash aggregate; by default the
+    sums of the columns.
+    """
+
+    def __init__(self, connect, table=DEFAULT_TABLE, paramstyle='qmark', order_by=('RANDID', 'PERIOD'),
+                 pool_size=POOL_SIZE, name=None, checksum=None):
+        self.pool = ConnectionPool(connect, pool_size)
+        self.table = table
+        self.placeholder = PLACEHOLDERS[paramstyle]
+        self.order_by = list(order_by)
+        self.name = name or table
+        self.checksum = checksum
+        self._columns = None
+
+    def _execute(self, sql, params=()):
+        with self.pool.connection() as conn:
+            cursor = conn.cursor()
+            try:
+                cursor.execute(sql, params)
+                names = [d[0] for d in cursor.description]
+                tables = [pa.Table.from_batches([batch]) for batch in record_batches(cursor)]
+            finally:
+                cursor.close()
+        if not tables:
+            # no rows: empty columns with the names of the result
+            return pa.table({name: pa.array([], type=pa.float64()) for name in names})
+        # a batch of the plain drivers can have a column of nulls only, or of ints where the others have floats
+        return pa.concat_tables(tables, promote_options='permissive')
+
+    def columns(self):
+        """Column names of the table."""
+        if self._columns is None:
+            self._columns = self._execute(f'SELECT * FROM {self.table} WHERE 1 = 0').column_names
+        return self._columns
+
+    def query(self, columns=None, filters=None):
+        """SQL and parameters of a read; column names are checked against the table."""
+        names = self.columns()
+        columns = list(columns or names)
+        unknown = [column for column in [*columns, *(filters or {})] if column not in names]
+        if unknown:
+            raise ValueError(f"the table {self.table} has no column {', '.join(unknown)}")
+        sql = f"SELECT {', '.join(map(_quote, columns))} FROM {self.table}"
+        conditions, params = [], []
+        for column, values in (filters or {}).items():
+            values = list(values)
+            conditions.append(f"{_quote(column)} IN ({', '.join([self.placeholder] * len(values))})")
+            params += values
+        if conditions:
+            sql += ' WHERE ' + ' AND '.join(conditions)
+        order_by = [column for column in self.order_by if column in names]
+        if order_by:
+            sql += ' ORDER BY ' + ', '.join(map(_quote, order_by))
+        return sql, params
+
+    def version(self):
+        # the number of rows and a checksum of the content: a reload or an in-place update with as many rows
+        # changes the version too
+        names = self.columns()
+        columns = [_quote(column) for column in names]
+        if self.checksum is not None:
+            checksums = [self.checksum.format(columns=', '.join(columns))]
+        else:
+            # portable default: the sum of every column, and the sum weighted by the first sort key so that
+            # values moved between rows are seen as well
+            checksums = [f'SUM(CAST({column} AS DOUBLE))' for column in columns]
+            key = next((_quote(column) for column in self.order_by if column in names), None)
+            if key is not None:
+                checksums += [f'SUM(CAST({column} AS DOUBLE) * CAST({key} AS DOUBLE))' for column in columns]
+        table = self._execute(f"SELECT COUNT(*), {', '.join(checksums)} FROM {self.table}")
+        return hashlib.sha256(repr((self.name, list(table.to_pylist()[0].values()))).encode()).hexdigest()[:16]
+
+    def read(self, columns=None, filters=None):
+        sql, params = self.query(columns, filters)
+        return self._execute(sql, params)
+
+    def create(self, df):
+        """Create the table with the rows of a data frame (e.g. a stand-in of the warehouse)."""
+        types = {'i': 'BIGINT', 'u': 'BIGINT', 'b': 'BOOLEAN', 'f': 'DOUBLE'}
+        columns = ', '.join(f'{_quote(c)} {types.get(df[c].dtype.kind, "VARCHAR")}' for c in df.columns)
+        rows = df.astype(object).where(df.notna(), None).itertuples(index=False, name=None)
+        with self.pool.connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute(f'DROP TABLE IF EXISTS {self.table}')
+            cursor.execute(f'CREATE TABLE {self.table} ({columns})')
+            cursor.executemany(f"INSERT INTO {self.table} VALUES ({', '.join([self.placeholder] * len(df.columns))})",
+                               list(rows))
+            conn.commit()
+            cursor.close()
+        self._columns = None
+
+
+def source_from_url(url):
+    """Data source of a FRAMINGHAM_SOURCE URL (see the module docstring); the snapshot when empty."""
+    if not url:
+        return SnapshotSource()
+    parsed = urlparse(url)
+    options = {key: values[-1] for key, values in parse_qs(parsed.query).items()}
+    table = options.pop('table', DEFAULT_TABLE)
+    # sqlite:///relative.db and sqlite:////absolute.db, as in SQLAlchemy URLs
+    path = unquote(parsed.path[1:])
+    if parsed.scheme == 'sqlite':
+        return SqlSource(lambda: sqlite3.connect(path, check_same_thread=False), table, sqlite3.paramstyle, name=url)
+    if parsed.scheme == 'duckdb':
+        import duckdb
+        # sum of the 64-bit hashes of the rows (exact, whatever the order of the rows)
+        return SqlSource(lambda: duckdb.connect(path), table, duckdb.paramstyle, name=url,
+                         checksum='SUM(hash({columns}))')
+    if parsed.scheme == 'snowflake':
+        import snowflake.connector
+        database, _, schema = path.partition('/')
+
+        def connect():
+            return snowflake.connector.connect(
+                user=unquote(parsed.username or ''), account=parsed.hostname, database=database or None,
+                schema=schema or None, password=os.environ.get('SNOWFLAKE_PASSWORD'), **options)
+        return SqlSource(connect, table, snowflake.connector.paramstyle, name=url, checksum='HASH_AGG(*)')
+    raise ValueError(f"unsupported data source {url!r}, expected sqlite://, duckdb:// or snowflake://")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('url', help="FRAMINGHAM_SOURCE URL of the warehouse")
+    parser.add_argument('--export', action='store_true', help="create the table from the local snapshot")
+    parser.add_argument('--columns', nargs='+', help="columns read (all by default)")
+    parser.add_argument('--periods', type=int, nargs='+', help="examination periods read (all by default)")
+    args = parser.parse_args(argv)
+
+    source = source_from_url(args.url)
+    if args.export:
+        df = SnapshotSource().read().to_pandas()
+        source.create(df)
+        print(f"{len(df)} rows written to {source.table}")
+    start = time.perf_counter()
+    table = source.read(args.columns, {'PERIOD': args.periods} if args.periods else None)
+    print(f"{table.num_rows} rows x {table.num_columns} columns ({table.nbytes / 2 ** 20:.2f} MB) "
+          f"read in {time.perf_counter() - start:.3f} s")
+
+
+if __name__ == '__main__':
+    main()
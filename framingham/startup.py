@@ -0,0 +1,94 @@
+"""Cold start report: import cost of the app entry point and of each page.
+
+Every measurement runs in a fresh interpreter with `python -X importtime`.
+The cost of a page only counts the modules it adds on top of the entry point.
+
+    python -m framingham.startup [--top 10] [--json startup.json]
+"""
+import argparse
+import ast
+import json
+import re
+import subprocess
+import sys
+from pathlib import Path
+
+from framingham.views import PAGES
+
+ROOT = Path(__file__).resolve().parent.parent
+ENTRY_POINT = ROOT / 'streamlit_app.py'
+
+_LINE = re.compile(r'import time:\s+(\d+) \|\s+(\d+) \|(\s*)(\S+)')
+
+
+def entry_imports(path=ENTRY_POINT):
+    """Modules imported at the top level of the entry point, i.e. before the first page is rendered."""
+    modules = []
+    for node in ast.parse(Path(path).read_text()).body:
+        if isinstance(node, ast.Import):
+            modules += [alias.name for alias in node.names]
+        elif isinstance(node, ast.ImportFrom) and not node.level:
+            modules.append(node.module)
+    return list(dict.fromkeys(modules))
+
+
+# what streamlit_app.py imports before the first page is rendered
+ENTRY_IMPORTS = entry_imports()
+
+
+def import_times(modules):
+    """(module, self us, cumulative us) of every module loaded by importing `modules`."""
+    code = ''.join(f'import {module}\n' for module in modules)
+    proc = subprocess.run([sys.executable, '-X', 'importtime', '-c', code],
+                          capture_output=True, text=True, cwd=ROOT)
+    if proc.returncode != 0:
+        raise RuntimeError(f"importing {modules} failed:\n{proc.stderr[-2000:]}")
+    rows = []
+    for line in proc.stderr.splitlines():
+        match = _LINE.match(line)
+        if match:
+            rows.append((match[4], int(match[1]), int(match[2])))
+    return rows
+
+
+def import_cost(modules, baseline=()):
+    """Total import time (ms) of `modules` and its split per top-level package,
+    leaving out what is already loaded by `baseline`."""
+    loaded = {name for name, _, _ in import_times(baseline)} if baseline else set()
+    packages = {}
+    for name, self_us, _ in import_times([*baseline, *modules]):
+        if name in loaded:
+            continue
+        package = name.split('.')[0]
+        packages[package] = packages.get(package, 0) + self_us / 1000
+    packages = dict(sorted(packages.items(), key=lambda item: -item[1]))
+    return {'total_ms': round(sum(packages.values()), 1),
+            'packages': {package: round(ms, 1) for package, ms in packages.items()}}
+
+
+def startup_report():
+    report = {'python': sys.version.split()[0], 'entry': import_cost(ENTRY_IMPORTS), 'pages': {}}
+    for title, module in PAGES.items():
+        report['pages'][title] = import_cost([module], baseline=ENTRY_IMPORTS)
+    return report
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--top', type=int, default=10, help="number of packages listed per page")
+    parser.add_argument('--json', help="also write the report to this file")
+    args = parser.parse_args(argv)
+
+    report = startup_report()
+    sections = [('Entry point', report['entry'])] + list(report['pages'].items())
+    for title, cost in sections:
+        print(f"{title}: {cost['total_ms']:.1f} ms")
+        for package, ms in list(cost['packages'].items())[:args.top]:
+            print(f"    {package:<30} {ms:8.1f} ms")
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,212 @@
+"""Out-of-core cleaning of cohorts larger than memory.
+
+The same stages as `CleaningPipeline`, on a CSV or Parquet file read in
+chunks, with the cleaned rows written to a Parquet file chunk by chunk:
+
+1. A first pass over the file collects the statistics of the whole cohort:
+   a mergeable quantile sketch of every imputed or outlier column (the
+   medians and the outlier quantiles), the mean of GLUCOSE and a uniform
+   sample of rows (the donors of the KNN imputation). The 'mad' method needs
+   a second pass for the median of the absolute deviations.
+2. A last pass imputes the missing values, replaces the outliers by NaN and
+   imputes them with KNN, chunk by chunk. The donors of a chunk are its own
+   rows and the sampled rows of the other chunks.
+
+Peak memory depends on the chunk size and the number of donors, not on the
+size of the file. When the whole file fits in the sample and the quantile
+sketches (up to 16384 rows) the result is the one of the in-memory pipeline, up to
+the rounding of an interpolated quantile.
+
+    python -m framingham.streaming cohort.csv cleaned.parquet [--chunk-size 100000]
+"""
+import argparse
+import os
+import time
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from framingham.chunks import DEFAULT_CHUNK_SIZE, count_rows, file_format, read_chunks
+from framingham.cleaning import CleaningPipeline
+from framingham.data import RQ_COLUMNS, compact_dtypes
+from framingham.knn import knn_impute
+from framingham.metrics import instrumented
+from framingham.outliers import OUTLIER_METHODS
+from framingham.sketch import QuantileSketch
+
+# rows sampled from the whole file as KNN donors
+DEFAULT_DONORS = 20_000
+
+
+def _read(source, chunk_size, fmt):
+    # research question columns of each chunk, with the dtypes of the in-memory pipeline
+    for chunk in read_chunks(source, chunk_size, fmt):
+        missing = [column for column in RQ_COLUMNS if column not in chunk.columns]
+        if missing:
+            raise ValueError(f"the file has no column {', '.join(missing)}")
+        yield compact_dtypes(chunk[RQ_COLUMNS].apply(pd.to_numeric, errors='coerce'))
+
+
+class CohortStatistics:
+    """Statistics of the whole cohort needed to clean any of its chunks."""
+
+    def __init__(self, pipeline, donors=DEFAULT_DONORS, seed=0):
+        self.pipeline = pipeline
+        self.columns = sorted(set(pipeline.median_columns) | set(pipeline.outlier_columns))
+        self.sketches = {column: QuantileSketch(seed=seed) for column in self.columns}
+        self.glucose_sum = 0.0
+        self.glucose_count = 0
+        self.rows = 0
+        self.donors = donors
+        # bottom-k sample: the rows with the smallest random keys are a uniform sample of the file
+        self._rng = np.random.default_rng(seed)
+        self.sample_keys = np.empty(0)
+        self.sample_rows = np.empty(0, dtype=np.int64)
+        self.sample = np.empty((0, len(RQ_COLUMNS)))
+        self.medians = self.glucose_mean = self.bounds = None
+
+    def update(self, chunk):
+        """Add a chunk (the next rows of the file) to the statistics."""
+        for column in self.columns:
+            self.sketches[column].update(chunk[column].to_numpy(dtype=np.float64))
+        glucose = chunk['GLUCOSE'].to_numpy(dtype=np.float64)
+        self.glucose_sum += np.nansum(glucose)
+        self.glucose_count += int(np.count_nonzero(~np.isnan(glucose)))
+
+        keys = np.concatenate([self.sample_keys, self._rng.random(len(chunk))])
+        rows = np.concatenate([self.sample_rows, np.arange(self.rows, self.rows + len(chunk))])
+        values = np.concatenate([self.sample, chunk.to_numpy(dtype=np.float64)])
+        if len(keys) > self.donors:
+            keep = np.argpartition(keys, self.donors - 1)[:self.donors]
+            keys, rows, values = keys[keep], rows[keep], values[keep]
+        self.sample_keys, self.sample_rows, self.sample = keys, rows, values
+        self.rows += len(chunk)
+
+    def finish(self, chunks=None):
+        """Medians, GLUCOSE mean and outlier bounds; the 'mad' method reads the chunks again."""
+        p = self.pipeline
+        self.medians = pd.Series({column: self.sketches[column].quantile(0.5) for column in p.median_columns})
+        # KNN on the GLUCOSE column alone has no other column to measure a distance on: it imputes the mean
+        self.glucose_mean = self.glucose_sum / self.glucose_count if self.glucose_count else np.nan
+
+        # same bounds as framingham.outliers.outlier_bounds
+        columns = list(p.outlier_columns)
+        if p.outlier_method == 'iqr':
+            Q1, Q3 = np.array([self.sketches[c].quantile([p.lower_quantile, p.upper_quantile]) for c in columns]).T
+            lower, upper = Q1 - p.iqr_factor * (Q3 - Q1), Q3 + p.iqr_factor * (Q3 - Q1)
+        elif p.outlier_method == 'mad':
+            median = np.array([self.sketches[c].quantile(0.5) for c in columns])
+            deviations = [QuantileSketch() for _ in columns]
+            for chunk in chunks:
+                for sketch, column, center in zip(deviations, columns, median):
+                    sketch.update(np.abs(chunk[column].to_numpy(dtype=np.float64) - center))
+            mad = np.array([sketch.quantile(0.5) for sketch in deviations])
+            lower, upper = median - p.mad_threshold * mad / 0.6745, median + p.mad_threshold * mad / 0.6745
+        elif p.outlier_method == 'percentile':
+            lower, upper = np.array([self.sketches[c].quantile(list(p.clip_quantiles)) for c in columns]).T
+        else:
+            raise ValueError(f"Unknown outlier method {p.outlier_method!r}")
+        self.bounds = pd.DataFrame([lower, upper], index=['lower', 'upper'], columns=columns)
+
+        # the donors go through the same stages as the chunks, up to the KNN imputation
+        sample = pd.DataFrame(self.sample, columns=RQ_COLUMNS)
+        order = np.argsort(self.sample_rows)
+        self.sample_rows = self.sample_rows[order]
+        self.donor_values = self.mask_outliers(sample.iloc[order])[columns].to_numpy()
+        return self
+
+    def mask_outliers(self, chunk):
+        """Missing values imputed and outliers replaced by NaN (the df_imputed stage)."""
+        p = self.pipeline
+        columns = list(p.outlier_columns)
+        values = chunk[columns].to_numpy(dtype=np.float64)
+        outliers = (values < self.bounds.loc['lower'].to_numpy()) | (values > self.bounds.loc['upper'].to_numpy())
+        df = chunk.copy()
+        df['GLUCOSE'] = df['GLUCOSE'].fillna(self.glucose_mean)
+        df[list(p.median_columns)] = df[list(p.median_columns)].fillna(self.medians)
+        df['BPMEDS'] = df['BPMEDS'].fillna(-1)  # -1 as "Unknown"
+        df[columns] = df[columns].mask(outliers, np.nan)
+        return df
+
+    def clean(self, chunk, start):
+        """Cleaned rows of a chunk starting at row `start` of the file (the df_rqi stage)."""
+        columns = list(self.pipeline.outlier_columns)
+        df = self.mask_outliers(chunk)
+        values = df[columns].to_numpy(dtype=np.float64)
+        # donors: the rows of the chunk and the sampled rows of the rest of the file
+        first, last = np.searchsorted(self.sample_rows, [start, start + len(chunk)])
+        donors = np.concatenate([self.donor_values[:first], self.donor_values[last:]])
+        df[columns] = knn_impute(np.concatenate([donors, values]), self.pipeline.outlier_neighbors)[len(donors):]
+        return compact_dtypes(df)
+
+
+@instrumented('stream_clean')
+def stream_clean(source, output, pipeline=None, chunk_size=DEFAULT_CHUNK_SIZE, donors=DEFAULT_DONORS, fmt=None,
+                 progress=None):
+    """Clean the research question columns of a file too large for memory into a Parquet file.
+
+    `progress(fraction, stats)` is called after every chunk of every pass.
+    Returns the number of rows, the time taken and the statistics used.
+    """
+    pipeline = pipeline or CleaningPipeline()
+    fmt = fmt or file_format(source)
+    passes = 3 if pipeline.outlier_method == 'mad' else 2
+    total = count_rows(source, fmt) * passes if progress is not None else None
+    done, start = 0, time.perf_counter()
+
+    def chunks():
+        nonlocal done
+        for chunk in _read(source, chunk_size, fmt):
+            yield chunk
+            done += len(chunk)
+            if progress is not None:
+                progress(min(done / max(total, 1), 1.0), {'rows': done, 'seconds': time.perf_counter() - start})
+
+    stats = CohortStatistics(pipeline, donors)
+    for chunk in chunks():
+        stats.update(chunk)
+    if not stats.rows:
+        raise ValueError("the file has no rows")
+    stats.finish(chunks())
+
+    tmp = f'{output}.{os.getpid()}.tmp'
+    writer, rows = None, 0
+    try:
+        for chunk in chunks():
+            table = pa.Table.from_pandas(stats.clean(chunk, rows), preserve_index=False)
+            if writer is None:
+                writer = pq.ParquetWriter(tmp, table.schema)
+            # a column can be nullable in one chunk and not in another one
+            writer.write_table(table.cast(writer.schema))
+            rows += len(chunk)
+        writer.close()
+    except BaseException:
+        if writer is not None:
+            writer.close()
+        if os.path.exists(tmp):
+            os.remove(tmp)
+        raise
+    os.replace(tmp, output)
+    seconds = time.perf_counter() - start
+    return {'rows': rows, 'seconds': seconds, 'rows_per_second': rows / seconds, 'output': str(output),
+            'medians': stats.medians.to_dict(), 'glucose_mean': stats.glucose_mean, 'bounds': stats.bounds}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('source', help="CSV or Parquet file with the columns " + ', '.join(RQ_COLUMNS))
+    parser.add_argument('output', help="Parquet file written with the cleaned rows")
+    parser.add_argument('--chunk-size', type=int, default=DEFAULT_CHUNK_SIZE)
+    parser.add_argument('--donors', type=int, default=DEFAULT_DONORS, help="rows sampled as KNN donors")
+    parser.add_argument('--outlier-method', choices=OUTLIER_METHODS, default='iqr')
+    args = parser.parse_args(argv)
+
+    stats = stream_clean(args.source, args.output, CleaningPipeline(outlier_method=args.outlier_method),
+                         args.chunk_size, args.donors)
+    print(f"{stats['rows']} rows cleaned in {stats['seconds']:.1f} s ({stats['rows_per_second']:,.0f} rows/s)")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,113 @@
+"""Synthetic cohorts with the schema of the research question columns, of any size.
+
+The generator is fitted on the real data (`load_rq()`): the marginal
+distribution of each column is kept as a table of quantiles, the dependence
+between the columns as the correlation of their normal scores (a Gaussian
+copula), and the missing values as the frequencies of the patterns of
+missing columns. Rows are sampled independently, in chunks, so cohorts of
+tens of millions of rows can be written to Parquet with bounded memory.
+Participants (RANDID) are not modelled.
+
+    python -m framingham.synthetic 10000000 synthetic.parquet [--seed 0]
+"""
+import argparse
+import time
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+from scipy.special import ndtr, ndtri
+from scipy.stats import rankdata
+
+from framingham.data import RQ_COLUMNS, load_rq
+
+# resolution of the quantile tables of the marginal distributions
+QUANTILES = 4096
+DEFAULT_CHUNK_SIZE = 1_000_000
+
+
+class SyntheticCohort:
+    """Gaussian copula of the columns, with their quantile tables and missing value patterns."""
+
+    def __init__(self, columns, dtypes, quantiles, correlation, patterns, pattern_probabilities):
+        self.columns = list(columns)
+        self.dtypes = dtypes
+        self.quantiles = quantiles
+        self.correlation = correlation
+        self.patterns = patterns
+        self.pattern_probabilities = pattern_probabilities
+
+    @classmethod
+    def fit(cls, df, columns=RQ_COLUMNS):
+        df = df[columns]
+        grid = (np.arange(QUANTILES) + 0.5) / QUANTILES
+        # inverted_cdf keeps the exact values, so discrete columns stay discrete
+        quantiles = np.stack([np.quantile(df[c].dropna().to_numpy(dtype=np.float64), grid, method='inverted_cdf')
+                              for c in columns])
+
+        # correlation of the normal scores of the complete rows
+        complete = df.dropna().to_numpy(dtype=np.float64)
+        scores = ndtri((rankdata(complete, axis=0) - 0.5) / len(complete))
+        correlation = np.corrcoef(scores, rowvar=False)
+        # constant columns have no correlation, and the matrix must stay positive definite
+        correlation = np.nan_to_num(correlation)
+        np.fill_diagonal(correlation, 1.0)
+        eigenvalues, eigenvectors = np.linalg.eigh(correlation)
+        correlation = eigenvectors @ np.diag(np.clip(eigenvalues, 1e-6, None)) @ eigenvectors.T
+
+        # patterns of missing columns (one bit per column) and their frequencies
+        missing = df.isna().to_numpy()
+        codes = missing @ (1 << np.arange(len(columns), dtype=np.int64))
+        patterns, counts = np.unique(codes, return_counts=True)
+        return cls(columns, df.dtypes.to_dict(), quantiles, correlation, patterns, counts / counts.sum())
+
+    def sample(self, n, seed=0):
+        """DataFrame of n synthetic rows."""
+        rng = np.random.default_rng(seed)
+        z = rng.multivariate_normal(np.zeros(len(self.columns)), self.correlation, size=n, method='cholesky')
+        index = np.minimum((ndtr(z) * QUANTILES).astype(np.int64), QUANTILES - 1)
+        values = np.take_along_axis(self.quantiles.T, index, axis=0) if n else np.empty((0, len(self.columns)))
+        codes = rng.choice(self.patterns, size=n, p=self.pattern_probabilities)
+        missing = (codes[:, None] >> np.arange(len(self.columns))) & 1 == 1
+        values[missing] = np.nan
+        df = pd.DataFrame(values, columns=self.columns)
+        # same dtypes as the real data (integer columns have no missing values)
+        return df.astype({c: dtype for c, dtype in self.dtypes.items() if not df[c].isna().any()})
+
+    def chunks(self, n, chunk_size=DEFAULT_CHUNK_SIZE, seed=0):
+        """n synthetic rows as DataFrames of at most chunk_size rows (reproducible for a seed)."""
+        sizes = [min(chunk_size, n - start) for start in range(0, n, chunk_size)]
+        for size, child in zip(sizes, np.random.SeedSequence(seed).spawn(len(sizes))):
+            yield self.sample(size, child)
+
+    def write_parquet(self, path, n, chunk_size=DEFAULT_CHUNK_SIZE, seed=0):
+        """Write n synthetic rows to a Parquet file, one row group per chunk."""
+        writer = None
+        try:
+            for chunk in self.chunks(n, chunk_size, seed):
+                table = pa.Table.from_pandas(chunk, preserve_index=False)
+                if writer is None:
+                    writer = pq.ParquetWriter(path, table.schema)
+                # the columns have the same dtypes in every chunk
+                writer.write_table(table.cast(writer.schema))
+        finally:
+            if writer is not None:
+                writer.close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('rows', type=int)
+    parser.add_argument('output', help="Parquet file")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--chunk-size', type=int, default=DEFAULT_CHUNK_SIZE)
+    args = parser.parse_args(argv)
+
+    start = time.perf_counter()
+    SyntheticCohort.fit(load_rq()).write_parquet(args.output, args.rows, args.chunk_size, args.seed)
+    print(f"{args.rows} rows written to {args.output} in {time.perf_counter() - start:.1f} s")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,273 @@
+"""Training and evaluation of the CHD models of the Data Analysis page.
+
+Every model is cross-validated on the training split and evaluated on the
+test split. The folds and the final fits of all models are independent tasks
+that run in a process pool, one per CPU core. All metrics of a prediction are
+computed in one vectorized pass from the confusion counts and the score
+ranks.
+"""
+import os
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from multiprocessing import get_context
+
+import numpy as np
+import pandas as pd
+import streamlit as st
+from scipy.stats import rankdata
+from sklearn.ensemble import RandomForestClassifier
+from sklearn.linear_model import LogisticRegression
+from sklearn.model_selection import StratifiedKFold, train_test_split
+from sklearn.neighbors import KNeighborsClassifier
+from sklearn.neural_network import MLPClassifier
+from sklearn.pipeline import make_pipeline
+from sklearn.preprocessing import StandardScaler
+from sklearn.svm import SVC
+
+from framingham.data import BMI_BINS, BMI_LABELS
+from framingham.metrics import instrumented
+
+MODEL_OPTIONS = ['Logistic Regression', 'Random Forest', 'SVM', 'KNN', 'Neural Network']
+METRIC_OPTIONS = ['Accuracy', 'Precision', 'Recall', 'F1-Score', 'ROC-AUC']
+
+# Tuned models
+KNN_TUNED_OPTIONS = ['KNN (k=5)', 'KNN (k=7)', 'KNN (k=10)']
+NN_TUNED_OPTIONS = ['NN (1 hidden layer)', 'NN (2 hidden layers)', 'NN (Dropout)']
+# parameters found by the successive halving search of framingham.tuning
+SEARCH_OPTION = 'Search (successive halving)'
+TUNED_OPTIONS = {
+    'KNN': KNN_TUNED_OPTIONS + [SEARCH_OPTION],
+    'Neural Network': NN_TUNED_OPTIONS + [SEARCH_OPTION],
+}
+
+ESTIMATORS = {
+    'Logistic Regression': LogisticRegression,
+    'Random Forest': RandomForestClassifier,
+    'SVM': SVC,
+    'KNN': KNeighborsClassifier,
+    'Neural Network': MLPClassifier,
+}
+DEFAULT_PARAMS = {
+    'Logistic Regression': {'max_iter': 1000},
+    'Random Forest': {'n_estimators': 200, 'random_state': 42},
+    'SVM': {'C': 1.0, 'kernel': 'rbf'},
+    'KNN': {'n_neighbors': 5},
+    'Neural Network': {'hidden_layer_sizes': (32,), 'max_iter': 500, 'early_stopping': True, 'random_state': 42},
+}
+# scikit-learn's MLP has no dropout layer, the "Dropout" variant uses a strong L2 penalty instead
+TUNED_PARAMS = {
+    'KNN (k=5)': {'n_neighbors': 5},
+    'KNN (k=7)': {'n_neighbors': 7},
+    'KNN (k=10)': {'n_neighbors': 10},
+    'NN (1 hidden layer)': {'hidden_layer_sizes': (32,)},
+    'NN (2 hidden layers)': {'hidden_layer_sizes': (32, 16)},
+    'NN (Dropout)': {'hidden_layer_sizes': (32,), 'alpha': 1e-2},
+}
+
+CV_FOLDS = 5
+TEST_SIZE = 0.3
+RANDOM_STATE = 42
+
+
+def engineer_features(df_rqi):
+    """Features (X) and target (y) of the cleaned data, as on the Data Analysis page."""
+    # shallow copy: with copy-on-write only the new feature columns are allocated
+    df = df_rqi.copy(deep=False)
+    #Binary encoding for SEX (1 = Male, 2 = Female -> 0 = Female, 1 = Male)
+    df['SEX_BINARY'] = (df['SEX'] == 1).astype(np.int8)
+    # BMI Categorization
+    category = pd.cut(
+        df['BMI'],
+        bins=BMI_BINS,
+        labels=BMI_LABELS
+    )
+    # One-Hot Encoding for BMI_Category (Underweight is the reference, as with get_dummies(drop_first=True))
+    for label in BMI_LABELS[1:]:
+        df[f'BMI_Category_{label}'] = (category == label).astype(np.int8)
+    X = df.drop(columns=['ANYCHD'])  # Exclude the target variable
+    y = df['ANYCHD']  # Target variable
+    return X, y
+
+
+def split_features(df_rqi):
+    """Train-test split of the engineered features: X_train, X_test, y_train, y_test."""
+    X, y = engineer_features(df_rqi)
+    return train_test_split(X, y, test_size=TEST_SIZE, random_state=RANDOM_STATE)
+
+
+@st.cache_resource(show_spinner=False, max_entries=4)
+def shared_split(_df_rqi, key):
+    """split_features of the cleaned frame of data version `key`, read-only and shared by the pages and sessions."""
+    return split_features(_df_rqi)
+
+
+def model_spec(name, tuned=None):
+    """Hashable description of a model: (name, sorted parameter items).
+
+    `tuned` is a label of TUNED_PARAMS or a dict of parameters.
+    """
+    params = dict(DEFAULT_PARAMS[name])
+    if isinstance(tuned, dict):
+        params.update(tuned)
+    elif tuned is not None:
+        params.update(TUNED_PARAMS[tuned])
+    return name, tuple(sorted(params.items()))
+
+
+def make_model(spec):
+    name, params = spec
+    estimator = ESTIMATORS[name](**dict(params))
+    if name == 'Random Forest':
+        return estimator
+    # the distance and gradient based models need standardized features
+    return make_pipeline(StandardScaler(), estimator)
+
+
+def model_scores(model, X):
+    """Continuous scores used for the ROC-AUC (probability of CHD or decision function)."""
+    if hasattr(model, 'predict_proba'):
+        return model.predict_proba(X)[:, 1]
+    return model.decision_function(X)
+
+
+def compute_metrics(y_true, y_pred, y_score):
+    """All of METRIC_OPTIONS (plus the confusion counts) in one pass."""
+    y_true = np.asarray(y_true).astype(np.int64)
+    y_pred = np.asarray(y_pred).astype(np.int64)
+    tn, fp, fn, tp = np.bincount(2 * y_true + y_pred, minlength=4)[:4]
+    n_pos, n_neg = tp + fn, tn + fp
+    precision = tp / (tp + fp) if tp + fp else 0.0
+    recall = tp / n_pos if n_pos else 0.0
+    f1 = 2 * precision * recall / (precision + recall) if precision + recall else 0.0
+    # ROC-AUC from the ranks of the scores (Mann-Whitney U)
+    if n_pos and n_neg:
+        ranks = rankdata(y_score)
+        auc = (ranks[y_true == 1].sum() - n_pos * (n_pos + 1) / 2) / (n_pos * n_neg)
+    else:
+        auc = float('nan')
+    return {
+        'Accuracy': float((tp + tn) / len(y_true)),
+        'Precision': float(precision),
+        'Recall': float(recall),
+        'F1-Score': float(f1),
+        'ROC-AUC': float(auc),
+        'confusion': [[int(tn), int(fp)], [int(fn), int(tp)]],
+    }
+
+
+def fit_and_evaluate(spec, X_fit, y_fit, X_eval, y_eval, return_model=False):
+    """Fit one model and compute its metrics on the evaluation data (one pool task)."""
+    start = time.perf_counter()
+    model = make_model(spec)
+    model.fit(X_fit, y_fit)
+    metrics = compute_metrics(y_eval, model.predict(X_eval), model_scores(model, X_eval))
+    metrics['fit_seconds'] = time.perf_counter() - start
+    if return_model:
+        return metrics, model
+    return metrics
+
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def get_executor():
+    """Process pool shared by the training tasks of the server process."""
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            # spawn: forking a multi-threaded server process is not safe
+            _executor = ProcessPoolExecutor(max_workers=os.cpu_count(), mp_context=get_context('spawn'))
+        return _executor
+
+
+def summarize(cv_metrics, test_metrics):
+    """Result of one model: test metrics, cross-validation mean and standard deviation."""
+    return {
+        'test': test_metrics,
+        'cv_mean': {metric: float(np.mean([m[metric] for m in cv_metrics])) for metric in METRIC_OPTIONS},
+        'cv_std': {metric: float(np.std([m[metric] for m in cv_metrics])) for metric in METRIC_OPTIONS},
+        'fit_seconds': sum(m['fit_seconds'] for m in cv_metrics) + test_metrics['fit_seconds'],
+    }
+
+
+def cv_splits(X_train, y_train, folds=CV_FOLDS):
+    """(fit rows, evaluation rows) of the cross-validation folds, the same for every model."""
+    cv = StratifiedKFold(n_splits=folds, shuffle=True, random_state=RANDOM_STATE)
+    return list(cv.split(X_train, y_train))
+
+
+def submit_model(executor, spec, X_train, X_test, y_train, y_test, folds=CV_FOLDS):
+    """Submit the cross-validation folds and the final fit of one model; returns (cv futures, test future)."""
+    X_train, X_test = np.asarray(X_train, dtype=np.float64), np.asarray(X_test, dtype=np.float64)
+    y_train, y_test = np.asarray(y_train), np.asarray(y_test)
+    cv_futures = [
+        executor.submit(fit_and_evaluate, spec, X_train[fit_idx], y_train[fit_idx], X_train[eval_idx], y_train[eval_idx])
+        for fit_idx, eval_idx in cv_splits(X_train, y_train, folds)
+    ]
+    test_future = executor.submit(fit_and_evaluate, spec, X_train, y_train, X_test, y_test, return_model=True)
+    return cv_futures, test_future
+
+
+def registry_key(registry, data_key, features, spec, folds=CV_FOLDS):
+    """Registry key of a model trained by train_models."""
+    return registry.key(data_key, features, spec, folds=folds, test_size=TEST_SIZE, random_state=RANDOM_STATE)
+
+
+@instrumented('train_models')
+def train_models(specs, X_train, X_test, y_train, y_test, folds=CV_FOLDS, registry=None, data_key=None,
+                 progress=None):
+    """Cross-validate and test every model spec in parallel; returns {spec: result}.
+
+    With a registry, models already trained on the same data version, features
+    and parameters are looked up instead of trained, and new ones are stored.
+    `progress(fraction, results)` is called whenever a task finishes, with the
+    results of the models that are complete so far.
+    """
+    features = list(X_train.columns)
+    results, pending = {}, {}
+    for spec in specs:
+        if registry is not None:
+            result = registry.get_result(registry_key(registry, data_key, features, spec, folds))
+            if result is not None:
+                results[spec] = result
+                continue
+        pending[spec] = None
+    total = len(specs) * (folds + 1)
+    done = len(results) * (folds + 1)
+    if progress is not None:
+        progress(done / total, dict(results))
+    if pending:
+        executor = get_executor()
+        for spec in pending:
+            pending[spec] = submit_model(executor, spec, X_train, X_test, y_train, y_test, folds)
+    tasks = {future: spec for spec, (cv_futures, test_future) in pending.items()
+             for future in [*cv_futures, test_future]}
+    remaining = {spec: folds + 1 for spec in pending}
+    for future in as_completed(tasks):
+        spec = tasks[future]
+        future.result()  # raise the errors of failed tasks right away
+        remaining[spec] -= 1
+        done += 1
+        if not remaining[spec]:
+            cv_futures, test_future = pending[spec]
+            test_metrics, model = test_future.result()
+            results[spec] = summarize([f.result() for f in cv_futures], test_metrics)
+            if registry is not None:
+                registry.put(registry_key(registry, data_key, features, spec, folds), model, results[spec],
+                             model_name=spec[0], params=repr(spec[1]), features=features, data_key=data_key)
+        if progress is not None:
+            progress(done / total, dict(results))
+    return {spec: results[spec] for spec in specs}
+
+
+def fitted_model(spec, X_train, X_test, y_train, y_test, registry, data_key, progress=None):
+    """Model fitted on the whole training split, from the registry or trained (and registered) now."""
+    key = registry_key(registry, data_key, list(X_train.columns), spec)
+    model = registry.load_model(key)
+    if model is None:
+        train_models([spec], X_train, X_test, y_train, y_test, registry=registry, data_key=data_key,
+                     progress=progress)
+        model = registry.load_model(key)
+    return model
@@ -0,0 +1,125 @@
+"""Hyperparameter search for the tuned KNN and Neural Network models.
+
+The search is a successive halving within a CPU-time budget: many random
+candidates are cross-validated on a small share of the training rows, the
+best third is kept and evaluated again on three times more rows, and so on
+until one candidate is left, the whole training set is used or the budget is
+spent. The candidates of a round are evaluated in parallel in the training
+process pool, on the same cross-validation folds as `train_models`, and the
+tasks still pending when the budget runs out are cancelled.
+"""
+import os
+import time
+from concurrent.futures import as_completed
+
+import numpy as np
+
+from framingham.metrics import instrumented
+from framingham.training import RANDOM_STATE, cv_splits, fit_and_evaluate, get_executor, model_spec
+
+TUNING_METRIC = 'ROC-AUC'
+# CPU time (in seconds of fitting, summed over the workers) one search may use
+TUNING_BUDGET_SECONDS = float(os.environ.get('FRAMINGHAM_TUNING_BUDGET_SECONDS', 120))
+N_CANDIDATES = 27
+HALVING_FACTOR = 3
+MIN_RESOURCE = 200
+
+SEARCH_SPACES = {
+    'KNN': {
+        'n_neighbors': list(range(1, 51)),
+        'weights': ['uniform', 'distance'],
+        'p': [1, 2],
+    },
+    'Neural Network': {
+        'hidden_layer_sizes': [(16,), (32,), (64,), (32, 16), (64, 32)],
+        'alpha': [float(alpha) for alpha in np.logspace(-5, -1, 9)],
+        'learning_rate_init': [1e-3, 3e-3, 1e-2],
+    },
+}
+
+
+def sample_candidates(space, n, seed=RANDOM_STATE):
+    """Up to n distinct random parameter dicts of a search space."""
+    rng = np.random.default_rng(seed)
+    candidates = {}
+    # the space may have fewer than n points, stop after a bounded number of draws
+    for _ in range(20 * n):
+        params = {name: values[rng.integers(len(values))] for name, values in space.items()}
+        candidates[tuple(sorted(params.items()))] = params
+        if len(candidates) == n:
+            break
+    return list(candidates.values())
+
+
+@instrumented('tune_model')
+def tune_model(name, X_train, y_train, budget=TUNING_BUDGET_SECONDS, metric=TUNING_METRIC,
+               n_candidates=N_CANDIDATES, factor=HALVING_FACTOR, min_resource=MIN_RESOURCE, progress=None):
+    """Successive halving search of the parameters of a tuned model.
+
+    Returns the best parameters, their cross-validated score, the CPU time
+    used and the history of every evaluation (round, rows, parameters, score).
+    """
+    X_train = np.asarray(X_train, dtype=np.float64)
+    y_train = np.asarray(y_train)
+    splits = cv_splits(X_train, y_train)
+    # one fixed order of the fitting rows of each fold: a round uses a prefix of it,
+    # so later rounds train on a superset of the rows of the earlier ones
+    rng = np.random.default_rng(RANDOM_STATE)
+    orders = [(rng.permutation(fit_idx), eval_idx) for fit_idx, eval_idx in splits]
+    max_resource = min(len(fit_idx) for fit_idx, _ in orders)
+
+    candidates = sample_candidates(SEARCH_SPACES[name], n_candidates)
+    # start small enough for the last round (one candidate left) to use all the rows
+    n_rounds = 0
+    while factor ** n_rounds < len(candidates):
+        n_rounds += 1
+    resource = min(max(max_resource // factor ** n_rounds, min_resource), max_resource)
+    executor = get_executor()
+    history, spent, best = [], 0.0, None
+    start = time.perf_counter()
+    for round_ in range(len(candidates)):
+        tasks = {}
+        for i, params in enumerate(candidates):
+            spec = model_spec(name, params)
+            for fit_order, eval_idx in orders:
+                fit_idx = fit_order[:resource]
+                future = executor.submit(fit_and_evaluate, spec, X_train[fit_idx], y_train[fit_idx],
+                                         X_train[eval_idx], y_train[eval_idx])
+                tasks[future] = i
+        scores = [[] for _ in candidates]
+        for future in as_completed(tasks):
+            if future.cancelled():
+                continue
+            metrics = future.result()
+            spent += metrics['fit_seconds']
+            scores[tasks[future]].append(metrics[metric])
+            if spent > budget:
+                # out of budget: drop the evaluations that did not start yet
+                for pending in tasks:
+                    pending.cancel()
+            if progress is not None:
+                progress(min(spent / budget, 0.99), {'best': best, 'history': list(history)})
+        # only the candidates evaluated on every fold are ranked
+        complete = [i for i, s in enumerate(scores) if len(s) == len(orders)]
+        if not complete:
+            break
+        means = {i: float(np.nanmean(scores[i])) for i in complete}
+        for i in complete:
+            history.append({'round': round_, 'rows': resource, 'params': candidates[i], 'score': means[i]})
+        ranked = sorted(complete, key=lambda i: means[i], reverse=True)
+        best = {'params': candidates[ranked[0]], 'score': means[ranked[0]], 'rows': resource}
+        if spent > budget or len(ranked) == 1 or resource >= max_resource:
+            break
+        candidates = [candidates[i] for i in ranked[:max(len(ranked) // factor, 1)]]
+        resource = min(resource * factor, max_resource)
+    if best is None:
+        raise RuntimeError(f"the tuning budget of {budget:.0f} s is too small to evaluate one {name} candidate")
+    return {
+        'params': best['params'],
+        'score': best['score'],
+        'metric': metric,
+        'rows': best['rows'],
+        'cpu_seconds': spent,
+        'wall_seconds': time.perf_counter() - start,
+        'history': history,
+    }
@@ -0,0 +1,12 @@
+"""One module per page of the app, imported when the page is first opened."""
+
+# menu title -> module with a render() function
+PAGES = {
+    "Introduction": "framingham.views.introduction",
+    "Data preparation": "framingham.views.preparation",
+    "Data exploration and cleaning": "framingham.views.exploration",
+    "Describe and Visualize the data": "framingham.views.describe",
+    "Data Analysis": "framingham.views.analysis",
+    "Batch scoring": "framingham.views.scoring",
+    "Conclusion": "framingham.views.conclusion",
+}
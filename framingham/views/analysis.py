@@ -0,0 +1,121 @@
+"""Data analysis page: feature engineering, model training and evaluation."""
+import pandas as pd
+import streamlit as st
+
+from framingham.cleaning import clean_dataset
+from framingham.jobs import job_queue, show_job
+from framingham.registry import default_registry
+from framingham.training import (METRIC_OPTIONS, MODEL_OPTIONS, SEARCH_OPTION, TUNED_OPTIONS, model_spec,
+                                 shared_split, train_models)
+from framingham.tuning import TUNING_BUDGET_SECONDS, tune_model
+
+
+def _run_job(job_key, clicked, name, fn, *args, **kwargs):
+    """Result of a background job, or None while it runs (its progress is shown) or after it failed.
+
+    The same job is shared by every session asking for the same key. Each
+    kind of job ('tune', 'train') keeps its own ID in the session, so a
+    finished search does not hide a failed training, which is then only
+    submitted again on a click.
+    """
+    session_key = f'{job_key[0]}_job'
+    previous = job_queue().get(st.session_state.get(session_key))
+    if previous is not None and previous.key == job_key and previous.status == 'failed' and not clicked:
+        st.error(f"{previous.name} failed ({previous.error}), press the button to try again.")
+        return None
+    job = job_queue().submit(name, fn, *args, key=job_key, **kwargs)
+    st.session_state[session_key] = job.id
+    # the result as shown: a job finishing after its progress was drawn is picked up by the next run
+    results = []
+    show_job(session_key, lambda job: results.append(job.result), _job_details)
+    return results[0] if results else None
+
+
+def _test_table(results):
+    return pd.DataFrame({spec[0]: result['test'] for spec, result in results.items()}).T[METRIC_OPTIONS]
+
+
+def _job_details(job):
+    """Partial results of a running job."""
+    if job.key[0] == 'train' and job.partial:
+        st.write("Models finished so far (test set metrics)")
+        st.dataframe(_test_table(job.partial).astype(float).style.format("{:.3f}"))
+    elif job.key[0] == 'tune' and job.partial.get('best'):
+        best = job.partial['best']
+        st.write(f"Best candidate so far: {best['params']} ({best['score']:.3f} on {best['rows']} rows)")
+    st.caption("The training runs in the background: you can change page and come back later.")
+
+
+def render():
+    st.title("Data Analysis")
+    # Imputation of missing values and outliers (shared cleaning pipeline, cached per dataset version)
+    cleaned = clean_dataset()
+
+    st.write("To see our beautiful models, please go to our colab: https://colab.research.google.com/drive/11cERXt_L250MdmUoxWQyCnJChGUprV4Z?usp=sharing")
+    # Feature Engineering (SEX_BINARY, one-hot BMI_Category) and Train-Test Split
+    split = shared_split(cleaned.df_rqi, cleaned.key)
+    X_train, X_test, y_train, y_test = split
+    st.write(f"Training Set: {X_train.shape}, Test Set: {X_test.shape}")
+
+    # Widgets
+    col1, col2, col3 = st.columns(3)
+    with col1:
+        selected_model = st.selectbox("Model:", MODEL_OPTIONS)
+    with col2:
+        selected_metric = st.selectbox("Metric:", METRIC_OPTIONS)
+    with col3:
+        # Update the tuned dropdown based on the selected model
+        tuned_options = TUNED_OPTIONS.get(selected_model, [])
+        selected_tuned = st.selectbox("Tuned:", tuned_options, disabled=not tuned_options)
+
+    clicked = st.button("Train and evaluate the models")
+    if clicked:
+        st.session_state['analysis_trained'] = True
+    if not st.session_state.get('analysis_trained'):
+        st.info("Press the button to train and cross-validate all models on the training set.")
+        return
+
+    tuned = selected_tuned if tuned_options else None
+    if tuned == SEARCH_OPTION:
+        # successive halving search of the parameters within a CPU-time budget
+        search = _run_job(('tune', cleaned.key, selected_model, TUNING_BUDGET_SECONDS), clicked,
+                          f"Searching the {selected_model} parameters", tune_model, selected_model, X_train, y_train)
+        if search is None:
+            return
+        tuned = search['params']
+        st.write(f"Search result: {tuned}, cross-validated {search['metric']} {search['score']:.3f} "
+                 f"({len(search['history'])} evaluations, {search['cpu_seconds']:.0f} s of CPU time)")
+
+    # every model is trained; the tuned variant applies to the selected model
+    specs = tuple(model_spec(name, tuned if name == selected_model else None) for name in MODEL_OPTIONS)
+    # models already fitted on this data (by any session or an earlier server run) come from the registry
+    results = _run_job(('train', cleaned.key, specs), clicked, "Training and cross-validating the models",
+                       train_models, specs, *split, registry=default_registry(), data_key=cleaned.key)
+    if results is None:
+        return
+
+    # Results of all models for all metrics
+    st.header("Model comparison")
+    test_table = _test_table(results)
+    cv_table = pd.DataFrame({spec[0]: result['cv_mean'] for spec, result in results.items()}).T[METRIC_OPTIONS]
+    cv_std = pd.Series({spec[0]: result['cv_std'][selected_metric] for spec, result in results.items()})
+    st.write("Test set metrics")
+    st.dataframe(test_table.astype(float).style.format("{:.3f}").highlight_max(axis=0, color='#ffd4d1'))
+    st.write(f"{selected_metric}: cross-validation mean ± standard deviation vs. test set")
+    comparison = pd.DataFrame({
+        'Cross-validation': cv_table[selected_metric].astype(float),
+        'CV std': cv_std,
+        'Test': test_table[selected_metric].astype(float),
+    })
+    st.dataframe(comparison.style.format("{:.3f}"))
+    st.bar_chart(comparison[['Cross-validation', 'Test']])
+
+    # Details of the selected model
+    result = results[next(spec for spec in specs if spec[0] == selected_model)]
+    st.header(f"Selected Model: {selected_model}" + (f" — {selected_tuned}" if tuned_options else ""))
+    st.metric(selected_metric, f"{result['test'][selected_metric]:.3f}")
+    (tn, fp), (fn, tp) = result['test']['confusion']
+    st.write("Confusion matrix (test set)")
+    st.dataframe(pd.DataFrame([[tn, fp], [fn, tp]], index=['Actual: no CHD', 'Actual: CHD'],
+                              columns=['Predicted: no CHD', 'Predicted: CHD']))
+    st.caption(f"Total fitting time (all folds): {result['fit_seconds']:.1f} s")
@@ -0,0 +1,13 @@
+"""Conclusion page."""
+import streamlit as st
+
+
+def render():
+    st.title("Conclusion")
+    st.write("The research sought to determine whether Body Mass Index (BMI) influences the prevalence of coronary heart disease (CHD), using data from the Framingham Heart Study.")
+    st.write("After cleaning and preprocessing the dataset to handle missing values and categorical variables, the features were separated from the target variable, with BMI identified as a key predictor of CHD prevalence.")
+    st.write("Several machine learning models were implemented, including Support Vector Machine (SVM), Decision Tree, Random Forest, K-Nearest Neighbors (KNN), and a simple Neural Network. Each model was trained and tested using an 80-20 stratified data split to ensure balanced representation.")
+    st.write("To evaluate the models, metrics such as accuracy, precision, recall, F1-score, and confusion matrices were computed. The results showed that Random Forest and the Neural Network models outperformed others in terms of overall accuracy and F1-score, suggesting they captured the relationship between BMI and CHD prevalence most effectively.")
+    st.write("Random Forest revealed BMI as a strong predictor, supported by feature importance analysis, while the Neural Network demonstrated the ability to detect complex patterns in the data. Both models highlighted the significant role of higher BMI categories, such as Obese, in predicting CHD prevalence.")
+    st.write("The analysis confirmed a measurable association between BMI and CHD prevalence, aligning with medical research that identifies obesity as a significant risk factor for cardiovascular diseases. The findings underscore the importance of BMI management in reducing cardiovascular disease risks. Despite challenges such as potential class imbalances in CHD-positive cases, mitigated through stratified splits, the study produced reliable insights. Future work could extend these findings by using larger datasets or incorporating longitudinal data to explore temporal trends.")
+    st.write("In conclusion, this research validated the hypothesis that BMI is correlated with the prevalence of CHD, with advanced models like Random Forest and Neural Network providing strong predictive evidence. These results highlight the critical role of BMI in cardiovascular health, offering practical implications for preventive strategies.")
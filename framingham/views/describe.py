@@ -0,0 +1,152 @@
+"""Describe and visualize page: descriptive statistics, proportions, correlations and the BMI calculator."""
+import streamlit as st
+
+from framingham import charts
+from framingham.cleaning import clean_dataset
+from framingham.correlation import correlation_matrix
+from framingham.cube import aggregate_cube
+from framingham.figures import show_figure
+from framingham.panel import panel_store
+from framingham.jobs import job_queue, show_job
+from framingham.risk import load_scorer, risk_scorer
+
+
+@st.cache_resource(show_spinner=False)
+def _risk_scorer(_cleaned, key):
+    # a few NumPy arrays, loaded (or exported from the registry) once per version of the cleaned data
+    return load_scorer(_cleaned)
+
+
+def _trained_scorer(cleaned):
+    """Risk scorer of the cleaned data, or None while its model is trained in the background."""
+    job_key = ('risk_scorer', cleaned.key)
+    job = job_queue().get(st.session_state.get('risk_job'))
+    if job is not None and job.key == job_key and job.status == 'done':
+        return job.result
+    if job is None or job.key != job_key:
+        scorer = _risk_scorer(cleaned, cleaned.key)
+        if scorer is not None:
+            return scorer
+        # no model yet: not kept in the cache, and trained by the job queue instead of in this run
+        _risk_scorer.clear(cleaned, cleaned.key)
+        job = job_queue().submit("Training the CHD risk model", risk_scorer, cleaned, key=job_key)
+        st.session_state['risk_job'] = job.id
+    elif job.status == 'failed' and st.button("Train the risk model again"):
+        st.session_state['risk_job'] = job_queue().submit("Training the CHD risk model", risk_scorer, cleaned,
+                                                          key=job_key).id
+    if show_job('risk_job', key=job_key).status != 'failed':
+        st.info("The CHD risk estimate appears here once its model is trained.")
+    return None
+
+
+def render():
+    st.title("Describe and Visualize the data")
+    # Imputation of missing values and outliers (shared cleaning pipeline, cached per dataset version)
+    cleaned = clean_dataset()
+    df_rqi = cleaned.df_rqi
+    # counts and sums per combination of the categorical variables, for the proportion and trend plots
+    cube = aggregate_cube(df_rqi, cleaned.key)
+
+    #table with descriptive statistics 
+    df_describe = df_rqi.describe()
+    # Function to style entire rows based on condition
+    def style_rows(row):
+        return ["background-color: #f7aea8;" if row.name in ['count', 'std', '25%', '75%'] else "background-color: #ffd4d1;" for _ in row]
+    # Apply style to specific rows by their index
+    styled_df = df_describe.style.apply(style_rows, axis=1)
+    st.header("Descriptive Statistics of final data")
+    st.dataframe(styled_df)
+
+
+    st.header("Proportion of each category")
+    # plot bar charts (rendered once per version of the cleaned data)
+    def plot_proportions(column, title, xlabel, ylabel):
+        show_figure((cleaned.key, 'proportions', column, title, xlabel, ylabel),
+                    charts.proportions_bar, cube.proportions(column), title, xlabel, ylabel)
+    st.markdown("These graphs show the proportion of each category variables with perpcentages.")
+
+    # Plot each proportion/percentage
+    col1,col2,col3= st.columns(3)
+    with col1:
+        plot_proportions('SEX', "Sex Proportions", "Sex (1=male, 2=female)", "Percentage")
+        plot_proportions('CURSMOKE', "Current Smoking Proportions", "Current Smoking (0=no, 1=yes)", "Percentage")
+    with col2:
+        plot_proportions('DIABETES', "Diabetes Proportions", "Diabetes (0=no, 1=yes)", "Percentage")
+        plot_proportions('BPMEDS', "Blood Pressure Medication Proportions", "BPMEDS (0=no, 1=yes, -1=unknown)", "Percentage")
+    with col3:
+        plot_proportions('ANYCHD', "Any Coronary Heart Disease Proportions", "Any CHD (0=no, 1=yes)", "Percentage")
+        plot_proportions('PERIOD', "Period Proportions", "Period", "Percentage")
+
+    # Correlation heatmap
+    st.write("### Correlation Heatmap")
+    show_figure((cleaned.key, 'correlation_heatmap', 'df_rqi'), charts.correlation_heatmap,
+                correlation_matrix('df_rqi', df_rqi, cleaned.key))
+
+    # Visualize change in data over examination periods
+    trend_columns = ['AGE', 'TOTCHOL', 'SYSBP', 'DIABP', 'HEARTRTE', 'GLUCOSE', 'BMI']
+    show_figure((cleaned.key, 'period_trend', tuple(trend_columns)), charts.period_trend,
+                cube.means(trend_columns, 'PERIOD'))
+
+    # Longitudinal view: every participant has up to one examination per period
+    st.header("Participant history")
+    panel = panel_store(df_rqi, cleaned.key)
+    st.write(f"{len(panel):,} participants, {panel.examinations().mean():.2f} examinations per participant on average.")
+    st.write("Average change since the previous examination")
+    st.dataframe(panel.mean_deltas(trend_columns).style.format("{:+.2f}"))
+    participant = st.number_input("Participant ID (RANDID):", min_value=0, value=int(panel.participants[0]), step=1)
+    if participant in panel:
+        history = panel.history(participant)
+        st.dataframe(history)
+        st.line_chart(history[st.multiselect("Measurements:", panel.columns, default=['BMI', 'SYSBP', 'TOTCHOL'])])
+    else:
+        st.warning(f"There is no participant {participant} in the cleaned data.")
+
+    # Streamlit Title
+    st.header("BMI Calculator")
+    st.write("*people < 18 years BMI calculation can be wrong")
+    # Input fields for weight and height
+    weight = st.number_input("Insert your weight in kilograms (kg):", min_value=0.0, format="%.2f")
+    height = st.number_input("Insert your height in meters (m):", min_value=0.0, format="%.2f")
+    # Calculate BMI if both inputs are valid
+    if weight > 0 and height > 0:
+        bmi = weight / (height * height)
+        # Use columns for side-by-side display
+        col1, col2 = st.columns(2)
+        with col1:
+            st.subheader("Your BMI:")
+            st.write(round(bmi, 2))
+        with col2:
+            st.subheader("")
+            if bmi < 18.5:
+                st.write("Underweight")
+            elif 18.5 <= bmi < 24.9:
+                st.write("Normal weight")
+            elif 25 <= bmi < 29.9:
+                st.write("Overweight")
+            elif 30 <= bmi < 34.9:
+                st.write("Moderately Obese, consider losing weight")
+            elif 35 <= bmi <39.9:
+                st.write("Severely Obese, consider losing weight")
+            else:
+                st.write("Morbidly Obese, consider losing weight")
+
+        # CHD risk estimate of the logistic regression, values not given are the medians of the study
+        scorer = _trained_scorer(cleaned)
+        if scorer is not None:
+            with st.expander("More about you (for the CHD risk estimate)"):
+                col1, col2, col3 = st.columns(3)
+                with col1:
+                    age = st.number_input("Age (years):", min_value=0, max_value=120, value=int(scorer.default('AGE')))
+                    sex = st.radio("Sex:", [1, 2], format_func=lambda v: "Male" if v == 1 else "Female", horizontal=True)
+                with col2:
+                    sysbp = st.number_input("Systolic blood pressure (mmHg):", min_value=50.0, max_value=300.0, value=float(scorer.default('SYSBP')))
+                    totchol = st.number_input("Total cholesterol (mg/dL):", min_value=50.0, max_value=700.0, value=float(scorer.default('TOTCHOL')))
+                with col3:
+                    cursmoke = st.checkbox("Current smoker")
+                    diabetes = st.checkbox("Diabetes")
+            risk = scorer.risk(BMI=bmi, AGE=age, SEX=sex, SYSBP=sysbp, TOTCHOL=totchol,
+                               CURSMOKE=int(cursmoke), DIABETES=int(diabetes))
+            st.metric("Estimated CHD risk", f"{risk:.0%}")
+            st.caption("Logistic regression trained on the Framingham cohort; an illustration, not a medical assessment.")
+    else:
+        st.write("Please enter valid values for weight and height.")
@@ -0,0 +1,265 @@
+"""Data exploration and cleaning page: missing data, erroneous data and outliers."""
+import matplotlib.pyplot as plt
+import pandas as pd
+import seaborn as sns
+import streamlit as st
+
+from framingham import charts
+from framingham.cleaning import CleaningPipeline, clean_dataset
+from framingham.data import dataset_version, load_rq
+from framingham.figures import show_figure
+from framingham.jobs import job_queue, show_job
+from framingham.mice import DEFAULT_IMPUTATIONS, multiple_imputation
+from framingham.missingness import MIN_MISSING, missingness_profile
+from framingham.outliers import OUTLIER_METHODS
+
+
+def _show_imputations(mi, df_rq):
+    """Means pooled over the completed datasets, next to the standard errors of the single imputation."""
+    pooled = mi.pooled_means()
+    # standard error of the mean after the single imputation above, for comparison
+    single = df_rq[list(pooled['Column'])]
+    pooled.insert(4, 'SE (single imputation)', (single.std() / len(single) ** 0.5).to_numpy())
+    st.dataframe(pooled, hide_index=True, column_config={
+        column: st.column_config.NumberColumn(format='%.3f')
+        for column in ['Mean', 'SE', 'SE (single imputation)', 'Between-imputation SD', 'Missing information']})
+    st.caption(f"{mi.m} completed datasets stored as their imputed cells only: {mi.nbytes / 1024:.0f} KB.")
+
+
+def render():
+    st.title("Data exploration and cleaning")
+    with st.expander("##### Missing Data"):
+        st.header("Missing Data")
+        # Shared loader: memoized across sessions, reads only the relevant columns for the research question
+        df_rq = load_rq()
+    
+        # Missingness profile: null mask computed once per dataset version, counts derived from its patterns
+        profile = missingness_profile(df_rq, dataset_version())
+
+        missing_values_data = {
+    "Column": ["Age", "Systolic Blood Pressure", "Diastolic Blood Pressure", "Cholesterol", "Smoking", "BMI" ],
+    "Missing type": ["MCAR", "MAR or MCAR", "MAR or MCAR", "MAR or MNAR", "MNAR", "MAR"],
+    "Reasoning": ["Generally easy to report, likely missing due to random error.", "Could be MAR if older or sicker participants avoid measurements, or MCAR if random errors occurred.", "Similar reasoning to sysBP.", "Could be MNAR if higher cholesterol individuals avoid reporting, or MAR if related to age/BMI.", "People may underreport smoking status due to social stigma.", "Missingness likely depends on variables like age or cholesterol, but not on BMI itself."],
+    }
+        # Create a DataFrame
+        mdr = pd.DataFrame(missing_values_data)
+        # Display the table
+        st.write("### Interactive Table")
+        st.dataframe(mdr)
+
+        # Rows with and without a missing value compared on the other columns (a description, not a test)
+        st.write("Differences between the rows with and without a missing value:")
+        st.dataframe(profile.largest_differences(), hide_index=True, column_config={
+            'Missing (%)': st.column_config.NumberColumn(format='%.1f'),
+            '|SMD|': st.column_config.NumberColumn(format='%.2f')})
+        st.caption(f"|SMD|: largest standardized mean difference of another column between the rows where the value "
+                   f"is missing and the other rows, shown from {MIN_MISSING} missing rows. A large difference suggests the "
+                   f"missing rows are not a random sample on that column (or is chance); it does not tell the missing "
+                   f"type.")
+
+        #Identify missing values in dataset
+        missing_data = profile.missing_counts()
+        missing_values = missing_data.sum()
+        # Display warning message if there are missing values
+        if missing_values > 0:
+            st.markdown(
+            f"<span style='color:red; font-weight:bold;'>Warning: The dataset has {missing_values} missing values.</span>", 
+            unsafe_allow_html=True
+        )
+        else:
+            st.success("The dataset has no missing values.")
+    
+        #missing data over period
+        st.header("Further Missing Data Analysis")
+        "Missing Data Count for each column:"
+        st.write(missing_data[missing_data > 0])
+
+        # Columns missing together
+        st.write("Missing Data Patterns (columns missing in the same rows):")
+        st.dataframe(profile.pattern_table(), hide_index=True,
+                     column_config={'share': st.column_config.NumberColumn(format='%.3f')})
+        # pairs of the columns with missing values, from the same patterns
+        co_missing = profile.co_missing()
+        columns = co_missing.index[co_missing.to_numpy().diagonal() > 0]
+        st.write("Rows missing both columns of a pair (the diagonal is the missing count of the column):")
+        st.dataframe(co_missing.loc[columns, columns])
+
+        # Investigate missing values by period
+        if 'PERIOD' in df_rq.columns:
+            # Plot heatmap (rendered once per dataset version)
+            st.write("Missing Data Across Examination Periods")
+            show_figure((dataset_version(), 'missing_by_period'), charts.missing_by_period, profile.by_group())
+        else:
+            st.write("The dataset does not contain a 'PERIOD' column.")
+ 
+        st.write("## Imputation of missing values for different columns:")
+        st.markdown("""
+- **TOTCHOL**: The missing values of TOTCHOL are reasonable and can therefore be calculated with median imputation.   
+- **BMI**: The missing values of BMI are reasonable and can therefore be calculated with median imputation.
+- **HEARTRTE**: The missing values of HEARTRTE are reasonable and can therefore be calculated with median imputation.
+- **BPMEDS**: The missing values of BPMEDS should be solved with categorical imputation. A new category, 'Unknown,' is created.
+- **GLUCOSE**: There is a high amount of missing values in GLUCOSE. Therefore, K-Nearest Neighbors (KNN) is used for imputation.
+""")
+      # Imputation (shared cleaning pipeline, cached per dataset version)
+        cleaned = clean_dataset()
+        df_rq_raw = df_rq
+        df_rq = cleaned.df_rq
+        st.write("Data After Imputation:")
+        st.dataframe(df_rq.head())
+
+      # Before imputation: Distribution of GLUCOSE
+        col1, col2 = st.columns(2)
+        with col1:
+            st.write("Distribution of GLUCOSE Before Imputation:")
+            fig1, ax1 = plt.subplots(figsize=(6, 4))
+            sns.histplot(df_rq_raw['GLUCOSE'], bins=30, kde=True, ax=ax1)
+            ax1.set_title('GLUCOSE Distribution Before Imputation')
+            ax1.set_xlabel('GLUCOSE')
+            ax1.set_ylabel('Frequency')
+            st.pyplot(fig1)
+            plt.close(fig1)
+
+        # KNN imputation for GLUCOSE (Only for GLUCOSE column) is part of the cleaning pipeline
+        with col2:
+            st.write("Distribution of GLUCOSE Before Imputation:")
+            fig1, ax1 = plt.subplots(figsize=(6, 4))
+            sns.histplot(df_rq['GLUCOSE'], bins=30, kde=True, ax=ax1)
+            ax1.set_title('GLUCOSE Distribution Before Imputation')
+            ax1.set_xlabel('GLUCOSE')
+            ax1.set_ylabel('Frequency')
+            st.pyplot(fig1)
+            plt.close(fig1)
+        
+        #Identify missing values in dataset
+        missing_values = missingness_profile(df_rq, cleaned.key).missing_counts().sum()
+        # Display warning message if there are missing values
+        if missing_values > 0:
+            st.markdown(
+            f"<span style='color:red; font-weight:bold;'>Warning: The dataset has {missing_values} missing values.</span>", 
+            unsafe_allow_html=True
+        )
+        else:
+            st.success("The dataset has no missing values.")
+
+        # Multiple imputation: m completed datasets drawn in parallel, pooled with Rubin's rules
+        st.write("## Multiple imputation (MICE)")
+        st.markdown("""
+A single imputation fills every missing value once, as if it had been measured, so the standard errors of later
+estimates are too small. Multiple imputation by chained equations draws several completed datasets, each missing value
+from a regression on the other columns (predictive mean matching). The spread between the datasets adds the
+uncertainty of the imputation to the standard errors (Rubin's rules).
+""")
+        m = st.slider("Number of completed datasets (m):", 2, 20, DEFAULT_IMPUTATIONS)
+        # the chains run in the background, once per data version and m for all sessions
+        job_key = ('mice', dataset_version(), m)
+        if st.button("Draw the imputations"):
+            job = job_queue().submit(f"Drawing {m} imputations", multiple_imputation, df_rq_raw, m, key=job_key)
+            st.session_state['mice_job'] = job.id
+        if show_job('mice_job', lambda job: _show_imputations(job.result, df_rq), key=job_key) is None:
+            st.info("Press the button to draw the completed datasets.")
+
+
+    with st.expander("##### Identify, report, correct issues with erroneous data (if any)"):
+        st.header("Identify, report, correct issues with erroneous data (if any)")
+        # List of binary columns
+        binary_columns = df_rq[['SEX', 'CURSMOKE', 'DIABETES', 'BPMEDS', 'ANYCHD', 'PERIOD']]
+
+        # Streamlit UI for displaying value counts of binary columns
+        st.write("### Value Counts for Binary Data Columns:")
+        # display the columns in groups of three
+        binary_column_names = binary_columns.columns
+        for i in range(0, len(binary_column_names), 3):
+            # Create columns for three tables side by side
+            cols = st.columns(3)
+    
+            # Display the value counts in each column
+            for col, binary_col in zip(cols, binary_column_names[i:i+3]):
+                value_count = df_rq[binary_col].value_counts()
+                with col:
+                    st.write(f"#### {binary_col}:")
+                    st.write(value_count)
+        
+
+    with st.expander("##### Identify and correct outliers"):
+        st.header("Identify and correct outliers")
+        # Boxplots to visualize outliers
+        st.write("Interactive Variable Visualization")
+        # Define color map for variables
+        color_map = {
+            'BMI': 'lightblue',
+            'AGE': 'lightgreen',
+            'TOTCHOL': 'salmon',
+            'SYSBP': 'gold',
+            'DIABP': 'orchid',
+            'HEARTRTE': 'lightcoral',
+            'GLUCOSE': 'lightpink'
+        }
+        # Select only numerical columns for visualization
+        numerical_columns = ['BMI', 'AGE', 'TOTCHOL', 'SYSBP', 'DIABP', 'HEARTRTE', 'GLUCOSE']
+        df_rq_numeric = df_rq[numerical_columns]
+        # Dropdown menu for selecting a variable
+        selected_variable = st.selectbox("Select a variable to visualize:", numerical_columns)
+
+        if selected_variable:
+            # Plot the selected variable
+            color = color_map.get(selected_variable, 'lightgray')
+            fig, ax = plt.subplots(figsize=(10, 8))
+            sns.boxplot(data=df_rq_numeric, y=selected_variable, color=color, ax=ax)
+            ax.set_title(f'{selected_variable} Boxplot', fontsize=16)
+            ax.set_xlabel('Index')
+            ax.set_ylabel(selected_variable)
+            ax.grid(True)
+            # Display the plot in Streamlit
+            st.pyplot(fig)
+            plt.close(fig)
+
+        #impute outliers
+        st.title("Outliers per column")
+        # Outlier mask of the cleaning pipeline, computed once per dataset version and method
+        outlier_method = st.selectbox(
+            "Outlier detection method:",
+            OUTLIER_METHODS,
+            format_func={'iqr': 'IQR (0.2/0.8 quantiles)', 'mad': 'MAD / robust z-score', 'percentile': 'Percentile clip (1%/99%)'}.get,
+        )
+        cleaned = clean_dataset(CleaningPipeline(outlier_method=outlier_method))
+
+        st.write("### Outlier Detection Results")
+        outlier_counts = cleaned.outliers.sum()
+        # Display outliers for each column
+        for col, num_outliers_col in outlier_counts.items():
+            st.write(f"###### {col}: {num_outliers_col} outliers")
+        st.write(f"###### Total Number of Outliers: {outlier_counts.sum()}")
+
+        st.title("Outlier Detection and KNN Imputation")
+        st.dataframe(df_rq.describe())
+
+        #Replace outliers with NaN (cleaning pipeline)
+        df_imputed = cleaned.df_imputed
+
+        st.write("### DataFrame with Outliers Replaced by NaN")            
+        st.dataframe(df_imputed.describe())
+
+        # KNN Imputation to replace NaN values (cleaning pipeline)
+        df_rqi = cleaned.df_rqi
+
+        st.write("### DataFrame After KNN Imputation")
+        st.dataframe(df_rqi.describe())
+
+        
+        #histogram data
+        st.title("Histogram Plotter")
+                # Define color map for variables
+        # Select column for the histogram
+        numerical_columnsi = ['BMI', 'AGE', 'TOTCHOL', 'SYSBP', 'DIABP', 'HEARTRTE', 'GLUCOSE']
+        df_rqi_numeric = df_rqi[numerical_columns]
+        column_to_plot = st.selectbox("Select a column to plot:", numerical_columnsi)
+        # Create the histogram
+        bins = st.slider("Number of bins", min_value=10, max_value=50, value=30)
+        fig, ax = plt.subplots()
+        sns.histplot(df_rqi[column_to_plot], bins=bins, kde=True, ax=ax, color='blue')
+        ax.set_title(f"Histogram of {column_to_plot}")
+        ax.set_xlabel(column_to_plot)
+        ax.set_ylabel("Frequency")
+        # Display the plot
+        st.pyplot(fig)
+        plt.close(fig)
@@ -0,0 +1,59 @@
+"""Introduction page: the study, the research question and a short quiz."""
+import streamlit as st
+
+
+def render():
+    st.title('Introduction')
+    #Description of the Framingham Heart Study
+    #st.subheader("About the Framingham Heart Study")
+    st.write("For this project we used a subset of the data collected from the Framingham Heart Study.")
+    st.write("This study was the first prospective study of cardiovascular disease and identified the concept of risk factors and their joint effects. The population consisted of free-living subjects in the community of Framingham, Massachusetts ")
+    st.write("The subset that we use contained information from the first round of physical examinations, as the original study contains information from 3 generations: first, second and third generation of participants")
+    st.write("Clinic data was collected from the participants during 3 examination periods, approximately 6 years apart (between 1956 - 1968). Each partiicpant was followed for a total of 24 years.")
+    st.write("The Framingham Heart Study has produced approximately 6,000 articles in leading medical journals.")
+    st.write("The dataset was provided for teaching purpose and was provided with permission from the National Heart, Lung and Blood Institute (NHLBI) (No. N01-HC-25195)")
+    st.image("https://avatars.githubusercontent.com/u/4061889?s=280&v=4", width=100)
+    st.write("reference: Hong Y. Framingham Heart Study (FHS) | National Heart, Lung, and Blood Institute (NHLBI) [Internet]. Nih.gov. 2018. Available from: https://www.nhlbi.nih.gov/science/framingham-heart-study-fhs")
+    st.write("")
+    st.write("")
+
+    # Research question
+    st.subheader("Research Question")
+    st.write("Does Body Mass Index (BMI) influence the prevalence of coronary heart disease (CHD)?")
+    st.write("")
+    st.write("")
+    # Quiz Section
+    st.subheader("Quiz: Correlation between BMI and CHD")
+    st.write("Answer the following questions to test your knowledge:")
+
+    # Questions and answers
+    questions = [
+        {"question": "Does a higher BMI increase the risk of CHD?", "answer": "Yes"},
+        {"question": "Is BMI the only factor influencing CHD?", "answer": "No"},
+        {"question": "Can lifestyle changes reduce BMI and CHD risk?", "answer": "Yes"},
+        {"question": "Is BMI below 18.5 considered healthy?", "answer": "No"},
+        {"question": "Does obesity (BMI > 30) strongly correlate with CHD?", "answer": "Yes"}
+        ]
+
+    user_answers = []
+    score = 0
+
+    # Render questions
+    for i, q in enumerate(questions):
+        col1, col2 = st.columns([4, 1])
+        with col1:
+            user_answer = st.radio(f"{q['question']}", ["Yes", "No"], key=f"q{i}")
+            user_answers.append(user_answer)
+        with col2:
+            if user_answer == q["answer"]:
+                st.success("✔")
+            elif user_answer != "":
+                st.error("✘")
+
+    # Calculate score after all questions are answered
+    if st.button("Submit Quiz"):
+        for i, q in enumerate(questions):
+            if user_answers[i] == q["answer"]:
+                score += 1
+        result = (score / len(questions)) * 100
+        st.write(f"Your score: {result}%")
@@ -0,0 +1,110 @@
+"""Data preparation page: summary statistics, correlations and BMI categories."""
+import matplotlib.pyplot as plt
+import numpy as np
+import seaborn as sns
+import streamlit as st
+
+from framingham import charts
+from framingham.bitmap import bitmap_index
+from framingham.correlation import correlation_matrix
+from framingham.cube import aggregate_cube
+from framingham.data import RQ_COLUMNS, dataset_version, load_dataset, load_rq
+from framingham.figures import show_figure
+
+# largest number of rows drawn as a scatter plot in "Auto" mode
+SCATTER_MAX_ROWS = 50_000
+# BMI categories of this page (BMI above 60 has no category)
+BMI_BINS = (0, 18.5, 25, 30, 60)
+# filters of the cohort section: column -> (label, names of the coded values)
+COHORT_FILTERS = {
+    'SEX': ("Sex", {1: "Male", 2: "Female"}),
+    'CURSMOKE': ("Smoking", {0: "Non-smoker", 1: "Current smoker"}),
+    'DIABETES': ("Diabetes", {0: "No", 1: "Yes"}),
+    'BPMEDS': ("BP medication", {0: "No", 1: "Yes"}),
+    'PERIOD': ("Examination period", {1: "1", 2: "2", 3: "3"}),
+}
+
+
+def render():
+    st.title("Data preparation")
+    # Shared loader: memoized across sessions, reads only the relevant columns for the research question
+    df_rq = load_rq()
+    st.write("### Summary Statistics of relevant rows")
+    period = st.radio("Examination period:", ['All', 1, 2, 3], horizontal=True)
+    if period == 'All':
+        st.dataframe(df_rq.describe())
+    else:
+        # only the rows of that period are read from the source (PERIOD = ... pushed down to the query)
+        st.dataframe(load_dataset(RQ_COLUMNS, filters={'PERIOD': [period]}).describe())
+
+
+    #heatmap
+    # Check if the dataset contains numeric data
+    if df_rq.select_dtypes(include=[np.number]).empty:
+        st.warning("The dataset does not contain numeric columns for correlation analysis.")
+    else:
+        # Correlation heatmap, rendered once per dataset version
+        st.write("### Correlation Heatmap")
+        show_figure((dataset_version(), 'correlation_heatmap', 'df_rq'), charts.correlation_heatmap,
+                    correlation_matrix('df_rq', df_rq, dataset_version()))
+
+    st.write("Scatter Plot: BMI vs. Age Colored by CHD Status")
+    # Above SCATTER_MAX_ROWS points the scatter plot is replaced by per-class density histograms
+    scatter_mode = st.radio("Rendering:", ["Auto", "Scatter", "Density"], horizontal=True)
+    if scatter_mode == "Density" or (scatter_mode == "Auto" and len(df_rq) > SCATTER_MAX_ROWS):
+        show_figure((dataset_version(), 'age_bmi_density'), charts.age_bmi_density, df_rq)
+    else:
+        show_figure((dataset_version(), 'age_bmi_scatter'), charts.age_bmi_scatter, df_rq)
+
+    # Categorize BMI: counts and sums per BMI category and the other categorical variables
+    cube = aggregate_cube(df_rq, dataset_version(), bmi_bins=BMI_BINS)
+
+    # Add interactivity: Allow user to select BMI category
+    selected_category = st.selectbox(
+        "Select a BMI Category to filter:",
+        ['All', 'Underweight', 'Normal', 'Overweight', 'Obese']
+        )
+
+    # Filter the data based on the selected category
+    if selected_category != 'All':
+        filtered_data = cube.filter(BMI_Category=selected_category)
+    else:
+        filtered_data = cube
+
+    # Bar Plot: CHD Prevalence by BMI Category
+    st.write("Interactive Bar Plot: CHD Prevalence by BMI Category")
+
+    chd_counts = filtered_data.means(['ANYCHD'], 'BMI_Category').reset_index()
+
+    plt.figure(figsize=(8, 6))
+    sns.barplot(x='BMI_Category', y='ANYCHD', data=chd_counts, palette='Blues_d')
+    plt.title('CHD Prevalence by BMI Category')
+    plt.xlabel('BMI Category')
+    plt.ylabel('CHD Prevalence (Proportion)')
+    st.pyplot(plt.gcf())
+    plt.close()
+
+    # Cohort filter: any combination of subgroups, resolved with bitwise operations on bitmap indexes
+    st.write("### Cohort filter")
+    index = bitmap_index(df_rq, dataset_version(), bmi_bins=BMI_BINS)
+    filters = {}
+    columns = st.columns(3)
+    for i, (column, (label, names)) in enumerate([*COHORT_FILTERS.items(), ('BMI_Category', ("BMI band", {}))]):
+        options = index.values(column)
+        with columns[i % 3]:
+            accepted = st.multiselect(f"{label}:", options, default=options,
+                                      format_func=lambda value, names=names: names.get(value, str(value)))
+        # everything selected: no filter, the rows with a missing value are kept as well
+        filters[column] = None if len(accepted) == len(options) else accepted
+    ages = index.values('AGE')
+    age_range = st.slider("Age (years):", int(ages[0]), int(ages[-1]), (int(ages[0]), int(ages[-1])))
+    filters['AGE'] = None if age_range == (int(ages[0]), int(ages[-1])) else age_range
+
+    selected = index.select(**filters)
+    cohort = index.summary(selected)
+    col1, col2, col3 = st.columns(3)
+    col1.metric("Participants (rows)", f"{cohort['rows']:,}")
+    col2.metric("CHD cases", f"{cohort['cases']:,}")
+    col3.metric("CHD prevalence", f"{cohort['prevalence']:.1%}" if cohort['rows'] else "–")
+    st.write("CHD prevalence of the cohort by BMI band")
+    st.bar_chart(index.breakdown(selected, 'BMI_Category')['prevalence'])
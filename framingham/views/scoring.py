@@ -0,0 +1,85 @@
+"""Batch scoring page: CHD risk of the patients of an uploaded file."""
+import io
+import os
+from pathlib import Path
+
+import streamlit as st
+
+from framingham.cleaning import clean_dataset
+from framingham.jobs import job_queue, show_job
+from framingham.scoring import INPUT_COLUMNS, SCORE_COLUMNS, file_format, output_path, read_chunks, score_with_model
+from framingham.training import MODEL_OPTIONS, model_spec, shared_split
+
+# score files up to this size can be downloaded through the browser (they are read in memory on the click)
+MAX_DOWNLOAD_MB = int(os.environ.get('FRAMINGHAM_MAX_DOWNLOAD_MB', 200))
+
+
+def _scoring_details(job):
+    """Rows scored so far and speed of a running scoring job."""
+    if job.partial.get('rows'):
+        st.caption(f"{job.partial['rows']:,} rows, {job.partial['rows_per_second']:,.0f} rows/s")
+
+
+def _show_scores(job):
+    """Statistics, first rows and download of the scores of a finished scoring job."""
+    stats = job.result
+    st.header(job.name)
+    col1, col2, col3 = st.columns(3)
+    col1.metric("Rows", f"{stats['rows']:,}")
+    col2.metric("Time", f"{stats['seconds']:.1f} s")
+    col3.metric("Rows per second", f"{stats['rows_per_second']:,.0f}")
+    output = Path(stats['output'])
+    if not output.exists():
+        st.warning("The score file was removed from the server, please score the file again.")
+        return
+    st.write("First rows")
+    chunks = read_chunks(output, chunk_size=10)
+    try:
+        preview = next(chunks)
+    finally:
+        # the reader keeps the file open until the generator is closed
+        chunks.close()
+    st.dataframe(preview[[*SCORE_COLUMNS, *(c for c in preview.columns if c not in SCORE_COLUMNS)]])
+    size_mb = output.stat().st_size / 2 ** 20
+    if size_mb <= MAX_DOWNLOAD_MB:
+        # the file is only read when the button is clicked, not on every run of the page
+        st.download_button("Download the scores", output.read_bytes, file_name=output.name,
+                           mime='application/octet-stream' if output.suffix == '.parquet' else 'text/csv')
+        st.caption(f"Also saved on the server as {output}")
+    else:
+        st.info(f"The scores ({size_mb:,.0f} MB) are too large to download through the browser "
+                f"(at most {MAX_DOWNLOAD_MB} MB); they are saved on the server as {output}")
+
+
+def render():
+    st.title("Batch scoring")
+    st.write("Score your own patients with a model trained on the cleaned Framingham data. "
+             "The file is read, encoded and scored in chunks, so it can have millions of rows.")
+    st.write("Required columns: " + ", ".join(INPUT_COLUMNS) + ". Missing values are replaced by the "
+             "medians of the training data; every other column is copied to the output.")
+
+    uploaded = st.file_uploader("Patient file", type=['csv', 'parquet'])
+    path = st.text_input("...or the path of a file on the server")
+    col1, col2 = st.columns(2)
+    with col1:
+        selected_model = st.selectbox("Model:", MODEL_OPTIONS, index=MODEL_OPTIONS.index('Random Forest'))
+    with col2:
+        output_format = st.radio("Output:", ['CSV', 'Parquet'], horizontal=True)
+
+    if st.button("Score the file", disabled=uploaded is None and not path):
+        if uploaded is not None:
+            # a copy, the job keeps reading it after the script run ends
+            source, fmt, name = io.BytesIO(uploaded.getvalue()), file_format(uploaded.name), uploaded.name
+        elif Path(path).is_file():
+            source, fmt, name = path, file_format(path), Path(path).name
+        else:
+            st.error(f"{path} is not a file")
+            return
+        cleaned = clean_dataset()
+        split = shared_split(cleaned.df_rqi, cleaned.key)
+        output = output_path('.parquet' if output_format == 'Parquet' else '.csv')
+        job = job_queue().submit(f"Scoring {name} with {selected_model}", score_with_model,
+                                 model_spec(selected_model), split, cleaned.key, source, output, fmt=fmt)
+        st.session_state['scoring_job'] = job.id
+
+    show_job('scoring_job', _show_scores, _scoring_details)
@@ -0,0 +1,63 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from framingham.bitmap import BitmapIndex
+from framingham.data import BMI_BINS, BMI_LABELS, RQ_COLUMNS, compact_dtypes
+
+
+def _frame(seed=0, rows=3000):
+    rng = np.random.default_rng(seed)
+    df = pd.DataFrame({
+        'BMI': rng.normal(26, 5, rows), 'AGE': rng.uniform(32, 81, rows), 'SEX': rng.integers(1, 3, rows),
+        'TOTCHOL': rng.normal(235, 45, rows), 'SYSBP': rng.normal(135, 20, rows), 'DIABP': rng.normal(82, 11, rows),
+        'CURSMOKE': rng.integers(0, 2, rows), 'DIABETES': rng.integers(0, 2, rows),
+        'BPMEDS': rng.integers(0, 2, rows).astype(float), 'HEARTRTE': rng.normal(76, 12, rows),
+        'GLUCOSE': rng.normal(82, 20, rows), 'ANYCHD': rng.integers(0, 2, rows), 'PERIOD': rng.integers(1, 4, rows),
+    })[RQ_COLUMNS]
+    # missing values in filtered columns (BPMEDS, and BMI for BMI_Category)
+    for column, share in [('BMI', 0.03), ('BPMEDS', 0.05)]:
+        df.loc[rng.random(rows) < share, column] = np.nan
+    df = compact_dtypes(df)
+    df['BMI_Category'] = pd.cut(df['BMI'], bins=BMI_BINS, labels=BMI_LABELS)
+    return df
+
+
+@pytest.fixture(scope='module')
+def df():
+    return _frame()
+
+
+@pytest.fixture(scope='module')
+def index(df):
+    return BitmapIndex.build(df)
+
+
+@pytest.mark.parametrize('filters', [
+    {},
+    {'SEX': [2]},
+    {'BPMEDS': [0, 1], 'PERIOD': [1, 3]},
+    {'BMI_Category': ['Overweight', 'Obese'], 'AGE': (45, 60), 'CURSMOKE': None},
+    {'DIABETES': [], 'SEX': [1]},
+])
+def test_select_matches_boolean_mask(df, index, filters):
+    mask = np.ones(len(df), dtype=bool)
+    for column, accepted in filters.items():
+        if accepted is None:
+            continue
+        if column == 'AGE':
+            mask &= ((np.floor(df['AGE']) >= accepted[0]) & (np.floor(df['AGE']) <= accepted[1])).to_numpy()
+        else:
+            # the rows with a missing value are only kept by a column without filter
+            mask &= df[column].isin(accepted).fillna(False).to_numpy(dtype=bool)
+    selected = index.select(**filters)
+    rows = df[mask]
+    assert index.summary(selected) == pytest.approx({
+        'rows': len(rows), 'cases': int((rows['ANYCHD'] == 1).sum()),
+        'prevalence': (rows['ANYCHD'] == 1).mean() if len(rows) else float('nan')}, nan_ok=True)
+
+    breakdown = index.breakdown(selected, 'BMI_Category')
+    expected = rows.groupby('BMI_Category', observed=False)['ANYCHD'].agg(['size', 'sum'])
+    np.testing.assert_array_equal(breakdown['rows'].to_numpy(), expected['size'].to_numpy())
+    np.testing.assert_array_equal(breakdown['cases'].to_numpy(), expected['sum'].to_numpy())
+    assert list(breakdown.index) == BMI_LABELS
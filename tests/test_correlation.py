@@ -0,0 +1,60 @@
+import numpy as np
+import pandas as pd
+import pandas.testing as pdt
+
+from framingham.correlation import CorrelationEngine
+
+
+def _frame(seed, rows=5000):
+    # correlated measurements on different scales, with missing values
+    rng = np.random.default_rng(seed)
+    base = rng.normal(size=rows)
+    df = pd.DataFrame({
+        'AGE': 50 + 8 * base + rng.normal(size=rows),
+        'SYSBP': 130 + 15 * base + 10 * rng.normal(size=rows),
+        'TOTCHOL': 235 + 45 * rng.normal(size=rows),
+        'GLUCOSE': 82 - 5 * base + 20 * rng.normal(size=rows),
+        'SEX': rng.integers(1, 3, rows),
+    })
+    for column, share in [('TOTCHOL', 0.05), ('GLUCOSE', 0.1)]:
+        df.loc[rng.random(rows) < share, column] = np.nan
+    return df
+
+
+def _assert_matches_pandas(matrix, df):
+    pdt.assert_frame_equal(matrix, df.corr().astype(np.float32), rtol=0, atol=1e-5)
+
+
+def test_append_updates_the_statistics():
+    engine = CorrelationEngine()
+    df = _frame(0)
+    _assert_matches_pandas(engine.matrix('df', df, 'v1'), df)
+    stats = engine._entries['df']['stats']
+
+    appended = pd.concat([df, _frame(1, rows=700)], ignore_index=True)
+    _assert_matches_pandas(engine.matrix('df', appended, 'v2'), appended)
+    # the new rows were added to the statistics of the first version
+    assert engine._entries['df']['stats'] is stats
+    assert stats.n_rows == len(appended)
+
+
+def test_edit_recomputes_the_statistics():
+    engine = CorrelationEngine()
+    df = _frame(0)
+    engine.matrix('df', df, 'v1')
+    stats = engine._entries['df']['stats']
+
+    # one of the counted rows changes, and rows are appended: the digest of the counted rows differs
+    edited = pd.concat([df, _frame(1, rows=700)], ignore_index=True)
+    edited.loc[3, 'SYSBP'] += 40
+    _assert_matches_pandas(engine.matrix('df', edited, 'v2'), edited)
+    assert engine._entries['df']['stats'] is not stats
+    # fewer rows than counted
+    _assert_matches_pandas(engine.matrix('df', df.iloc[:1000], 'v3'), df.iloc[:1000])
+
+
+def test_same_version_is_cached():
+    engine = CorrelationEngine()
+    df = _frame(0)
+    matrix = engine.matrix('df', df, 'v1')
+    assert engine.matrix('df', df.iloc[:10], 'v1') is matrix
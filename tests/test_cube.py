@@ -0,0 +1,71 @@
+import numpy as np
+import pandas as pd
+import pandas.testing as pdt
+import pytest
+
+from framingham.cube import AggregateCube
+from framingham.data import BMI_BINS, BMI_LABELS, RQ_COLUMNS, compact_dtypes
+
+
+def _frame(seed=0, rows=3000):
+    rng = np.random.default_rng(seed)
+    df = pd.DataFrame({
+        'BMI': rng.normal(26, 5, rows), 'AGE': rng.uniform(32, 81, rows), 'SEX': rng.integers(1, 3, rows),
+        'TOTCHOL': rng.normal(235, 45, rows), 'SYSBP': rng.normal(135, 20, rows), 'DIABP': rng.normal(82, 11, rows),
+        'CURSMOKE': rng.integers(0, 2, rows), 'DIABETES': rng.integers(0, 2, rows),
+        'BPMEDS': rng.integers(0, 2, rows).astype(float), 'HEARTRTE': rng.normal(76, 12, rows),
+        'GLUCOSE': rng.normal(82, 20, rows), 'ANYCHD': rng.integers(0, 2, rows), 'PERIOD': rng.integers(1, 4, rows),
+    })[RQ_COLUMNS]
+    # missing dimensions (BPMEDS, and BMI for BMI_Category) and measures
+    for column, share in [('BMI', 0.03), ('BPMEDS', 0.05), ('GLUCOSE', 0.1), ('TOTCHOL', 0.02)]:
+        df.loc[rng.random(rows) < share, column] = np.nan
+    df = compact_dtypes(df)
+    df['BMI_Category'] = pd.cut(df['BMI'], bins=BMI_BINS, labels=BMI_LABELS)
+    return df
+
+
+@pytest.fixture(scope='module')
+def df():
+    return _frame()
+
+
+@pytest.fixture(scope='module')
+def cube(df):
+    return AggregateCube.build(df)
+
+
+def test_cells_keep_missing_dimensions(df, cube):
+    # the rows with a missing dimension value are cells of their own (groupby dropna=False)
+    assert cube.cells['count'].sum() == len(df)
+    assert cube.cells['BPMEDS'].isna().any() and cube.cells['BMI_Category'].isna().any()
+    expected = df.groupby(['BPMEDS', 'BMI_Category'], dropna=False, observed=True).size()
+    actual = cube.cells.groupby(['BPMEDS', 'BMI_Category'], dropna=False, observed=True)['count'].sum()
+    pdt.assert_series_equal(actual.sort_index(), expected.sort_index(), check_names=False, check_dtype=False)
+
+
+@pytest.mark.parametrize('dimension', ['PERIOD', 'SEX', 'BPMEDS', 'BMI_Category', 'ANYCHD'])
+def test_counts_and_proportions(df, cube, dimension):
+    # the rows missing another dimension are still counted
+    pdt.assert_series_equal(cube.counts(dimension).sort_index(), df[dimension].value_counts().sort_index(),
+                            check_dtype=False, check_index_type=False)
+    pdt.assert_series_equal(cube.proportions(dimension).sort_index(),
+                            df[dimension].value_counts(normalize=True).sort_index(), check_dtype=False,
+                            check_index_type=False)
+
+
+@pytest.mark.parametrize('by', ['PERIOD', 'BMI_Category', 'BPMEDS'])
+def test_means(df, cube, by):
+    measures = ['AGE', 'BMI', 'GLUCOSE', 'TOTCHOL', 'ANYCHD']
+    expected = df.groupby(by, observed=False)[measures].mean()
+    pdt.assert_frame_equal(cube.means(measures, by), expected, check_dtype=False, check_index_type=False,
+                           rtol=1e-6)
+
+
+def test_filter(df, cube):
+    filtered = cube.filter(BMI_Category='Obese', SEX=2)
+    rows = df[(df['BMI_Category'] == 'Obese') & (df['SEX'] == 2)]
+    assert filtered.cells['count'].sum() == len(rows)
+    pdt.assert_frame_equal(filtered.means(['ANYCHD', 'GLUCOSE'], 'PERIOD'),
+                           rows.groupby('PERIOD')[['ANYCHD', 'GLUCOSE']].mean(), check_dtype=False, rtol=1e-6)
+    pdt.assert_series_equal(filtered.counts('BPMEDS').sort_index(), rows['BPMEDS'].value_counts().sort_index(),
+                            check_dtype=False, check_index_type=False)
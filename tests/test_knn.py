@@ -0,0 +1,44 @@
+import numpy as np
+import pytest
+from sklearn.impute import KNNImputer
+
+from framingham.knn import knn_impute
+
+
+def _frame(seed, rows=2000, columns=5, missing=0.2):
+    # continuous values, so the nearest donors have no ties
+    rng = np.random.default_rng(seed)
+    X = rng.normal(size=(rows, columns))
+    X[rng.random(X.shape) < missing] = np.nan
+    # rows without any present value get the column means
+    X[:3] = np.nan
+    return X
+
+
+@pytest.mark.parametrize('seed', range(3))
+@pytest.mark.parametrize('n_neighbors', [1, 3, 5])
+def test_matches_sklearn(seed, n_neighbors):
+    X = _frame(seed)
+    expected = KNNImputer(n_neighbors=n_neighbors).fit_transform(X)
+    np.testing.assert_allclose(knn_impute(X, n_neighbors), expected, rtol=0, atol=1e-12)
+
+
+def test_brute_force_and_chunks_match_sklearn():
+    # a handful of rows per missing pattern (brute force) and receivers split in several chunks
+    X = _frame(0, rows=300, columns=4, missing=0.1)
+    expected = KNNImputer(n_neighbors=3).fit_transform(X)
+    np.testing.assert_allclose(knn_impute(X, 3, chunk_size=7, workers=2), expected, rtol=0, atol=1e-12)
+
+
+def test_few_donors():
+    # fewer donors than neighbours: the mean of all of them, like KNNImputer
+    X = np.array([[1.0, 2.0], [2.0, np.nan], [3.0, 6.0], [np.nan, 4.0]])
+    expected = KNNImputer(n_neighbors=5).fit_transform(X)
+    np.testing.assert_allclose(knn_impute(X, 5), expected)
+
+
+def test_column_without_values_is_left_missing():
+    X = np.array([[1.0, np.nan], [np.nan, np.nan], [3.0, np.nan]])
+    result = knn_impute(X, 2)
+    assert result[1, 0] == 2.0
+    assert np.isnan(result[:, 1]).all()
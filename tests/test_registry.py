@@ -0,0 +1,89 @@
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from framingham import training
+from framingham.registry import ModelRegistry
+from framingham.training import fitted_model, model_spec, train_models
+
+
+def _split(seed=0, rows=400):
+    rng = np.random.default_rng(seed)
+    X = pd.DataFrame(rng.normal(size=(rows, 3)), columns=['AGE', 'SYSBP', 'BMI'])
+    y = pd.Series((X['AGE'] + X['SYSBP'] + rng.normal(size=rows) > 0).astype(int))
+    return X[:300], X[300:], y[:300], y[300:]
+
+
+def _put(registry, key, last_used):
+    registry.put(key, {'coefficients': list(range(100))}, {'test': {'Accuracy': 0.5}})
+    # the modification times are the "last used" times of the eviction
+    for path in registry.root.glob(f'{key}.*'):
+        os.utime(path, (last_used, last_used))
+
+
+def test_evict_removes_the_least_recently_used(tmp_path):
+    registry = ModelRegistry(tmp_path, max_bytes=10 ** 9)
+    _put(registry, 'a', 1000)
+    size = sum(entry[1] for entry in registry.entries())
+    _put(registry, 'b', 2000)
+    _put(registry, 'c', 3000)
+    # 'a' is used again: 'b' is now the least recently used
+    assert registry.get_result('a') is not None
+    registry.max_bytes = int(2.5 * size)
+    _put(registry, 'd', 4000)
+    assert sorted(key for _, _, key in registry.entries()) == ['a', 'd']
+    assert registry.get_result('b') is None and registry.load_model('b') is None
+    assert registry.load_model('a') == {'coefficients': list(range(100))}
+
+
+def test_evict_keeps_the_newest_entry(tmp_path):
+    registry = ModelRegistry(tmp_path, max_bytes=1)
+    _put(registry, 'a', 1000)
+    _put(registry, 'b', 2000)
+    assert [key for _, _, key in registry.entries()] == ['b']
+
+
+@pytest.fixture
+def fits(monkeypatch):
+    # the tasks run in threads of this process, so the fits can be counted
+    calls = []
+    fit_and_evaluate = training.fit_and_evaluate
+
+    def counted(*args, **kwargs):
+        calls.append(args[0])
+        return fit_and_evaluate(*args, **kwargs)
+    executor = ThreadPoolExecutor(2)
+    monkeypatch.setattr(training, 'get_executor', lambda: executor)
+    monkeypatch.setattr(training, 'fit_and_evaluate', counted)
+    yield calls
+    executor.shutdown()
+
+
+def test_train_models_reuses_registered_models(tmp_path, fits):
+    registry = ModelRegistry(tmp_path)
+    split = _split()
+    specs = [model_spec('Logistic Regression'), model_spec('KNN')]
+    first = train_models(specs, *split, folds=3, registry=registry, data_key='v1')
+    assert len(fits) == len(specs) * 4
+
+    fits.clear()
+    assert train_models(specs, *split, folds=3, registry=registry, data_key='v1') == first
+    assert fits == []
+    # another data version is trained again
+    train_models(specs[:1], *split, folds=3, registry=registry, data_key='v2')
+    assert len(fits) == 4
+
+
+def test_fitted_model_from_the_registry(tmp_path, fits):
+    registry = ModelRegistry(tmp_path)
+    split = _split()
+    spec = model_spec('Logistic Regression')
+    model = fitted_model(spec, *split, registry=registry, data_key='v1')
+    fits.clear()
+    again = fitted_model(spec, *split, registry=registry, data_key='v1')
+    assert fits == []
+    X_test = split[1].to_numpy()
+    np.testing.assert_array_equal(again.predict(X_test), model.predict(X_test))
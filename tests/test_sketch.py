@@ -0,0 +1,56 @@
+import numpy as np
+import pytest
+
+from framingham.sketch import QuantileSketch
+
+QUANTILES = np.linspace(0, 1, 101)
+
+
+def _rank_error(sketch, values):
+    # largest distance between the requested quantile and the rank of the returned value, as a share of the values
+    ranks = np.searchsorted(np.sort(values), sketch.quantile(QUANTILES), side='right') / len(values)
+    return np.abs(ranks - QUANTILES).max()
+
+
+def test_exact_below_capacity():
+    values = np.random.default_rng(0).normal(size=1000)
+    values[::10] = np.nan
+    sketch = QuantileSketch(capacity=1024).update(values[:400]).update(values[400:])
+    assert sketch.count == 900
+    np.testing.assert_allclose(sketch.quantile(QUANTILES), np.nanquantile(values, QUANTILES), rtol=0, atol=1e-12)
+
+
+def test_empty():
+    assert np.isnan(QuantileSketch().quantile(0.5))
+
+
+@pytest.mark.parametrize('seed', range(3))
+@pytest.mark.parametrize('capacity', [64, 256])
+def test_rank_error_bound(seed, capacity):
+    rng = np.random.default_rng(seed)
+    values = np.concatenate([rng.lognormal(size=60_000), rng.normal(size=40_000)])
+    rng.shuffle(values)
+    sketch = QuantileSketch(capacity=capacity, seed=seed)
+    for chunk in np.array_split(values, 37):
+        sketch.update(chunk)
+    assert sketch.count == len(values)
+    assert _rank_error(sketch, values) <= np.log2(len(values) / capacity) / capacity
+
+
+def test_merge():
+    rng = np.random.default_rng(0)
+    parts = [rng.normal(loc, size=size) for loc, size in [(0, 300), (5, 200), (-2, 500)]]
+    # below the capacity: the merged sketch is exact
+    merged = QuantileSketch(capacity=1024)
+    for part in parts:
+        merged.merge(QuantileSketch(capacity=1024).update(part))
+    np.testing.assert_allclose(merged.quantile(QUANTILES), np.quantile(np.concatenate(parts), QUANTILES),
+                               rtol=0, atol=1e-12)
+
+    # sketches of separate chunks combine into a sketch of all the values, within the same bound
+    values = rng.normal(size=100_000)
+    merged = QuantileSketch(capacity=128)
+    for seed, chunk in enumerate(np.array_split(values, 10)):
+        merged.merge(QuantileSketch(capacity=128, seed=seed).update(chunk))
+    assert merged.count == len(values)
+    assert _rank_error(merged, values) <= np.log2(len(values) / 128) / 128
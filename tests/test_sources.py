@@ -0,0 +1,47 @@
+import sqlite3
+
+import numpy as np
+import pandas as pd
+import pandas.testing as pdt
+
+from framingham.sources import SqlSource
+
+
+def _frame(rows=500, seed=0):
+    rng = np.random.default_rng(seed)
+    df = pd.DataFrame({
+        'RANDID': np.repeat(np.arange(rows // 2), 2),
+        'PERIOD': np.tile([1, 2], rows // 2),
+        'AGE': rng.integers(30, 70, rows),
+        'BMI': rng.normal(26, 4, rows),
+    })
+    df.loc[rng.random(rows) < 0.1, 'BMI'] = np.nan
+    return df
+
+
+def _source(tmp_path):
+    path = tmp_path / 'framingham.db'
+    return SqlSource(lambda: sqlite3.connect(path, check_same_thread=False), 'framingham', 'qmark'), path
+
+
+def test_read_matches_pandas(tmp_path):
+    df = _frame()
+    source, _ = _source(tmp_path)
+    # written out of order: the rows are read back sorted by RANDID and PERIOD
+    source.create(df.sample(frac=1, random_state=0))
+    pdt.assert_frame_equal(source.read().to_pandas(), df)
+    expected = df.loc[df['PERIOD'] == 2, ['AGE', 'BMI']].reset_index(drop=True)
+    pdt.assert_frame_equal(source.read(['AGE', 'BMI'], {'PERIOD': [2]}).to_pandas(), expected)
+    assert source.read(['AGE'], {'PERIOD': [1, 2]}).num_rows == len(df)
+    assert source.read(['AGE'], {'PERIOD': [3]}).num_rows == 0
+
+
+def test_version_changes_after_update(tmp_path):
+    source, path = _source(tmp_path)
+    source.create(_frame())
+    before = source.version()
+    assert source.version() == before
+    # same number of rows, one value changed in place
+    with sqlite3.connect(path) as conn:
+        conn.execute('UPDATE framingham SET AGE = AGE + 1 WHERE RANDID = 7 AND PERIOD = 1')
+    assert source.version() != before
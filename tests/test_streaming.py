@@ -0,0 +1,48 @@
+import numpy as np
+import pandas as pd
+import pandas.testing as pdt
+import pytest
+
+from framingham.cleaning import CleaningPipeline, impute_missing, impute_outliers, mask_outliers
+from framingham.data import RQ_COLUMNS, compact_dtypes
+from framingham.outliers import detect_outliers
+from framingham.streaming import stream_clean
+
+
+def _cohort(seed, rows=1000):
+    # continuous measurements with missing values and a few outliers, so the nearest donors have no ties
+    rng = np.random.default_rng(seed)
+    df = pd.DataFrame({
+        'BMI': rng.normal(26, 4, rows), 'AGE': rng.normal(55, 8, rows), 'SEX': rng.integers(1, 3, rows),
+        'TOTCHOL': rng.normal(235, 45, rows), 'SYSBP': rng.normal(135, 20, rows), 'DIABP': rng.normal(82, 11, rows),
+        'CURSMOKE': rng.integers(0, 2, rows), 'DIABETES': rng.integers(0, 2, rows),
+        'BPMEDS': rng.integers(0, 2, rows).astype(float), 'HEARTRTE': rng.normal(76, 12, rows),
+        'GLUCOSE': rng.normal(82, 20, rows), 'ANYCHD': rng.integers(0, 2, rows), 'PERIOD': rng.integers(1, 4, rows),
+    })[RQ_COLUMNS]
+    for column, share in [('BMI', 0.02), ('TOTCHOL', 0.05), ('HEARTRTE', 0.01), ('GLUCOSE', 0.1), ('BPMEDS', 0.05)]:
+        df.loc[rng.random(rows) < share, column] = np.nan
+    df.loc[rng.choice(rows, 10, replace=False), 'SYSBP'] *= 2
+    return df
+
+
+def _clean_in_memory(df, pipeline):
+    # the stages of CleaningPipeline.run, without the shared frame cache
+    df_rq = compact_dtypes(df)
+    df_missing = impute_missing(df_rq, pipeline.glucose_neighbors, pipeline.median_columns)
+    outliers = detect_outliers(df_rq, pipeline.outlier_columns, pipeline.outlier_method,
+                               lower_quantile=pipeline.lower_quantile, upper_quantile=pipeline.upper_quantile,
+                               iqr_factor=pipeline.iqr_factor, mad_threshold=pipeline.mad_threshold,
+                               clip_quantiles=pipeline.clip_quantiles)
+    df_imputed = mask_outliers(df_missing, outliers, pipeline.outlier_columns)
+    return impute_outliers(df_imputed, pipeline.outlier_columns, pipeline.outlier_neighbors)
+
+
+@pytest.mark.parametrize('method', ['iqr', 'mad', 'percentile'])
+def test_matches_in_memory_cleaning(tmp_path, method):
+    df = _cohort(0)
+    df.to_csv(tmp_path / 'cohort.csv', index=False)
+    pipeline = CleaningPipeline(outlier_method=method)
+    # several chunks, every row in the donor sample and the quantile sketches
+    stream_clean(tmp_path / 'cohort.csv', tmp_path / 'cleaned.parquet', pipeline, chunk_size=300)
+    expected = _clean_in_memory(df, pipeline)
+    pdt.assert_frame_equal(pd.read_parquet(tmp_path / 'cleaned.parquet'), expected, rtol=1e-6)